@@ -14,6 +14,7 @@ from fastapi.security import HTTPBearer
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
 from ..core.ab_testing import (
@@ -25,7 +26,7 @@ from ..core.ab_testing import (
     ExperimentStatus,
     VariantType,
     MetricType,
-    create_ab_testing_framework,
+    load_ab_testing_framework,
     create_plugin_recommendation_experiment
 )
 
@@ -35,14 +36,24 @@ security = HTTPBearer()
 
 # Global framework instance
 ab_framework: Optional[ABTestingFramework] = None
+_framework_lock = asyncio.Lock()
 
-def get_ab_framework() -> ABTestingFramework:
+async def get_ab_framework() -> ABTestingFramework:
     """Get A/B testing framework instance"""
     global ab_framework
     if ab_framework is None:
-        ab_framework = create_ab_testing_framework()
+        async with _framework_lock:
+            if ab_framework is None:
+                ab_framework = await load_ab_testing_framework()
     return ab_framework
 
+async def close_ab_framework():
+    """Flush queued assignment/event writes and stop the storage writer"""
+    if ab_framework is not None:
+        await ab_framework.close()
+
+router.add_event_handler("shutdown", close_ab_framework)
+
 # Pydantic models for API
 class ExperimentVariantCreate(BaseModel):
     name: str
@@ -435,13 +446,13 @@ async def get_plugin_recommendations(
 async def ab_testing_health():
     """Health check for A/B testing system"""
     try:
-        framework = get_ab_framework()
+        framework = await get_ab_framework()
         return {
             "status": "healthy",
             "service": "ab_testing",
             "experiments_count": len(framework.experiments),
-            "assignments_count": len(framework.user_assignments),
-            "events_count": len(framework.experiment_events),
+            "assignments_count": sum(len(assignments) for assignments in framework.user_assignments.values()),
+            "events_count": framework.event_count(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -465,11 +476,11 @@ async def get_ab_testing_analytics(
             if exp.status == ExperimentStatus.ACTIVE
         ])
         
-        total_users_in_experiments = len(set(
-            assignment.user_id for assignment in framework.user_assignments.values()
+        total_users_in_experiments = len(set().union(
+            *(assignments.keys() for assignments in framework.user_assignments.values())
         ))
         
-        total_events = len(framework.experiment_events)
+        total_events = framework.event_count()
         
         # Recent activity (last 24 hours)
         cutoff_time = datetime.now() - timedelta(hours=24)
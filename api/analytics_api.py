@@ -483,7 +483,7 @@ async def get_system_stats(
     """Get system statistics (admin only)"""
     try:
         return {
-            "events_buffer_size": len(collector.events_buffer),
+            "events_buffer_size": collector.buffered_events,
             "active_sessions": len(collector.sessions),
             "plugin_metrics_count": len(collector.plugin_metrics),
             "user_metrics_count": len(collector.user_metrics),
@@ -502,7 +502,7 @@ async def flush_events(
 ):
     """Manually flush events to storage (admin only)"""
     try:
-        events_count = len(collector.events_buffer)
+        events_count = collector.buffered_events
         await collector._flush_events()
         
         return {
@@ -538,7 +538,7 @@ async def analytics_health_check():
         
         return {
             "status": "healthy",
-            "events_buffer_size": len(collector.events_buffer),
+            "events_buffer_size": collector.buffered_events,
             "active_sessions": len(collector.sessions),
             "test_event_id": test_event_id,
             "timestamp": datetime.now().isoformat()
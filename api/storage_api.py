@@ -11,20 +11,26 @@ FastAPI routes and endpoints for:
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.responses import StreamingResponse, FileResponse
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import os
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
+import time
+from pathlib import PurePosixPath
 
 # Import our storage and distribution systems
-from .cloud_storage import CloudStorageManager, create_storage_manager
-from .plugin_distribution import PluginDistributionManager, PluginMarketplace, create_plugin_distribution_manager
+from core.cloud_storage import CloudStorageManager, StorageProvider, create_storage_manager
+from core.plugin_distribution import PluginDistributionManager, PluginMarketplace, create_plugin_distribution_manager
+
+logger = logging.getLogger(__name__)
 
 # Pydantic models for API
 class FileUploadResponse(BaseModel):
     """File upload response"""
+    model_config = ConfigDict(frozen=True)
+    
     success: bool
     file_key: str
     file_size: int
@@ -34,23 +40,31 @@ class FileUploadResponse(BaseModel):
 
 class PluginSearchRequest(BaseModel):
     """Plugin search request"""
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+    
     query: str
     category: Optional[str] = None
     limit: int = 20
 
 class PluginDownloadRequest(BaseModel):
     """Plugin download request"""
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+    
     plugin_id: str
     version: str
 
 class PluginDownloadResponse(BaseModel):
     """Plugin download response"""
+    model_config = ConfigDict(frozen=True)
+    
     download_id: str
     status: str
     estimated_time: Optional[int] = None
 
 class UserDataExportRequest(BaseModel):
     """User data export request"""
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+    
     format: str = "json"  # json, csv
     include_workouts: bool = True
     include_progress: bool = True
@@ -61,34 +75,95 @@ storage_manager: Optional[CloudStorageManager] = None
 distribution_manager: Optional[PluginDistributionManager] = None
 marketplace: Optional[PluginMarketplace] = None
 
+# Guards manager creation so concurrent first requests share one initialization
+_init_lock = asyncio.Lock()
+
+# Health check sentinel, written once and probed with a metadata-only read
+HEALTH_SENTINEL_KEY = "health_check/sentinel"
+HEALTH_SENTINEL_DATA = b"Health check sentinel"
+HEALTH_CACHE_TTL = 5.0  # seconds
+_health_sentinel_etag: Optional[str] = None
+_health_cache: Optional[Dict[str, Any]] = None
+_health_cache_time: float = 0.0
+
+# Failure recorded by the startup hook; /health reports degraded until a retry succeeds
+_startup_error: Optional[str] = None
+
 # API Router
 router = APIRouter(prefix="/api/storage", tags=["Cloud Storage"])
 plugin_router = APIRouter(prefix="/api/plugins", tags=["Plugin Marketplace"])
 
+async def initialize_storage_services():
+    """Create and initialize storage, distribution and marketplace managers once"""
+    global storage_manager, distribution_manager, marketplace, _startup_error
+    async with _init_lock:
+        if storage_manager is None:
+            manager = create_storage_manager()
+            await manager.initialize()
+            storage_manager = manager
+            await _ensure_health_sentinel(storage_manager)
+        if distribution_manager is None:
+            distribution_manager = create_plugin_distribution_manager(storage_manager)
+        if marketplace is None:
+            marketplace = PluginMarketplace(distribution_manager)
+        _startup_error = None
+
+async def _startup_storage_services():
+    """Startup hook: initialize storage, logging failures instead of aborting app startup"""
+    global _startup_error
+    try:
+        await initialize_storage_services()
+    except Exception as e:
+        logger.exception("Storage services failed to initialize at startup: %s", e)
+        _startup_error = str(e)
+
+async def close_storage_services():
+    """Release the storage manager's long-lived provider clients"""
+    if storage_manager is not None:
+        await storage_manager.aclose()
+
 async def get_storage_manager() -> CloudStorageManager:
     """Dependency to get storage manager"""
-    global storage_manager
     if storage_manager is None:
-        storage_manager = create_storage_manager()
-        await storage_manager.initialize()
+        await initialize_storage_services()
     return storage_manager
 
 async def get_distribution_manager() -> PluginDistributionManager:
     """Dependency to get distribution manager"""
-    global distribution_manager
     if distribution_manager is None:
-        storage = await get_storage_manager()
-        distribution_manager = create_plugin_distribution_manager(storage)
+        await initialize_storage_services()
     return distribution_manager
 
 async def get_marketplace() -> PluginMarketplace:
     """Dependency to get marketplace"""
-    global marketplace
     if marketplace is None:
-        dist_manager = await get_distribution_manager()
-        marketplace = PluginMarketplace(dist_manager)
+        await initialize_storage_services()
     return marketplace
 
+# Maps API folder names to CloudStorageManager.folders templates
+USER_FOLDER_TEMPLATES = {
+    "uploads": "user_uploads",
+    "data": "user_data"
+}
+
+def _user_folder_prefix(storage: CloudStorageManager, user_id: str, folder: str) -> str:
+    """Get the storage prefix for one of a user's folders"""
+    template = USER_FOLDER_TEMPLATES.get(folder)
+    if template is not None:
+        return storage.folders[template].format(user_id=user_id)
+    return f"users/{user_id}/{folder}/"
+
+def _resolve_user_key(user_id: str, file_key: str) -> str:
+    """Normalize a file key into the user's namespace, rejecting traversal"""
+    user_root = f"users/{user_id}/"
+    relative_key = file_key[len(user_root):] if file_key.startswith(user_root) else file_key
+    key = PurePosixPath("users", user_id, relative_key)
+    
+    if key.parts[:2] != ("users", user_id) or ".." in key.parts:
+        raise HTTPException(status_code=400, detail="Invalid file key")
+    
+    return str(key)
+
 # File upload/download endpoints
 @router.post("/upload/{user_id}", response_model=FileUploadResponse)
 async def upload_user_file(
@@ -103,12 +178,7 @@ async def upload_user_file(
         file_data = await file.read()
         
         # Generate storage key
-        if folder == "uploads":
-            storage_key = storage.get_user_upload_path(user_id, file.filename)
-        elif folder == "data":
-            storage_key = storage.get_user_data_path(user_id, file.filename)
-        else:
-            storage_key = f"users/{user_id}/{folder}/{file.filename}"
+        storage_key = _user_folder_prefix(storage, user_id, folder) + file.filename
         
         # Upload file
         success = await storage.upload_file(
@@ -133,12 +203,12 @@ async def upload_user_file(
             file_key=storage_key,
             file_size=len(file_data),
             content_type=file.content_type or "application/octet-stream",
-            upload_time=datetime.now().isoformat(),
+            upload_time=datetime.now(timezone.utc).isoformat(),
             download_url=download_url
         )
         
     except Exception as e:
-        logging.error(f"File upload failed: {e}")
+        logger.exception("File upload failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/download/{user_id}/{file_key:path}")
@@ -150,8 +220,19 @@ async def download_user_file(
     """Download file for a user"""
     try:
         # Validate that file belongs to user
-        if not file_key.startswith(f"users/{user_id}/"):
-            file_key = f"users/{user_id}/{file_key}"
+        file_key = _resolve_user_key(user_id, file_key)
+        
+        # Serve uncompressed local files straight from disk (sendfile, no Python buffer)
+        if storage.provider == StorageProvider.LOCAL_FS:
+            file_info = await storage.get_file_info(file_key)
+            if file_info is None:
+                raise HTTPException(status_code=404, detail="File not found")
+            if not file_info.metadata.get("compressed"):
+                return FileResponse(
+                    storage.get_local_path(file_key),
+                    media_type=file_info.content_type,
+                    filename=os.path.basename(file_key)
+                )
         
         # Get file data
         file_data = await storage.download_file(file_key)
@@ -177,7 +258,7 @@ async def download_user_file(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"File download failed: {e}")
+        logger.exception("File download failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/files/{user_id}")
@@ -189,12 +270,7 @@ async def list_user_files(
     """List files for a user"""
     try:
         # Create prefix for user files
-        if folder == "uploads":
-            prefix = f"users/{user_id}/uploads/"
-        elif folder == "data":
-            prefix = f"users/{user_id}/data/"
-        else:
-            prefix = f"users/{user_id}/{folder}/"
+        prefix = _user_folder_prefix(storage, user_id, folder)
         
         # List files
         files = await storage.list_files(prefix)
@@ -219,7 +295,7 @@ async def list_user_files(
         }
         
     except Exception as e:
-        logging.error(f"File listing failed: {e}")
+        logger.exception("File listing failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/files/{user_id}/{file_key:path}")
@@ -231,8 +307,7 @@ async def delete_user_file(
     """Delete file for a user"""
     try:
         # Validate that file belongs to user
-        if not file_key.startswith(f"users/{user_id}/"):
-            file_key = f"users/{user_id}/{file_key}"
+        file_key = _resolve_user_key(user_id, file_key)
         
         # Delete file
         success = await storage.delete_file(file_key)
@@ -245,7 +320,7 @@ async def delete_user_file(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"File deletion failed: {e}")
+        logger.exception("File deletion failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Plugin marketplace endpoints
@@ -262,7 +337,7 @@ async def get_featured_plugins(
             "total": len(featured)
         }
     except Exception as e:
-        logging.error(f"Featured plugins failed: {e}")
+        logger.exception("Featured plugins failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.post("/search")
@@ -288,7 +363,7 @@ async def search_plugins(
             "returned_results": len(limited_results)
         }
     except Exception as e:
-        logging.error(f"Plugin search failed: {e}")
+        logger.exception("Plugin search failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.get("/available")
@@ -317,7 +392,7 @@ async def get_available_plugins(
             "total": len(plugins)
         }
     except Exception as e:
-        logging.error(f"Get available plugins failed: {e}")
+        logger.exception("Get available plugins failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.get("/{plugin_id}")
@@ -350,7 +425,7 @@ async def get_plugin_details(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Get plugin details failed: {e}")
+        logger.exception("Get plugin details failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.post("/download/{user_id}", response_model=PluginDownloadResponse)
@@ -378,7 +453,7 @@ async def initiate_plugin_download(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Plugin download initiation failed: {e}")
+        logger.exception("Plugin download initiation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.get("/download/status/{download_id}")
@@ -406,7 +481,7 @@ async def get_download_status(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Get download status failed: {e}")
+        logger.exception("Get download status failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.get("/user/{user_id}/plugins")
@@ -424,7 +499,7 @@ async def get_user_plugins(
             "total": len(user_plugins)
         }
     except Exception as e:
-        logging.error(f"Get user plugins failed: {e}")
+        logger.exception("Get user plugins failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @plugin_router.get("/user/{user_id}/updates")
@@ -442,7 +517,7 @@ async def check_plugin_updates(
             "total_updates": len(updates)
         }
     except Exception as e:
-        logging.error(f"Check plugin updates failed: {e}")
+        logger.exception("Check plugin updates failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Data export endpoints
@@ -456,7 +531,7 @@ async def export_user_data(
     """Export user data"""
     try:
         # Generate export filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         export_filename = f"user_data_export_{timestamp}.{export_request.format}"
         
         # Start background export task
@@ -475,7 +550,7 @@ async def export_user_data(
             "estimated_time": "5-10 minutes"
         }
     except Exception as e:
-        logging.error(f"Data export failed: {e}")
+        logger.exception("Data export failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 async def _process_user_data_export(
@@ -486,10 +561,13 @@ async def _process_user_data_export(
 ):
     """Process user data export in background"""
     try:
+        # One timestamp for the whole export so data and metadata agree
+        export_date = datetime.now(timezone.utc).isoformat()
+        
         # Mock export data (in real implementation, gather from database and files)
         export_data = {
             "user_id": user_id,
-            "export_date": datetime.now().isoformat(),
+            "export_date": export_date,
             "format": export_request.format,
             "data": {
                 "profile": {"username": f"user_{user_id}"},
@@ -530,54 +608,109 @@ async def _process_user_data_export(
             content_type,
             metadata={
                 "export_type": "user_data",
-                "export_date": datetime.now().isoformat(),
+                "export_date": export_date,
                 "user_id": user_id
             }
         )
         
-        logging.info(f"✅ User data export completed: {export_filename}")
+        logger.info("✅ User data export completed: %s", export_filename)
         
     except Exception as e:
-        logging.error(f"User data export processing failed: {e}")
+        logger.exception("User data export processing failed: %s", e)
 
 # Health check endpoint
+async def _ensure_health_sentinel(storage: CloudStorageManager) -> bool:
+    """Write the health check sentinel object if missing and remember its ETag"""
+    global _health_sentinel_etag
+    info = await storage.get_file_info(HEALTH_SENTINEL_KEY)
+    if info is None or info.size != len(HEALTH_SENTINEL_DATA):
+        if not await storage.upload_file(HEALTH_SENTINEL_DATA, HEALTH_SENTINEL_KEY, "text/plain"):
+            return False
+        info = await storage.get_file_info(HEALTH_SENTINEL_KEY)
+    _health_sentinel_etag = info.etag if info else None
+    return info is not None
+
+async def _deep_health_check(storage: CloudStorageManager) -> Dict[str, Any]:
+    """Full upload, download and delete cycle against the storage backend"""
+    test_key = "health_check/test.txt"
+    test_data = b"Health check test"
+    
+    # Upload test file
+    upload_success = await storage.upload_file(test_data, test_key, "text/plain")
+    
+    # Download test file
+    download_data = await storage.download_file(test_key) if upload_success else None
+    
+    # Cleanup test file
+    if upload_success:
+        await storage.delete_file(test_key)
+    
+    return {
+        "status": "healthy" if upload_success and download_data == test_data else "unhealthy",
+        "provider": storage.provider.value if storage.provider else "unknown",
+        "upload_test": upload_success,
+        "download_test": download_data == test_data if download_data else False,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
 @router.get("/health")
-async def storage_health_check():
-    """Health check for storage services"""
+async def storage_health_check(deep: bool = False):
+    """Health check for storage services
+    
+    By default this issues a single metadata read of the sentinel object and
+    caches the result briefly, so frequent load balancer probes stay cheap.
+    Pass ``deep=true`` to run the full upload/download/delete cycle.
+    """
+    global _health_cache, _health_cache_time
     try:
         storage = await get_storage_manager()
         
-        # Test basic storage operation
-        test_key = "health_check/test.txt"
-        test_data = b"Health check test"
+        if deep:
+            return await _deep_health_check(storage)
         
-        # Upload test file
-        upload_success = await storage.upload_file(test_data, test_key, "text/plain")
+        now = time.monotonic()
+        if _health_cache is not None and now - _health_cache_time < HEALTH_CACHE_TTL:
+            return _health_cache
         
-        # Download test file
-        download_data = await storage.download_file(test_key) if upload_success else None
+        if _health_sentinel_etag is None:
+            await _ensure_health_sentinel(storage)
         
-        # Cleanup test file
-        if upload_success:
-            await storage.delete_file(test_key)
+        info = await storage.get_file_info(HEALTH_SENTINEL_KEY)
+        sentinel_ok = (
+            info is not None
+            and info.size == len(HEALTH_SENTINEL_DATA)
+            and info.etag == _health_sentinel_etag
+        )
         
-        return {
-            "status": "healthy" if upload_success and download_data == test_data else "unhealthy",
+        _health_cache = {
+            "status": "healthy" if sentinel_ok else "unhealthy",
             "provider": storage.provider.value if storage.provider else "unknown",
-            "upload_test": upload_success,
-            "download_test": download_data == test_data if download_data else False,
-            "timestamp": datetime.now().isoformat()
+            "sentinel_test": sentinel_ok,
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
+        if _startup_error is not None:
+            _health_cache["status"] = "degraded"
+            _health_cache["startup_error"] = _startup_error
+        _health_cache_time = now
+        return _health_cache
     except Exception as e:
-        logging.error(f"Storage health check failed: {e}")
-        return {
+        logger.exception("Storage health check failed: %s", e)
+        health = {
             "status": "unhealthy",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
+        if _startup_error is not None:
+            health["status"] = "degraded"
+            health["startup_error"] = _startup_error
+        return health
 
 # Include routers in main app
 def include_storage_routes(app):
     """Include storage routes in FastAPI app"""
     app.include_router(router)
-    app.include_router(plugin_router)
\ No newline at end of file
+    app.include_router(plugin_router)
+    
+    # Build managers before the first request so dependencies only read singletons
+    app.router.add_event_handler("startup", _startup_storage_services)
+    app.router.add_event_handler("shutdown", close_storage_services)
\ No newline at end of file
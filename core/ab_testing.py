@@ -11,16 +11,100 @@ Comprehensive A/B testing system that allows:
 
 import os
 import time
+import atexit
 import asyncio
 import logging
+import bisect
 import hashlib
 import random
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
+from itertools import accumulate
 import json
+import math
+import sqlite3
+import threading
 import uuid
+from collections import deque
+from statistics import NormalDist
+
+import numpy as np
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    logging.warning("xxhash not available. Using MD5 for variant assignment.")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. Using standard json for A/B testing storage.")
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    logging.warning("pandas not available. Rebuilding experiment indexes event by event.")
+
+try:
+    from datasketch import HyperLogLog
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+    logging.warning("datasketch not available. Counting experiment users with exact sets.")
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("pyarrow not available. Parquet event archive disabled.")
+
+try:
+    from scipy import stats as scipy_stats
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    logging.warning("SciPy not available. Using normal approximation for confidence intervals.")
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Statistics kernels will run uncompiled.")
+    
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# JSON decoding for stored experiment data (accepts str or bytes)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode a JSON value to UTF-8 bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+# fdatasync skips the metadata flush where the platform supports it
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+# Hash ranges used to map variant-assignment hashes onto [0, 1)
+_HASH_SPACE_64 = float(1 << 64)
+_HASH_SPACE_32 = float(1 << 32)
 
 class ExperimentStatus(Enum):
     """Experiment status states"""
@@ -43,7 +127,7 @@ class MetricType(Enum):
     ENGAGEMENT_TIME = "engagement_time"
     PLUGIN_DOWNLOADS = "plugin_downloads"
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentVariant:
     """A/B test variant configuration"""
     variant_id: str
@@ -57,7 +141,7 @@ class ExperimentVariant:
         if not 0.0 <= self.traffic_allocation <= 1.0:
             raise ValueError("Traffic allocation must be between 0.0 and 1.0")
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentMetric:
     """Experiment success metric"""
     metric_id: str
@@ -67,7 +151,7 @@ class ExperimentMetric:
     target_value: float = None
     is_primary: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class Experiment:
     """A/B testing experiment"""
     experiment_id: str
@@ -84,14 +168,36 @@ class Experiment:
     sample_size: int = 1000
     confidence_level: float = 0.95
     minimum_effect_size: float = 0.05
+    _allocation_cdf: List[float] = field(default_factory=list, init=False, repr=False, compare=False)
+    _variant_ids: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+    _variants_by_id: Dict[str, ExperimentVariant] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _control_index: int = field(default=-1, init=False, repr=False, compare=False)
+    _control_variant: Optional[ExperimentVariant] = field(default=None, init=False, repr=False, compare=False)
+    _primary_metric: Optional[ExperimentMetric] = field(default=None, init=False, repr=False, compare=False)
+    _treatment_indices: Tuple[int, ...] = field(default=(), init=False, repr=False, compare=False)
     
     def __post_init__(self):
         # Validate traffic allocation sums to 1.0
         total_allocation = sum(v.traffic_allocation for v in self.variants)
         if abs(total_allocation - 1.0) > 0.001:
             raise ValueError(f"Variant traffic allocations must sum to 1.0, got {total_allocation}")
+        
+        # Cumulative allocation boundaries, bisected on every assignment
+        self._allocation_cdf = list(accumulate(v.traffic_allocation for v in self.variants))
+        self._variant_ids = tuple(v.variant_id for v in self.variants)
+        self._variants_by_id = {v.variant_id: v for v in self.variants}
+        
+        # Control variant and primary metric (first metric when none is flagged primary)
+        self._control_index = next(
+            (i for i, v in enumerate(self.variants) if v.variant_type == VariantType.CONTROL), -1
+        )
+        self._control_variant = self.variants[self._control_index] if self._control_index >= 0 else None
+        self._primary_metric = next((m for m in self.metrics if m.is_primary), self.metrics[0] if self.metrics else None)
+        self._treatment_indices = tuple(
+            i for i, v in enumerate(self.variants) if v.variant_type == VariantType.TREATMENT
+        )
 
-@dataclass
+@dataclass(slots=True)
 class UserAssignment:
     """User assignment to experiment variant"""
     user_id: str
@@ -100,7 +206,7 @@ class UserAssignment:
     assigned_at: str
     session_id: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentEvent:
     """User interaction event for experiment tracking"""
     event_id: str
@@ -117,7 +223,7 @@ class ExperimentEvent:
         if self.metadata is None:
             self.metadata = {}
 
-@dataclass
+@dataclass(slots=True)
 class ExperimentResults:
     """Experiment statistical results"""
     experiment_id: str
@@ -135,22 +241,58 @@ class ExperimentResults:
 class ABTestingFramework:
     """Main A/B testing framework"""
     
-    def __init__(self, db_manager=None, analytics_collector=None):
+    def __init__(self, db_manager=None, analytics_collector=None, load_data: bool = True):
         self.db_manager = db_manager
         self.analytics_collector = analytics_collector
         self.logger = logging.getLogger(__name__)
         
         # In-memory storage (for development/testing)
         self.experiments = {}
-        self.user_assignments = {}
-        self.experiment_events = []
+        self.user_assignments: Dict[str, Dict[str, UserAssignment]] = {}  # experiment_id -> user_id -> assignment
+        # Most recent events only; the full history lives in the SQLite event store
+        self.event_retention = 100000
+        self.experiment_events: deque = deque(maxlen=self.event_retention)
+        self._active_experiments: Dict[str, Experiment] = {}  # experiment_id -> experiment, ACTIVE only
+        self._user_active_cache: Dict[str, List[Dict[str, Any]]] = {}  # user_id -> active experiment summaries
+        
+        # Running counters maintained on ingest so results never rescan the event log
+        # experiment_id -> variant_id -> users with any event (set, or HyperLogLog once large)
+        self._variant_users: Dict[str, Dict[str, Any]] = {}
+        # experiment_id -> variant_id -> metric_id -> users with an event for the metric
+        self._metric_users: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Distinct-user count above which exact sets are replaced by HyperLogLog sketches
+        self.hll_user_threshold = 100000
+        self.hll_precision = 14  # 2^14 registers, ~0.8% standard error
+        # (experiment_id, variant_id, metric_id) -> Welford state (count, total, mean, M2) of event values
+        self._welford: Dict[Tuple[str, str, str], Tuple[int, float, float, float]] = {}
+        # Event count above which startup index rebuilds use a pandas groupby
+        self.bulk_index_threshold = 10000
         
         # Configuration
         self.data_dir = "data/ab_testing"
         os.makedirs(self.data_dir, exist_ok=True)
         
+        # Assignment lines and event rows are queued for a single background writer
+        self.write_batch_size = 512
+        self.write_flush_interval = 0.1  # seconds a batch may wait to fill
+        self.write_queue_size = 10000  # producers wait when the writer falls this far behind
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._event_buffer: List[Tuple] = []
+        self._assignment_buffer: List[bytes] = []
+        # One event store connection, shared by writer threads under the lock and reopened if data_dir moves
+        self._events_conn: Optional[sqlite3.Connection] = None
+        self._events_db_path: Optional[str] = None
+        self._events_lock = threading.Lock()
+        atexit.register(self._flush_buffers)
+        
+        # Columnar archive of stored events, partitioned by experiment_id/date (requires pyarrow)
+        self.parquet_export_interval: Optional[float] = 60.0  # seconds, None disables the roll-up
+        self._export_task: Optional[asyncio.Task] = None
+        
         # Load existing data
-        self._load_experiments()
+        if load_data:
+            self._load_experiments()
     
     async def create_experiment(self, experiment: Experiment) -> str:
         """Create a new A/B testing experiment"""
@@ -160,6 +302,9 @@ class ABTestingFramework:
             
             # Store experiment
             self.experiments[experiment.experiment_id] = experiment
+            if experiment.status == ExperimentStatus.ACTIVE:
+                self._active_experiments[experiment.experiment_id] = experiment
+                self._invalidate_user_cache(experiment.experiment_id)
             
             # Save to storage
             await self._save_experiment(experiment)
@@ -195,6 +340,8 @@ class ABTestingFramework:
             # Update status
             experiment.status = ExperimentStatus.ACTIVE
             experiment.start_date = datetime.now().isoformat()
+            self._active_experiments[experiment_id] = experiment
+            self._invalidate_user_cache(experiment_id)
             
             # Save changes
             await self._save_experiment(experiment)
@@ -210,19 +357,16 @@ class ABTestingFramework:
                                       session_id: str = None) -> Optional[str]:
         """Assign user to experiment variant"""
         try:
-            if experiment_id not in self.experiments:
-                return None
-            
-            experiment = self.experiments[experiment_id]
-            
-            # Check if experiment is active
-            if experiment.status != ExperimentStatus.ACTIVE:
+            # Check if experiment exists and is active
+            experiment = self._active_experiments.get(experiment_id)
+            if experiment is None:
                 return None
             
             # Check if user already assigned
-            assignment_key = f"{user_id}:{experiment_id}"
-            if assignment_key in self.user_assignments:
-                return self.user_assignments[assignment_key].variant_id
+            experiment_assignments = self.user_assignments.setdefault(experiment_id, {})
+            existing = experiment_assignments.get(user_id)
+            if existing is not None:
+                return existing.variant_id
             
             # Check if user qualifies for experiment
             if not self._user_qualifies_for_experiment(user_id, experiment):
@@ -240,7 +384,8 @@ class ABTestingFramework:
                 session_id=session_id
             )
             
-            self.user_assignments[assignment_key] = assignment
+            experiment_assignments[user_id] = assignment
+            self._user_active_cache.pop(user_id, None)
             
             # Save assignment
             await self._save_user_assignment(assignment)
@@ -259,13 +404,11 @@ class ABTestingFramework:
         """Track user event for experiment analysis"""
         try:
             # Get user's variant assignment
-            assignment_key = f"{user_id}:{experiment_id}"
-            if assignment_key not in self.user_assignments:
+            assignment = self.user_assignments.get(experiment_id, {}).get(user_id)
+            if assignment is None:
                 self.logger.warning(f"No assignment found for user {user_id} in experiment {experiment_id}")
                 return ""
             
-            assignment = self.user_assignments[assignment_key]
-            
             # Create event
             event = ExperimentEvent(
                 event_id=str(uuid.uuid4()),
@@ -281,6 +424,7 @@ class ABTestingFramework:
             
             # Store event
             self.experiment_events.append(event)
+            self._index_event(event)
             
             # Save to storage
             await self._save_experiment_event(event)
@@ -300,58 +444,48 @@ class ABTestingFramework:
             
             experiment = self.experiments[experiment_id]
             
-            # Get events for this experiment
-            experiment_events = [
-                event for event in self.experiment_events
-                if event.experiment_id == experiment_id
-            ]
+            experiment_users = self._variant_users.get(experiment_id, {})
+            experiment_metric_users = self._metric_users.get(experiment_id, {})
             
             # Calculate results for each variant
             variant_results = {}
             sample_sizes = {}
             
             for variant in experiment.variants:
-                variant_events = [
-                    event for event in experiment_events
-                    if event.variant_id == variant.variant_id
-                ]
+                variant_metric_users = experiment_metric_users.get(variant.variant_id, {})
                 
                 # Count unique users in this variant
-                unique_users = set(event.user_id for event in variant_events)
-                sample_sizes[variant.variant_id] = len(unique_users)
+                total_users = _distinct_count(experiment_users.get(variant.variant_id, ()))
+                sample_sizes[variant.variant_id] = total_users
                 
                 # Calculate metrics
                 variant_metrics = {}
                 for metric in experiment.metrics:
-                    metric_events = [
-                        event for event in variant_events
-                        if event.metric_id == metric.metric_id
-                    ]
+                    count, total, mean, _ = self._welford.get(
+                        (experiment_id, variant.variant_id, metric.metric_id), (0, 0.0, 0.0, 0.0)
+                    )
                     
                     if metric.metric_type == MetricType.CONVERSION_RATE:
-                        conversions = len(set(event.user_id for event in metric_events))
-                        conversion_rate = conversions / len(unique_users) if unique_users else 0
+                        conversions = _distinct_count(variant_metric_users.get(metric.metric_id, ()))
+                        conversion_rate = conversions / total_users if total_users else 0
                         variant_metrics[metric.metric_id] = {
                             "value": conversion_rate,
                             "count": conversions,
-                            "total_users": len(unique_users)
+                            "total_users": total_users
                         }
                     elif metric.metric_type == MetricType.CLICK_THROUGH_RATE:
-                        clicks = len(metric_events)
-                        ctr = clicks / len(unique_users) if unique_users else 0
+                        ctr = count / total_users if total_users else 0
                         variant_metrics[metric.metric_id] = {
                             "value": ctr,
-                            "clicks": clicks,
-                            "total_users": len(unique_users)
+                            "clicks": count,
+                            "total_users": total_users
                         }
                     else:
-                        # For other metrics, calculate average
-                        values = [event.event_value for event in metric_events]
-                        avg_value = sum(values) / len(values) if values else 0
+                        # For other metrics, use the running mean of event values
                         variant_metrics[metric.metric_id] = {
-                            "value": avg_value,
-                            "count": len(values),
-                            "total": sum(values)
+                            "value": mean,
+                            "count": count,
+                            "total": total
                         }
                 
                 variant_results[variant.variant_id] = variant_metrics
@@ -380,34 +514,149 @@ class ABTestingFramework:
     async def get_active_experiments_for_user(self, user_id: str) -> List[Dict[str, Any]]:
         """Get active experiments for a user"""
         try:
+            cached = self._user_active_cache.get(user_id)
+            if cached is not None:
+                return list(cached)
+            
             active_experiments = []
             
-            for experiment in self.experiments.values():
-                if experiment.status == ExperimentStatus.ACTIVE:
-                    # Check if user is assigned
-                    assignment_key = f"{user_id}:{experiment.experiment_id}"
-                    if assignment_key in self.user_assignments:
-                        assignment = self.user_assignments[assignment_key]
-                        variant = next(
-                            (v for v in experiment.variants if v.variant_id == assignment.variant_id),
-                            None
-                        )
-                        
-                        active_experiments.append({
-                            "experiment_id": experiment.experiment_id,
-                            "experiment_name": experiment.name,
-                            "variant_id": assignment.variant_id,
-                            "variant_name": variant.name if variant else "Unknown",
-                            "configuration": variant.configuration if variant else {}
-                        })
-            
-            return active_experiments
+            for experiment_id, experiment in self._active_experiments.items():
+                # Check if user is assigned
+                assignment = self.user_assignments.get(experiment_id, {}).get(user_id)
+                if assignment is not None:
+                    variant = experiment._variants_by_id.get(assignment.variant_id)
+                    
+                    active_experiments.append({
+                        "experiment_id": experiment.experiment_id,
+                        "experiment_name": experiment.name,
+                        "variant_id": assignment.variant_id,
+                        "variant_name": variant.name if variant else "Unknown",
+                        "configuration": variant.configuration if variant else {}
+                    })
+            
+            self._user_active_cache[user_id] = active_experiments
+            return list(active_experiments)
             
         except Exception as e:
             self.logger.error(f"Failed to get active experiments for user: {e}")
             return []
     
     # Private helper methods
+    def _invalidate_user_cache(self, experiment_id: str):
+        """Drop cached active experiment lists for users assigned to an experiment"""
+        for user_id in self.user_assignments.get(experiment_id, {}):
+            self._user_active_cache.pop(user_id, None)
+    
+    def _index_event(self, event: ExperimentEvent):
+        """Add an event to the per-experiment/variant/metric counters"""
+        self._add_user(self._variant_users.setdefault(event.experiment_id, {}), event.variant_id, event.user_id)
+        
+        metric_users = self._metric_users.setdefault(event.experiment_id, {}).setdefault(event.variant_id, {})
+        self._add_user(metric_users, event.metric_id, event.user_id)
+        
+        # Welford's online update keeps mean/variance numerically stable without rescanning
+        key = (event.experiment_id, event.variant_id, event.metric_id)
+        count, total, mean, m2 = self._welford.get(key, (0, 0.0, 0.0, 0.0))
+        count += 1
+        total += event.event_value
+        delta = event.event_value - mean
+        mean += delta / count
+        m2 += delta * (event.event_value - mean)
+        self._welford[key] = (count, total, mean, m2)
+    
+    def _add_user(self, counters: Dict[str, Any], key: str, user_id: str):
+        """Record a user in a distinct-user counter, promoting large sets to HyperLogLog"""
+        users = counters.get(key)
+        if users is None:
+            counters[key] = {user_id}
+        elif isinstance(users, set):
+            users.add(user_id)
+            if len(users) > self.hll_user_threshold:
+                counters[key] = self._user_counter(users)
+        else:
+            users.update(user_id.encode())
+    
+    def _user_counter(self, users) -> Any:
+        """Build an exact set, or a HyperLogLog sketch when the users exceed the threshold"""
+        users = set(users)
+        if not DATASKETCH_AVAILABLE or len(users) <= self.hll_user_threshold:
+            return users
+        
+        sketch = HyperLogLog(p=self.hll_precision)
+        for user_id in users:
+            sketch.update(user_id.encode())
+        return sketch
+    
+    def event_count(self) -> int:
+        """Total number of tracked events, including those evicted from experiment_events"""
+        return sum(state[0] for state in self._welford.values())
+    
+    def _rebuild_event_indexes(self, events: Optional[List[ExperimentEvent]] = None):
+        """Rebuild all event counters from the given events (default: experiment_events)"""
+        self._variant_users.clear()
+        self._metric_users.clear()
+        self._welford.clear()
+        
+        if events is None:
+            events = list(self.experiment_events)
+        self._index_events(events)
+    
+    def _index_events(self, events: List[ExperimentEvent]):
+        """Fold a batch of events into the existing counters"""
+        if not PANDAS_AVAILABLE or len(events) < self.bulk_index_threshold:
+            for event in events:
+                self._index_event(event)
+            return
+        
+        # Group the whole batch at once instead of updating indexes event by event
+        frame = pd.DataFrame({
+            "experiment_id": [event.experiment_id for event in events],
+            "variant_id": [event.variant_id for event in events],
+            "metric_id": [event.metric_id for event in events],
+            "user_id": [event.user_id for event in events],
+            "event_value": [event.event_value for event in events]
+        })
+        grouped = frame.groupby(["experiment_id", "variant_id", "metric_id"], sort=False)
+        
+        for (experiment_id, variant_id, metric_id), users in grouped["user_id"].unique().items():
+            metric_users = self._metric_users.setdefault(experiment_id, {}).setdefault(variant_id, {})
+            self._merge_users(metric_users, metric_id, users)
+        
+        variant_users = frame.groupby(["experiment_id", "variant_id"], sort=False)["user_id"].unique()
+        for (experiment_id, variant_id), users in variant_users.items():
+            self._merge_users(self._variant_users.setdefault(experiment_id, {}), variant_id, users)
+        
+        stats = grouped["event_value"].agg(["count", "sum", "mean", "var"])
+        for key, count, total, mean, variance in zip(stats.index, stats["count"], stats["sum"],
+                                                     stats["mean"], stats["var"]):
+            m2 = float(variance) * (count - 1) if count > 1 else 0.0
+            self._merge_welford(key, int(count), float(total), float(mean), m2)
+    
+    def _merge_users(self, counters: Dict[str, Any], key: str, users):
+        """Add a batch of distinct users to a distinct-user counter"""
+        if key not in counters:
+            counters[key] = self._user_counter(users)
+            return
+        for user_id in users:
+            self._add_user(counters, key, user_id)
+    
+    def _merge_welford(self, key: Tuple[str, str, str], count: int, total: float, mean: float, m2: float):
+        """Combine a batch's Welford state with the stored one (Chan et al. parallel update)"""
+        existing = self._welford.get(key)
+        if existing is None:
+            self._welford[key] = (count, total, mean, m2)
+            return
+        
+        count_a, total_a, mean_a, m2_a = existing
+        combined = count_a + count
+        delta = mean - mean_a
+        self._welford[key] = (
+            combined,
+            total_a + total,
+            mean_a + delta * count / combined,
+            m2_a + m2 + delta * delta * count_a * count / combined
+        )
+    
     def _validate_experiment(self, experiment: Experiment):
         """Validate experiment configuration"""
         if len(experiment.variants) < 2:
@@ -445,88 +694,96 @@ class ABTestingFramework:
     def _assign_variant(self, user_id: str, experiment: Experiment) -> str:
         """Assign user to variant using consistent hashing"""
         # Create hash from user_id and experiment_id for consistency
-        hash_input = f"{user_id}:{experiment.experiment_id}"
-        hash_value = hashlib.md5(hash_input.encode()).hexdigest()
-        hash_number = int(hash_value[:8], 16) / (16**8)  # Convert to 0-1 range
+        hash_input = f"{user_id}:{experiment.experiment_id}".encode()
+        if XXHASH_AVAILABLE:
+            hash_number = xxhash.xxh3_64_intdigest(hash_input) / _HASH_SPACE_64
+        else:
+            # First 32 bits of the MD5 digest, without the hex round-trip
+            hash_number = int.from_bytes(hashlib.md5(hash_input).digest()[:4], "big") / _HASH_SPACE_32
         
         # Assign based on traffic allocation
-        cumulative_allocation = 0.0
-        for variant in experiment.variants:
-            cumulative_allocation += variant.traffic_allocation
-            if hash_number <= cumulative_allocation:
-                return variant.variant_id
+        index = bisect.bisect_left(experiment._allocation_cdf, hash_number)
+        if index < len(experiment._variant_ids):
+            return experiment._variant_ids[index]
         
         # Fallback to control variant
-        control_variant = next(v for v in experiment.variants if v.variant_type == VariantType.CONTROL)
-        return control_variant.variant_id
+        return experiment._control_variant.variant_id
     
     def _calculate_statistical_significance(self, variant_results: Dict, experiment: Experiment) -> Dict[str, bool]:
         """Calculate statistical significance (simplified implementation)"""
-        significance = {}
+        # Use primary metric for significance
+        primary_metric = experiment._primary_metric
+        control_idx = experiment._control_index
         
-        # Find control variant
-        control_variant = next(v for v in experiment.variants if v.variant_type == VariantType.CONTROL)
-        control_id = control_variant.variant_id
+        values = np.array([
+            variant_results.get(v.variant_id, {}).get(primary_metric.metric_id, {}).get("value", 0)
+            for v in experiment.variants
+        ], dtype=np.float64)
         
-        for variant in experiment.variants:
-            if variant.variant_type == VariantType.TREATMENT:
-                # Simple significance check based on sample size and effect size
-                control_data = variant_results.get(control_id, {})
-                treatment_data = variant_results.get(variant.variant_id, {})
-                
-                # Use primary metric for significance
-                primary_metric = next((m for m in experiment.metrics if m.is_primary), experiment.metrics[0])
-                
-                control_metric = control_data.get(primary_metric.metric_id, {})
-                treatment_metric = treatment_data.get(primary_metric.metric_id, {})
-                
-                control_value = control_metric.get("value", 0)
-                treatment_value = treatment_metric.get("value", 0)
-                
-                # Simple effect size check
-                if control_value > 0:
-                    effect_size = abs(treatment_value - control_value) / control_value
-                    significance[variant.variant_id] = effect_size >= experiment.minimum_effect_size
-                else:
-                    significance[variant.variant_id] = False
+        # Simple effect size check against the control variant
+        significant = _effect_size_significance(values, control_idx, experiment.minimum_effect_size)
         
-        return significance
+        return {
+            experiment.variants[i].variant_id: bool(significant[i])
+            for i in experiment._treatment_indices
+        }
     
     def _calculate_confidence_intervals(self, variant_results: Dict, experiment: Experiment) -> Dict[str, Tuple[float, float]]:
-        """Calculate confidence intervals (simplified)"""
-        intervals = {}
+        """Calculate confidence intervals for the primary metric of each variant"""
+        primary_metric = experiment._primary_metric
+        variant_count = len(experiment.variants)
+        values = np.zeros(variant_count)
+        std_errors = np.zeros(variant_count)
+        criticals = np.zeros(variant_count)
         
-        for variant in experiment.variants:
-            variant_data = variant_results.get(variant.variant_id, {})
-            primary_metric = next((m for m in experiment.metrics if m.is_primary), experiment.metrics[0])
-            metric_data = variant_data.get(primary_metric.metric_id, {})
+        for i, variant in enumerate(experiment.variants):
+            metric_data = variant_results.get(variant.variant_id, {}).get(primary_metric.metric_id, {})
+            values[i] = metric_data.get("value", 0)
             
-            value = metric_data.get("value", 0)
-            # Simplified confidence interval (normally would use proper statistical calculation)
-            margin = value * 0.1  # 10% margin as approximation
-            intervals[variant.variant_id] = (max(0, value - margin), value + margin)
+            if primary_metric.metric_type == MetricType.CONVERSION_RATE:
+                # Wald interval for a proportion of users
+                n = metric_data.get("total_users", 0)
+                std_errors[i] = math.sqrt(values[i] * (1 - values[i]) / n) if n else 0.0
+                criticals[i] = _critical_value(experiment.confidence_level, None)
+            elif primary_metric.metric_type == MetricType.CLICK_THROUGH_RATE:
+                # Clicks per user treated as a Poisson rate
+                n = metric_data.get("total_users", 0)
+                std_errors[i] = math.sqrt(metric_data.get("clicks", 0)) / n if n else 0.0
+                criticals[i] = _critical_value(experiment.confidence_level, None)
+            else:
+                # t interval on the mean from the running Welford state
+                n, _, _, m2 = self._welford.get(
+                    (experiment.experiment_id, variant.variant_id, primary_metric.metric_id), (0, 0.0, 0.0, 0.0)
+                )
+                std_errors[i] = math.sqrt(m2 / (n - 1) / n) if n > 1 else 0.0
+                criticals[i] = _critical_value(experiment.confidence_level, n - 1 if n > 1 else None)
         
-        return intervals
+        lower, upper = _confidence_bounds(values, std_errors, criticals)
+        
+        return {
+            variant.variant_id: (float(lower[i]), float(upper[i]))
+            for i, variant in enumerate(experiment.variants)
+        }
     
     def _generate_recommendations(self, variant_results: Dict, experiment: Experiment) -> List[str]:
         """Generate experiment recommendations"""
         recommendations = []
         
         # Find control and best performing variant
-        control_variant = next(v for v in experiment.variants if v.variant_type == VariantType.CONTROL)
-        primary_metric = next((m for m in experiment.metrics if m.is_primary), experiment.metrics[0])
+        control_variant = experiment._control_variant
+        primary_metric = experiment._primary_metric
         
         control_value = variant_results.get(control_variant.variant_id, {}).get(primary_metric.metric_id, {}).get("value", 0)
         
         best_variant = None
         best_value = control_value
         
-        for variant in experiment.variants:
-            if variant.variant_type == VariantType.TREATMENT:
-                variant_value = variant_results.get(variant.variant_id, {}).get(primary_metric.metric_id, {}).get("value", 0)
-                if variant_value > best_value:
-                    best_value = variant_value
-                    best_variant = variant
+        for i in experiment._treatment_indices:
+            variant = experiment.variants[i]
+            variant_value = variant_results.get(variant.variant_id, {}).get(primary_metric.metric_id, {}).get("value", 0)
+            if variant_value > best_value:
+                best_value = variant_value
+                best_variant = variant
         
         if best_variant:
             improvement = ((best_value - control_value) / control_value * 100) if control_value > 0 else 0
@@ -585,128 +842,523 @@ class ABTestingFramework:
                 "minimum_effect_size": experiment.minimum_effect_size
             }
             
-            with open(file_path, 'w') as f:
-                json.dump(experiment_data, f, indent=2, default=str)
+            with open(file_path, 'wb') as f:
+                f.write(_json_dumps(experiment_data, indent=True))
                 
         except Exception as e:
             self.logger.error(f"Failed to save experiment: {e}")
     
     async def _save_user_assignment(self, assignment: UserAssignment):
-        """Save user assignment to storage"""
+        """Queue user assignment for batched storage"""
         try:
-            assignments_file = os.path.join(self.data_dir, "user_assignments.jsonl")
-            assignment_data = asdict(assignment)
-            
-            with open(assignments_file, 'a') as f:
-                f.write(json.dumps(assignment_data) + '\n')
+            line = _json_dumps({
+                "user_id": assignment.user_id,
+                "experiment_id": assignment.experiment_id,
+                "variant_id": assignment.variant_id,
+                "assigned_at": assignment.assigned_at,
+                "session_id": assignment.session_id
+            }) + b'\n'
+            await self._enqueue_write(self._assignment_buffer, line)
                 
         except Exception as e:
             self.logger.error(f"Failed to save user assignment: {e}")
     
     async def _save_experiment_event(self, event: ExperimentEvent):
-        """Save experiment event to storage"""
+        """Queue experiment event for batched storage"""
         try:
-            events_file = os.path.join(self.data_dir, "experiment_events.jsonl")
-            event_data = asdict(event)
-            
-            with open(events_file, 'a') as f:
-                f.write(json.dumps(event_data) + '\n')
+            row = (
+                event.event_id, event.experiment_id, event.variant_id, event.metric_id,
+                event.user_id, event.event_type, event.event_value, event.timestamp,
+                _json_dumps(event.metadata)
+            )
+            await self._enqueue_write(self._event_buffer, row)
                 
         except Exception as e:
             self.logger.error(f"Failed to save experiment event: {e}")
     
+    async def start(self):
+        """Start the background storage writer on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._writer_task is not None and not self._writer_task.done() and self._writer_task.get_loop() is loop:
+            return
+        
+        # Anything left queued for a writer on another (finished) loop is written now
+        self._flush_buffers()
+        self._write_queue = asyncio.Queue(maxsize=self.write_queue_size)
+        self._writer_task = loop.create_task(self._writer_loop())
+        
+        if PYARROW_AVAILABLE and self.parquet_export_interval:
+            self._export_task = loop.create_task(self._parquet_export_loop())
+    
+    async def flush(self):
+        """Write all queued assignments and events to storage"""
+        if self._writer_task is not None and not self._writer_task.done() \
+                and self._writer_task.get_loop() is asyncio.get_running_loop():
+            # The sentinel cuts the writer's batch wait short
+            await self._write_queue.put(None)
+            await self._write_queue.join()
+        self._flush_buffers()
+    
+    async def close(self):
+        """Flush pending writes and stop the background writer"""
+        await self.flush()
+        for task in (self._export_task, self._writer_task):
+            if task is not None and task.get_loop() is asyncio.get_running_loop():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._export_task = None
+        self._writer_task = None
+        self._close_events_db()
+        atexit.unregister(self._flush_buffers)
+    
+    async def _enqueue_write(self, buffer: List, item: Any):
+        """Hand a record to the background writer, waiting if its queue is full"""
+        await self.start()
+        await self._write_queue.put((buffer, item))
+    
+    async def _writer_loop(self):
+        """Drain the write queue in batches, writing each batch once per store"""
+        queue = self._write_queue
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await queue.get()
+                taken = 1
+                deadline = loop.time() + self.write_flush_interval
+                
+                # Keep collecting until the batch fills, the interval passes or flush() sends None
+                while item is not None:
+                    buffer, record = item
+                    buffer.append(record)
+                    if taken >= self.write_batch_size:
+                        break
+                    if queue.empty():
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        item = queue.get_nowait()
+                    taken += 1
+                
+                lines, rows = self._take_buffers()
+                await asyncio.to_thread(self._write_batch, lines, rows)
+                for _ in range(taken):
+                    queue.task_done()
+                    
+        except asyncio.CancelledError:
+            self._flush_buffers()
+            raise
+    
+    def _take_buffers(self) -> Tuple[List[bytes], List[Tuple]]:
+        """Detach the buffered assignment lines and event rows"""
+        lines = list(self._assignment_buffer)
+        self._assignment_buffer.clear()
+        rows = list(self._event_buffer)
+        self._event_buffer.clear()
+        return lines, rows
+    
+    def _flush_buffers(self):
+        """Synchronously write everything still queued or buffered"""
+        queue = self._write_queue
+        while queue is not None and not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                buffer, record = item
+                buffer.append(record)
+            queue.task_done()
+        
+        self._write_batch(*self._take_buffers())
+    
+    def _write_batch(self, lines: List[bytes], rows: List[Tuple]):
+        """Append assignment lines and insert event rows, syncing the batch once"""
+        if lines:
+            try:
+                with open(os.path.join(self.data_dir, "user_assignments.jsonl"), 'ab') as f:
+                    f.writelines(lines)
+                    f.flush()
+                    _fdatasync(f.fileno())
+            except Exception as e:
+                self.logger.error(f"Failed to write user_assignments.jsonl: {e}")
+        
+        if rows:
+            try:
+                self._insert_events(rows)
+            except Exception as e:
+                self.logger.error(f"Failed to write experiment events: {e}")
+    
+    def _events_db(self) -> sqlite3.Connection:
+        """The event store connection (caller holds _events_lock), created with its schema on first use"""
+        path = os.path.join(self.data_dir, "experiment_events.db")
+        if self._events_conn is not None:
+            if self._events_db_path == path:
+                return self._events_conn
+            self._events_conn.close()
+        
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                event_id TEXT NOT NULL,
+                experiment_id TEXT NOT NULL,
+                variant_id TEXT NOT NULL,
+                metric_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                event_type TEXT NOT NULL,
+                event_value REAL NOT NULL,
+                ts TEXT NOT NULL,
+                metadata BLOB
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_experiment
+            ON events (experiment_id, variant_id, metric_id, user_id)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS parquet_exports (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                last_event_row INTEGER NOT NULL
+            )
+        """)
+        conn.commit()
+        self._events_conn = conn
+        self._events_db_path = path
+        return conn
+    
+    def _close_events_db(self):
+        """Close the event store connection"""
+        with self._events_lock:
+            if self._events_conn is not None:
+                self._events_conn.close()
+                self._events_conn = None
+                self._events_db_path = None
+    
+    def _insert_events(self, rows: List[Tuple]):
+        """Insert event rows in a single transaction"""
+        with self._events_lock:
+            conn = self._events_db()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO events (event_id, experiment_id, variant_id, metric_id, user_id,
+                                        event_type, event_value, ts, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+    
+    async def export_events_parquet(self) -> int:
+        """Append events stored since the last export to the Parquet archive"""
+        if not PYARROW_AVAILABLE:
+            return 0
+        
+        await self.flush()
+        return await asyncio.to_thread(self._export_events_parquet)
+    
+    async def get_archived_event_aggregates(self, experiment_id: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Per-variant/metric event counts, value sums and distinct users from the Parquet archive"""
+        if not PYARROW_AVAILABLE:
+            return {}
+        
+        return await asyncio.to_thread(self._query_archived_aggregates, experiment_id)
+    
+    async def _parquet_export_loop(self):
+        """Periodically roll stored events up into the Parquet archive"""
+        while True:
+            await asyncio.sleep(self.parquet_export_interval)
+            try:
+                exported = await self.export_events_parquet()
+                if exported:
+                    self.logger.debug(f"Exported {exported} events to the Parquet archive")
+            except Exception as e:
+                self.logger.error(f"Failed to export events to Parquet: {e}")
+    
+    def _export_events_parquet(self) -> int:
+        """Write events past the export high-water mark as a partitioned Parquet dataset"""
+        with self._events_lock:
+            conn = self._events_db()
+            state = conn.execute("SELECT last_event_row FROM parquet_exports").fetchone()
+            rows = conn.execute("""
+                SELECT id, experiment_id, variant_id, metric_id, user_id, event_type, event_value, ts
+                FROM events WHERE id > ? ORDER BY id
+            """, (state[0] if state else 0,)).fetchall()
+        if not rows:
+            return 0
+        
+        row_ids, experiment_ids, variant_ids, metric_ids, user_ids, event_types, values, timestamps = zip(*rows)
+        table = pa.table({
+            "experiment_id": pa.array(experiment_ids, pa.string()),
+            "date": pa.array([ts[:10] for ts in timestamps], pa.string()),
+            "variant_id": pa.array(variant_ids, pa.string()),
+            "metric_id": pa.array(metric_ids, pa.string()),
+            "user_id": pa.array(user_ids, pa.string()),
+            "event_type": pa.array(event_types, pa.string()),
+            "event_value": pa.array(values, pa.float64()),
+            "timestamp": pa.array(timestamps, pa.string())
+        })
+        pq.write_to_dataset(
+            table,
+            root_path=os.path.join(self.data_dir, "events"),
+            partition_cols=["experiment_id", "date"],
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet"
+        )
+        
+        with self._events_lock:
+            conn = self._events_db()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO parquet_exports (id, last_event_row) VALUES (0, ?)", (row_ids[-1],)
+                )
+        return len(rows)
+    
+    def _query_archived_aggregates(self, experiment_id: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Aggregate one experiment's archived events with a filtered, column-projected scan"""
+        root = os.path.join(self.data_dir, "events")
+        if not os.path.isdir(root):
+            return {}
+        
+        partitioning = ds.partitioning(
+            pa.schema([("experiment_id", pa.string()), ("date", pa.string())]), flavor="hive"
+        )
+        table = ds.dataset(root, format="parquet", partitioning=partitioning).to_table(
+            filter=pc.field("experiment_id") == experiment_id,
+            columns=["variant_id", "metric_id", "user_id", "event_value"]
+        )
+        grouped = table.group_by(["variant_id", "metric_id"]).aggregate([
+            ("event_value", "count"),
+            ("event_value", "sum"),
+            ("user_id", "count_distinct")
+        ])
+        
+        aggregates = {}
+        for record in grouped.to_pylist():
+            aggregates.setdefault(record["variant_id"], {})[record["metric_id"]] = {
+                "count": record["event_value_count"],
+                "total": record["event_value_sum"],
+                "unique_users": record["user_id_count_distinct"]
+            }
+        return aggregates
+    
     def _load_experiments(self):
         """Load experiments from storage"""
         try:
             if not os.path.exists(self.data_dir):
                 return
             
-            for filename in os.listdir(self.data_dir):
-                if filename.startswith("experiment_") and filename.endswith(".json"):
-                    file_path = os.path.join(self.data_dir, filename)
-                    with open(file_path, 'r') as f:
-                        experiment_data = json.load(f)
-                    
-                    # Convert back to objects
-                    experiment_data["status"] = ExperimentStatus(experiment_data["status"])
-                    
-                    # Reconstruct variants
-                    variants = []
-                    for v_data in experiment_data["variants"]:
-                        variant = ExperimentVariant(
-                            variant_id=v_data["variant_id"],
-                            name=v_data["name"],
-                            variant_type=VariantType(v_data["variant_type"]),
-                            traffic_allocation=v_data["traffic_allocation"],
-                            configuration=v_data["configuration"],
-                            description=v_data.get("description", "")
-                        )
-                        variants.append(variant)
-                    
-                    # Reconstruct metrics
-                    metrics = []
-                    for m_data in experiment_data["metrics"]:
-                        metric = ExperimentMetric(
-                            metric_id=m_data["metric_id"],
-                            metric_type=MetricType(m_data["metric_type"]),
-                            name=m_data["name"],
-                            description=m_data["description"],
-                            target_value=m_data.get("target_value"),
-                            is_primary=m_data.get("is_primary", False)
-                        )
-                        metrics.append(metric)
-                    
-                    # Create experiment object
-                    experiment = Experiment(
-                        experiment_id=experiment_data["experiment_id"],
-                        name=experiment_data["name"],
-                        description=experiment_data["description"],
-                        status=experiment_data["status"],
-                        variants=variants,
-                        metrics=metrics,
-                        target_audience=experiment_data["target_audience"],
-                        start_date=experiment_data["start_date"],
-                        end_date=experiment_data["end_date"],
-                        created_by=experiment_data["created_by"],
-                        created_at=experiment_data["created_at"],
-                        sample_size=experiment_data.get("sample_size", 1000),
-                        confidence_level=experiment_data.get("confidence_level", 0.95),
-                        minimum_effect_size=experiment_data.get("minimum_effect_size", 0.05)
-                    )
-                    
-                    self.experiments[experiment.experiment_id] = experiment
-            
-            # Load user assignments
-            assignments_file = os.path.join(self.data_dir, "user_assignments.jsonl")
-            if os.path.exists(assignments_file):
-                with open(assignments_file, 'r') as f:
-                    for line in f:
-                        if line.strip():
-                            assignment_data = json.loads(line.strip())
-                            assignment = UserAssignment(**assignment_data)
-                            key = f"{assignment.user_id}:{assignment.experiment_id}"
-                            self.user_assignments[key] = assignment
-            
-            # Load experiment events
-            events_file = os.path.join(self.data_dir, "experiment_events.jsonl")
-            if os.path.exists(events_file):
-                with open(events_file, 'r') as f:
-                    for line in f:
-                        if line.strip():
-                            event_data = json.loads(line.strip())
-                            event = ExperimentEvent(**event_data)
-                            self.experiment_events.append(event)
+            experiments = [self._read_experiment_file(path) for path in self._experiment_file_paths()]
+            assignments = self._read_jsonl("user_assignments.jsonl")
+            self._apply_loaded_data(experiments, assignments)
+            
+            for batch in self._iter_event_batches():
+                self._apply_event_batch(batch)
             
             self.logger.info(f"Loaded {len(self.experiments)} experiments from storage")
             
         except Exception as e:
             self.logger.error(f"Failed to load experiments: {e}")
+    
+    async def load_experiments(self):
+        """Load experiments from storage without blocking the event loop"""
+        try:
+            if not await asyncio.to_thread(os.path.exists, self.data_dir):
+                return
+            
+            # Parse experiment files and the assignment log in parallel worker threads
+            paths = await asyncio.to_thread(self._experiment_file_paths)
+            experiments, assignments = await asyncio.gather(
+                asyncio.gather(*(asyncio.to_thread(self._read_experiment_file, path) for path in paths)),
+                asyncio.to_thread(self._read_jsonl, "user_assignments.jsonl")
+            )
+            self._apply_loaded_data(experiments, assignments)
+            
+            # Stored events are read and hydrated a batch at a time in a worker thread,
+            # then folded into the counters on the loop
+            batches = self._iter_event_batches()
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                self._apply_event_batch(batch)
+            
+            self.logger.info(f"Loaded {len(self.experiments)} experiments from storage")
+            
+        except Exception as e:
+            self.logger.error(f"Failed to load experiments: {e}")
+    
+    def _experiment_file_paths(self) -> List[str]:
+        """List stored experiment definition files"""
+        return [
+            os.path.join(self.data_dir, filename)
+            for filename in os.listdir(self.data_dir)
+            if filename.startswith("experiment_") and filename.endswith(".json")
+        ]
+    
+    def _read_experiment_file(self, file_path: str) -> Experiment:
+        """Parse one stored experiment definition"""
+        with open(file_path, 'rb') as f:
+            experiment_data = _json_loads(f.read())
+        
+        # Reconstruct variants
+        variants = [
+            ExperimentVariant(
+                variant_id=v_data["variant_id"],
+                name=v_data["name"],
+                variant_type=VariantType(v_data["variant_type"]),
+                traffic_allocation=v_data["traffic_allocation"],
+                configuration=v_data["configuration"],
+                description=v_data.get("description", "")
+            ) for v_data in experiment_data["variants"]
+        ]
+        
+        # Reconstruct metrics
+        metrics = [
+            ExperimentMetric(
+                metric_id=m_data["metric_id"],
+                metric_type=MetricType(m_data["metric_type"]),
+                name=m_data["name"],
+                description=m_data["description"],
+                target_value=m_data.get("target_value"),
+                is_primary=m_data.get("is_primary", False)
+            ) for m_data in experiment_data["metrics"]
+        ]
+        
+        return Experiment(
+            experiment_id=experiment_data["experiment_id"],
+            name=experiment_data["name"],
+            description=experiment_data["description"],
+            status=ExperimentStatus(experiment_data["status"]),
+            variants=variants,
+            metrics=metrics,
+            target_audience=experiment_data["target_audience"],
+            start_date=experiment_data["start_date"],
+            end_date=experiment_data["end_date"],
+            created_by=experiment_data["created_by"],
+            created_at=experiment_data["created_at"],
+            sample_size=experiment_data.get("sample_size", 1000),
+            confidence_level=experiment_data.get("confidence_level", 0.95),
+            minimum_effect_size=experiment_data.get("minimum_effect_size", 0.05)
+        )
+    
+    def _read_jsonl(self, filename: str) -> List[Dict[str, Any]]:
+        """Parse every record of a JSONL file in the data directory"""
+        file_path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(file_path):
+            return []
+        with open(file_path, 'rb') as f:
+            lines = f.read().splitlines()
+        return [_json_loads(line) for line in lines if line.strip()]
+    
+    def _iter_event_batches(self, batch_size: int = 10000):
+        """Yield stored events in batches, migrating a legacy JSONL event log first"""
+        legacy_path = os.path.join(self.data_dir, "experiment_events.jsonl")
+        if os.path.exists(legacy_path):
+            legacy_events = self._read_jsonl("experiment_events.jsonl")
+            self._insert_events([
+                (e["event_id"], e["experiment_id"], e["variant_id"], e["metric_id"], e["user_id"],
+                 e["event_type"], e["event_value"], e["timestamp"], _json_dumps(e.get("metadata") or {}))
+                for e in legacy_events
+            ])
+            os.replace(legacy_path, legacy_path + ".migrated")
+            self.logger.info(f"Migrated {len(legacy_events)} events from experiment_events.jsonl")
+        
+        db_path = os.path.join(self.data_dir, "experiment_events.db")
+        if not os.path.exists(db_path):
+            return
+        
+        # Batches may be pulled from different worker threads, one at a time
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            # Columns follow ExperimentEvent field order, so rows hydrate positionally while streaming
+            cursor = conn.execute("""
+                SELECT event_id, user_id, experiment_id, variant_id, metric_id,
+                       event_type, event_value, ts, metadata
+                FROM events ORDER BY id
+            """)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [
+                    ExperimentEvent(event_id, user_id, experiment_id, variant_id, metric_id,
+                                    event_type, event_value, ts, _json_loads(metadata) if metadata else {})
+                    for (event_id, user_id, experiment_id, variant_id, metric_id,
+                         event_type, event_value, ts, metadata) in rows
+                ]
+        finally:
+            conn.close()
+    
+    def _apply_loaded_data(self, experiments: List[Experiment], assignments: List[Dict[str, Any]]):
+        """Install loaded experiments and assignments and reset the event counters"""
+        for experiment in experiments:
+            self.experiments[experiment.experiment_id] = experiment
+            if experiment.status == ExperimentStatus.ACTIVE:
+                self._active_experiments[experiment.experiment_id] = experiment
+        
+        for assignment_data in assignments:
+            assignment = UserAssignment(**assignment_data)
+            self.user_assignments.setdefault(assignment.experiment_id, {})[assignment.user_id] = assignment
+        
+        self._user_active_cache.clear()
+        # Counters restart from the events already in memory; stored batches are folded in next
+        self._rebuild_event_indexes()
+    
+    def _apply_event_batch(self, batch: List[ExperimentEvent]):
+        """Fold a batch of stored events into the counters, keeping only the newest in memory"""
+        self._index_events(batch)
+        self.experiment_events.extend(batch)
+
+
+def _distinct_count(users) -> int:
+    """Number of distinct users in an exact set or a HyperLogLog sketch"""
+    if isinstance(users, (set, tuple)):
+        return len(users)
+    return int(round(users.count()))
+
 
-# Factory function
+def _critical_value(confidence_level: float, degrees_of_freedom: Optional[int]) -> float:
+    """Two-sided critical value (Student's t when dof is known, else normal)"""
+    quantile = (1 + confidence_level) / 2
+    if degrees_of_freedom and SCIPY_AVAILABLE:
+        return float(scipy_stats.t.ppf(quantile, degrees_of_freedom))
+    return NormalDist().inv_cdf(quantile)
+
+@njit(cache=True)
+def _effect_size_significance(values, control_idx, minimum_effect_size):
+    """Flag variants whose relative difference from control meets the minimum effect size"""
+    significant = np.zeros(values.shape[0], dtype=np.bool_)
+    control_value = values[control_idx]
+    if control_value > 0:
+        for i in range(values.shape[0]):
+            significant[i] = abs(values[i] - control_value) / control_value >= minimum_effect_size
+    return significant
+
+@njit(cache=True)
+def _confidence_bounds(values, std_errors, criticals):
+    """Lower/upper interval bounds per variant, clamped at zero"""
+    lower = np.empty(values.shape[0])
+    upper = np.empty(values.shape[0])
+    for i in range(values.shape[0]):
+        margin = criticals[i] * std_errors[i]
+        lower[i] = max(0.0, values[i] - margin)
+        upper[i] = values[i] + margin
+    return lower, upper
+
+# Factory functions
 def create_ab_testing_framework(db_manager=None, analytics_collector=None) -> ABTestingFramework:
     """Create A/B testing framework with dependencies"""
     return ABTestingFramework(db_manager, analytics_collector)
 
+async def load_ab_testing_framework(db_manager=None, analytics_collector=None) -> ABTestingFramework:
+    """Create A/B testing framework, loading stored data off the event loop"""
+    framework = ABTestingFramework(db_manager, analytics_collector, load_data=False)
+    await framework.load_experiments()
+    return framework
+
 # Helper functions for creating common experiments
 async def create_plugin_recommendation_experiment(
     framework: ABTestingFramework,
@@ -13,11 +13,13 @@ import os
 import json
 import asyncio
 from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
 import logging
-import uuid
+import time
+import itertools
 from collections import defaultdict, Counter
 
 # Analytics dependencies
@@ -29,6 +31,21 @@ except ImportError:
     ANALYTICS_LIBS_AVAILABLE = False
     logging.warning("Analytics libraries not available. Using basic tracking.")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. Using standard json for analytics serialization.")
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("pyarrow not available. Uploading analytics batches as JSON.")
+
 class EventType(Enum):
     """Analytics event types"""
     # User Events
@@ -71,6 +88,151 @@ class EventType(Enum):
     PAYMENT_COMPLETED = "payment_completed"
     PAYMENT_FAILED = "payment_failed"
 
+# Small integer codes for event types, used by the columnar event store
+_EVENT_TYPES = list(EventType)
+_EVENT_TYPE_CODES = {event_type: code for code, event_type in enumerate(_EVENT_TYPES)}
+
+# Classification bits per event type, so getters test an int instead of comparing enums
+_FLAG_WORKOUT = 0b000001
+_FLAG_PLUGIN_USAGE = 0b000010
+_FLAG_ERROR = 0b000100
+_FLAG_PAYMENT = 0b001000
+_FLAG_TRIAL = 0b010000
+_FLAG_PURCHASE = 0b100000
+_EVENT_TYPE_FLAGS = dict.fromkeys(EventType, 0)
+_EVENT_TYPE_FLAGS.update({
+    EventType.WORKOUT_COMPLETED: _FLAG_WORKOUT,
+    EventType.PLUGIN_USAGE: _FLAG_PLUGIN_USAGE,
+    EventType.ERROR_OCCURRED: _FLAG_ERROR,
+    EventType.PAYMENT_COMPLETED: _FLAG_PAYMENT,
+    EventType.PLUGIN_TRIAL_STARTED: _FLAG_TRIAL,
+    EventType.PLUGIN_PURCHASED: _FLAG_PURCHASE
+})
+
+def _json_bytes(obj: Any) -> bytes:
+    """Encode a JSON value to compact UTF-8 bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+def _json_dumps(obj: Any) -> str:
+    """Encode a JSON value to a compact string"""
+    return _json_bytes(obj).decode()
+
+# Event and session ids: process start time and pid, then a per-process counter (all hex)
+_ID_PREFIX = f"{int(time.time()):x}-{os.getpid():x}-"
+_ID_SEQ = itertools.count()
+
+def _next_id() -> str:
+    """Unique, per-process increasing id; much cheaper than uuid4"""
+    return f"{_ID_PREFIX}{next(_ID_SEQ):x}"
+
+def _estimate_event_bytes(event: "AnalyticsEvent") -> int:
+    """Cheap estimate of an event's encoded size, for the byte-based flush trigger"""
+    return (160 + len(event.user_id) + len(event.session_id)
+            + 48 * (len(event.properties) + len(event.device_info)))
+
+# Engagement weight per event type; types without an explicit weight count as 1
+_ENGAGEMENT_WEIGHTS = {
+    EventType.WORKOUT_COMPLETED: 10,
+    EventType.PLUGIN_USAGE: 5,
+    EventType.PAGE_VIEW: 1,
+    EventType.BUTTON_CLICK: 2
+}
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# UTC offset changes fall on quarter-hour instants, so offsets are looked up once per 15-minute bucket
+_OFFSET_BUCKET_SECONDS = 900
+
+def _local_ns(timestamps_ns: "np.ndarray") -> "np.ndarray":
+    """Local wall-clock times (ns) for epoch ns timestamps, each shifted by its own UTC offset"""
+    buckets, inverse = np.unique(timestamps_ns // (_OFFSET_BUCKET_SECONDS * 1_000_000_000), return_inverse=True)
+    offsets = np.array(
+        [time.localtime(int(bucket) * _OFFSET_BUCKET_SECONDS).tm_gmtoff for bucket in buckets], dtype=np.int64
+    )
+    return timestamps_ns + offsets[inverse.reshape(-1)] * 1_000_000_000
+
+def _iso_timestamp(event: "AnalyticsEvent") -> str:
+    """Local ISO-8601 timestamp of an event, formatted on demand from timestamp_ns"""
+    if event.timestamp:
+        return event.timestamp
+    seconds, nanos = divmod(event.timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat()
+
+def _iso_timestamps(events: List["AnalyticsEvent"]) -> List[str]:
+    """Local ISO-8601 timestamps for a batch of events, in one vectorized pass when numpy is available"""
+    if not ANALYTICS_LIBS_AVAILABLE or not events:
+        return [_iso_timestamp(event) for event in events]
+    timestamps_ns = np.fromiter((event.timestamp_ns for event in events), dtype=np.int64, count=len(events))
+    local_us = _local_ns(timestamps_ns) // 1000
+    formatted = np.datetime_as_string(local_us.astype("datetime64[us]"), unit="us")
+    # Like isoformat(), whole seconds carry no fractional part
+    whole = local_us % 1_000_000 == 0
+    if whole.any():
+        formatted[whole] = np.datetime_as_string((local_us[whole] // 1_000_000).astype("datetime64[s]"), unit="s")
+    return [event.timestamp or timestamp for event, timestamp in zip(events, formatted.tolist())]
+
+# Event types the platform aggregates filter on; the columnar store keeps a bitmap for each
+_MASKED_EVENT_TYPES = (
+    EventType.WORKOUT_COMPLETED,
+    EventType.PLUGIN_USAGE,
+    EventType.ERROR_OCCURRED,
+    EventType.PAYMENT_COMPLETED
+)
+
+# Mock report bodies, built once; period_days is filled in per request
+_ENGAGEMENT_REPORT_TEMPLATE = MappingProxyType({
+    "report_type": "engagement",
+    "period_days": None,
+    "total_users": 1250,
+    "active_users": 890,
+    "average_session_time": 25.5,
+    "bounce_rate": 15.2,
+    "retention_rate": 68.5
+})
+
+_REVENUE_REPORT_TEMPLATE = MappingProxyType({
+    "report_type": "revenue",
+    "period_days": None,
+    "total_revenue": 5420.50,
+    "plugin_revenue": 3850.00,
+    "subscription_revenue": 1570.50,
+    "conversion_rate": 12.8,
+    "average_order_value": 18.75
+})
+
+_PLUGIN_PERFORMANCE_REPORT_TEMPLATE = MappingProxyType({
+    "report_type": "plugin_performance",
+    "period_days": None,
+    "top_plugins": [
+        {"plugin_id": "golf_pro", "users": 245, "revenue": 3910.55},
+        {"plugin_id": "tennis_pro", "users": 189, "revenue": 2451.11},
+        {"plugin_id": "basketball_skills", "users": 156, "revenue": 2340.44}
+    ],
+    "trial_conversion_rate": 24.5,
+    "average_usage_time": 42.3
+})
+
+_RETENTION_REPORT_TEMPLATE = MappingProxyType({
+    "report_type": "user_retention",
+    "period_days": None,
+    "day_1_retention": 85.2,
+    "day_7_retention": 65.8,
+    "day_30_retention": 42.1,
+    "cohort_analysis": {
+        "2024_01": {"users": 150, "retention_30d": 45.2},
+        "2024_02": {"users": 180, "retention_30d": 42.8},
+        "2024_03": {"users": 220, "retention_30d": 48.1}
+    }
+})
+
+def _report_from_template(template: MappingProxyType, days: int) -> Dict[str, Any]:
+    """Shallow copy of a report template with period_days set (nested values are shared)"""
+    report = dict(template)
+    report["period_days"] = days
+    return report
+
 class MetricType(Enum):
     """Types of metrics"""
     COUNTER = "counter"
@@ -78,7 +240,7 @@ class MetricType(Enum):
     HISTOGRAM = "histogram"
     TIMER = "timer"
 
-@dataclass
+@dataclass(slots=True)
 class AnalyticsEvent:
     """Analytics event data structure"""
     event_id: str
@@ -89,14 +251,19 @@ class AnalyticsEvent:
     properties: Dict[str, Any]
     device_info: Dict[str, Any] = None
     location_info: Dict[str, Any] = None
+    timestamp_ns: int = field(default_factory=time.time_ns)  # epoch ns, for cheap window filters
+    type_code: int = field(init=False, repr=False, compare=False)
+    type_flags: int = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
+        self.type_code = _EVENT_TYPE_CODES[self.event_type]
+        self.type_flags = _EVENT_TYPE_FLAGS[self.event_type]
         if self.device_info is None:
             self.device_info = {}
         if self.location_info is None:
             self.location_info = {}
 
-@dataclass
+@dataclass(slots=True)
 class UserSession:
     """User session tracking"""
     session_id: str
@@ -110,7 +277,7 @@ class UserSession:
     ip_address: str = ""
     referrer: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class PluginUsageMetrics:
     """Plugin usage metrics"""
     plugin_id: str
@@ -124,7 +291,7 @@ class PluginUsageMetrics:
     error_rate: float = 0.0
     satisfaction_score: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class UserEngagementMetrics:
     """User engagement metrics"""
     user_id: str
@@ -137,26 +304,149 @@ class UserEngagementMetrics:
     retention_cohort: str = ""
     lifetime_value: float = 0.0
 
+class ColumnarEventStore:
+    """Column-oriented copy of buffered events for vectorized filtering"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 0
+        self.timestamp_ns = np.zeros(capacity, dtype=np.int64)
+        self.event_type_code = np.zeros(capacity, dtype=np.int8)
+        self.user_id = np.empty(capacity, dtype=object)
+        self.session_id = np.empty(capacity, dtype=object)
+        self.properties = np.empty(capacity, dtype=object)
+        self._type_masks = {event_type: np.zeros(capacity, dtype=bool) for event_type in _MASKED_EVENT_TYPES}
+    
+    def append(self, event: AnalyticsEvent):
+        """Write an event into the next row"""
+        if self.size == self.capacity:
+            self._grow()
+        
+        row = self.size
+        self.timestamp_ns[row] = event.timestamp_ns
+        self.event_type_code[row] = event.type_code
+        self.user_id[row] = event.user_id
+        self.session_id[row] = event.session_id
+        self.properties[row] = event.properties
+        mask = self._type_masks.get(event.event_type)
+        if mask is not None:
+            mask[row] = True
+        self.size += 1
+    
+    def clear(self):
+        """Drop all rows, releasing references to the buffered objects"""
+        self.user_id[:self.size] = None
+        self.session_id[:self.size] = None
+        self.properties[:self.size] = None
+        for mask in self._type_masks.values():
+            mask[:self.size] = False
+        self.size = 0
+    
+    def recent_rows(self, cutoff_ns: int, rows: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Row indices (optionally within rows) whose timestamp is at or after cutoff_ns"""
+        if rows is None:
+            return np.flatnonzero(self.timestamp_ns[:self.size] >= cutoff_ns)
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows[self.timestamp_ns[rows] >= cutoff_ns]
+    
+    def recent_mask(self, cutoff_ns: int) -> "np.ndarray":
+        """Boolean mask over the stored rows whose timestamp is at or after cutoff_ns"""
+        return self.timestamp_ns[:self.size] >= cutoff_ns
+    
+    def type_mask(self, event_type: EventType) -> "np.ndarray":
+        """Bitmap over the stored rows marking events of event_type (one of _MASKED_EVENT_TYPES)"""
+        return self._type_masks[event_type][:self.size]
+    
+    def rows_of_type(self, rows: "np.ndarray", event_type: EventType) -> "np.ndarray":
+        """The subset of rows holding events of event_type"""
+        return rows[self.event_type_code[rows] == _EVENT_TYPE_CODES[event_type]]
+    
+    def distinct_count(self, column: str, rows: "np.ndarray") -> int:
+        """Number of distinct values of an object column over rows (indices or a boolean mask)"""
+        return len(pd.unique(getattr(self, column)[:self.size][rows]))
+    
+    def latest_row(self, rows: "np.ndarray") -> int:
+        """The row with the newest timestamp among non-empty rows"""
+        return int(rows[np.argmax(self.timestamp_ns[rows])])
+    
+    def type_counts(self, rows: "np.ndarray") -> Dict[str, int]:
+        """Event counts per event type value for the given rows"""
+        counts = np.bincount(self.event_type_code[rows], minlength=len(_EVENT_TYPES))
+        return {_EVENT_TYPES[code].value: int(count) for code, count in enumerate(counts) if count}
+    
+    def engagement_score(self, rows: "np.ndarray") -> float:
+        """Mean engagement weight of the given rows, scaled to 0-100"""
+        if not len(rows):
+            return 0.0
+        score = int(_ENGAGEMENT_WEIGHT_LUT[self.event_type_code[rows]].sum())
+        return min(100.0, score / len(rows) * 10)
+    
+    def daily_active_users(self, rows: "np.ndarray") -> List[Dict[str, Any]]:
+        """Distinct users per local calendar day for the given rows"""
+        if not len(rows):
+            return []
+        # Shift by each event's local UTC offset so days line up with the ISO timestamps
+        days = _local_ns(self.timestamp_ns[rows]) // _NS_PER_DAY
+        daily_users = pd.Series(self.user_id[rows]).groupby(days).nunique()
+        return [
+            {"date": str(np.datetime64(int(day), "D")), "active_users": int(users)}
+            for day, users in daily_users.items()
+        ]
+    
+    def _grow(self):
+        """Double the capacity (the buffer can outgrow buffer_size while flushes fail)"""
+        self.capacity *= 2
+        for name in ("timestamp_ns", "event_type_code", "user_id", "session_id", "properties"):
+            column = getattr(self, name)
+            grown = np.zeros(self.capacity, dtype=column.dtype) if column.dtype != object \
+                else np.empty(self.capacity, dtype=object)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+        for event_type, mask in self._type_masks.items():
+            grown = np.zeros(self.capacity, dtype=bool)
+            grown[:len(mask)] = mask
+            self._type_masks[event_type] = grown
+
+if ANALYTICS_LIBS_AVAILABLE:
+    _ENGAGEMENT_WEIGHT_LUT = np.ones(len(_EVENT_TYPES), dtype=np.int64)
+    for _event_type, _weight in _ENGAGEMENT_WEIGHTS.items():
+        _ENGAGEMENT_WEIGHT_LUT[_EVENT_TYPE_CODES[_event_type]] = _weight
+
 class AnalyticsCollector:
     """Main analytics collection system"""
     
-    def __init__(self, db_manager=None, storage_manager=None):
+    def __init__(self, db_manager=None, storage_manager=None, buffer_size: int = 10_000,
+                 max_buffer_bytes: int = 4 * 1024 * 1024):
         self.db_manager = db_manager
         self.storage_manager = storage_manager
-        self.events_buffer = []
         self.sessions = {}
         self.plugin_metrics = {}
         self.user_metrics = {}
         self.logger = logging.getLogger(__name__)
         
         # Analytics configuration
-        self.buffer_size = 100
+        self.buffer_size = buffer_size
+        self.max_buffer_bytes = max_buffer_bytes  # flush early once buffered events grow this large
         self.flush_interval = 60  # seconds
         self.retention_days = 90
+        self.active_user_ttl = 300  # seconds without events before a user stops counting as active
+        
+        # Preallocated event slots; only events_buffer[:_write_idx] holds live events
+        self.events_buffer: List[Optional[AnalyticsEvent]] = [None] * self.buffer_size
+        self._write_idx = 0
+        self._buffer_bytes = 0  # rough encoded size of the buffered events
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Columnar copy of events_buffer for vectorized queries (requires numpy)
+        self._columns = ColumnarEventStore(self.buffer_size) if ANALYTICS_LIBS_AVAILABLE else None
+        
+        # events_buffer positions per user and per plugin, cleared with the buffer
+        self._events_by_user: Dict[str, List[int]] = defaultdict(list)
+        self._events_by_plugin: Dict[str, List[int]] = defaultdict(list)
         
         # Real-time metrics
         self.realtime_metrics = {
-            "active_users": set(),
+            "active_users": {},  # user_id -> last event time (epoch ns), expired after active_user_ttl
             "active_sessions": {},
             "current_workouts": 0,
             "plugin_usage": defaultdict(int),
@@ -167,49 +457,90 @@ class AnalyticsCollector:
         asyncio.create_task(self._periodic_flush())
         asyncio.create_task(self._calculate_metrics())
     
-    async def track_event(self, user_id: str, session_id: str, event_type: EventType, 
+    def track_event_sync(self, user_id: str, session_id: str, event_type: EventType,
                          properties: Dict[str, Any] = None, device_info: Dict[str, Any] = None) -> str:
-        """Track an analytics event"""
+        """Track an analytics event without awaiting; a full buffer is flushed in the background"""
         try:
-            event_id = str(uuid.uuid4())
+            event_id = _next_id()
             
             if properties is None:
                 properties = {}
             
+            timestamp_ns = time.time_ns()
             event = AnalyticsEvent(
                 event_id=event_id,
                 user_id=user_id,
                 session_id=session_id,
                 event_type=event_type,
-                timestamp=datetime.now().isoformat(),
+                timestamp="",  # formatted from timestamp_ns when needed
                 properties=properties,
-                device_info=device_info or {}
+                device_info=device_info or {},
+                timestamp_ns=timestamp_ns
             )
             
             # Add to buffer
-            self.events_buffer.append(event)
+            self._buffer_event(event)
             
             # Update real-time metrics
             self._update_realtime_metrics(event)
             
             # Update session info
-            await self._update_session(session_id, user_id, event_type)
+            self._update_session(session_id, user_id, event_type)
             
             # Flush if buffer is full
-            if len(self.events_buffer) >= self.buffer_size:
-                await self._flush_events()
+            if self._write_idx >= self.buffer_size or self._buffer_bytes >= self.max_buffer_bytes:
+                self._schedule_flush()
             
-            self.logger.debug(f"Event tracked: {event_type.value} for user {user_id}")
+            self.logger.debug("Event tracked: %s for user %s", event_type.value, user_id)
             return event_id
             
         except Exception as e:
             self.logger.error(f"Event tracking failed: {e}")
             return ""
     
+    async def track_event(self, user_id: str, session_id: str, event_type: EventType, 
+                         properties: Dict[str, Any] = None, device_info: Dict[str, Any] = None) -> str:
+        """Track an analytics event"""
+        return self.track_event_sync(user_id, session_id, event_type, properties, device_info)
+    
+    def _buffer_event(self, event: AnalyticsEvent):
+        """Append an event to the buffer slots, columnar store and lookup indexes"""
+        row = self._write_idx
+        if row == len(self.events_buffer):
+            # Out of slots (flushes failing or buffer_size raised): double rather than drop events
+            self.events_buffer.extend([None] * len(self.events_buffer))
+        self.events_buffer[row] = event
+        self._write_idx += 1
+        self._buffer_bytes += _estimate_event_bytes(event)
+        if self._columns is not None:
+            self._columns.append(event)
+        self._events_by_user[event.user_id].append(row)
+        plugin_id = event.properties.get("plugin_id")
+        if plugin_id is not None:
+            self._events_by_plugin[plugin_id].append(row)
+    
+    def _take_buffered_events(self) -> List[AnalyticsEvent]:
+        """Detach the buffered events and reset the buffer for new events"""
+        count = self._write_idx
+        events = self.events_buffer[:count]
+        self.events_buffer[:count] = [None] * count
+        self._write_idx = 0
+        self._buffer_bytes = 0
+        self._events_by_user.clear()
+        self._events_by_plugin.clear()
+        if self._columns is not None:
+            self._columns.clear()
+        return events
+    
+    def _schedule_flush(self):
+        """Start a background flush unless one is already running"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_events())
+    
     async def start_session(self, user_id: str, device_info: Dict[str, Any] = None) -> str:
         """Start a new user session"""
         try:
-            session_id = str(uuid.uuid4())
+            session_id = _next_id()
             
             session = UserSession(
                 session_id=session_id,
@@ -221,11 +552,10 @@ class AnalyticsCollector:
             )
             
             self.sessions[session_id] = session
-            self.realtime_metrics["active_users"].add(user_id)
             self.realtime_metrics["active_sessions"][session_id] = session
             
             # Track session start event
-            await self.track_event(user_id, session_id, EventType.USER_LOGIN, {
+            self.track_event_sync(user_id, session_id, EventType.USER_LOGIN, {
                 "device_type": session.device_type,
                 "user_agent": session.user_agent
             })
@@ -249,14 +579,14 @@ class AnalyticsCollector:
                 duration = (end_time - start_time).total_seconds()
                 
                 # Track session end event
-                await self.track_event(session.user_id, session_id, EventType.USER_LOGOUT, {
+                self.track_event_sync(session.user_id, session_id, EventType.USER_LOGOUT, {
                     "session_duration": duration,
                     "page_views": session.page_views,
                     "events_count": session.events_count
                 })
                 
                 # Remove from active tracking
-                self.realtime_metrics["active_users"].discard(session.user_id)
+                self.realtime_metrics["active_users"].pop(session.user_id, None)
                 self.realtime_metrics["active_sessions"].pop(session_id, None)
             
         except Exception as e:
@@ -265,7 +595,7 @@ class AnalyticsCollector:
     async def track_workout(self, user_id: str, session_id: str, workout_data: Dict[str, Any]):
         """Track workout completion"""
         try:
-            await self.track_event(user_id, session_id, EventType.WORKOUT_COMPLETED, {
+            self.track_event_sync(user_id, session_id, EventType.WORKOUT_COMPLETED, {
                 "workout_type": workout_data.get("workout_type"),
                 "duration": workout_data.get("duration"),
                 "exercises_count": len(workout_data.get("exercises", [])),
@@ -297,7 +627,7 @@ class AnalyticsCollector:
             if properties:
                 event_properties.update(properties)
             
-            await self.track_event(user_id, session_id, EventType.PLUGIN_USAGE, event_properties)
+            self.track_event_sync(user_id, session_id, EventType.PLUGIN_USAGE, event_properties)
             
             # Update plugin metrics
             if plugin_id not in self.plugin_metrics:
@@ -320,7 +650,7 @@ class AnalyticsCollector:
                          error_message: str, context: Dict[str, Any] = None):
         """Track error occurrence"""
         try:
-            await self.track_event(user_id, session_id, EventType.ERROR_OCCURRED, {
+            self.track_event_sync(user_id, session_id, EventType.ERROR_OCCURRED, {
                 "error_type": error_type,
                 "error_message": error_message,
                 "context": context or {}
@@ -335,32 +665,51 @@ class AnalyticsCollector:
         """Get analytics for a specific user"""
         try:
             # Get user events from the last N days
-            cutoff_date = datetime.now() - timedelta(days=days)
-            user_events = []
-            
-            for event in self.events_buffer:
-                if (event.user_id == user_id and 
-                    datetime.fromisoformat(event.timestamp) >= cutoff_date):
-                    user_events.append(event)
-            
-            # Calculate metrics
-            total_sessions = len(set(event.session_id for event in user_events))
-            total_events = len(user_events)
-            
-            # Event type breakdown
-            event_counts = Counter(event.event_type.value for event in user_events)
-            
-            # Workout analytics
-            workout_events = [e for e in user_events if e.event_type == EventType.WORKOUT_COMPLETED]
-            total_workouts = len(workout_events)
-            
-            total_workout_time = sum(
-                event.properties.get("duration", 0) for event in workout_events
-            )
-            
-            # Plugin usage
-            plugin_events = [e for e in user_events if e.event_type == EventType.PLUGIN_USAGE]
-            unique_plugins = len(set(event.properties.get("plugin_id") for event in plugin_events))
+            if self._columns is not None:
+                columns = self._columns
+                rows = columns.recent_rows(self._cutoff_ns(days), self._events_by_user.get(user_id, []))
+                workout_rows = columns.rows_of_type(rows, EventType.WORKOUT_COMPLETED)
+                plugin_rows = columns.rows_of_type(rows, EventType.PLUGIN_USAGE)
+                
+                total_sessions = columns.distinct_count("session_id", rows)
+                total_events = len(rows)
+                total_workouts = len(workout_rows)
+                total_workout_time = sum(
+                    properties.get("duration", 0) for properties in columns.properties[workout_rows]
+                )
+                unique_plugins = len(set(
+                    properties.get("plugin_id") for properties in columns.properties[plugin_rows]
+                ))
+                event_counts = columns.type_counts(rows)
+                last_activity = _iso_timestamp(self.events_buffer[columns.latest_row(rows)]) if total_events else ""
+                engagement_score = columns.engagement_score(rows)
+            else:
+                cutoff_ns = self._cutoff_ns(days)
+                user_events = [
+                    self.events_buffer[row] for row in self._events_by_user.get(user_id, ())
+                    if self.events_buffer[row].timestamp_ns >= cutoff_ns
+                ]
+                event_counts = Counter(event.event_type.value for event in user_events)
+                
+                # Calculate metrics
+                total_sessions = len(set(event.session_id for event in user_events))
+                total_events = len(user_events)
+                
+                # Workout analytics
+                workout_events = [e for e in user_events if e.type_flags & _FLAG_WORKOUT]
+                total_workouts = len(workout_events)
+                
+                total_workout_time = sum(
+                    event.properties.get("duration", 0) for event in workout_events
+                )
+                
+                # Plugin usage
+                plugin_events = [e for e in user_events if e.type_flags & _FLAG_PLUGIN_USAGE]
+                unique_plugins = len(set(event.properties.get("plugin_id") for event in plugin_events))
+                
+                last_activity = _iso_timestamp(max(user_events, key=lambda event: event.timestamp_ns)) \
+                    if user_events else ""
+                engagement_score = self._calculate_engagement_score(user_events)
             
             return {
                 "user_id": user_id,
@@ -371,8 +720,8 @@ class AnalyticsCollector:
                 "total_workout_time": total_workout_time,
                 "unique_plugins_used": unique_plugins,
                 "event_breakdown": dict(event_counts),
-                "last_activity": max((event.timestamp for event in user_events), default=""),
-                "engagement_score": self._calculate_engagement_score(user_events)
+                "last_activity": last_activity,
+                "engagement_score": engagement_score
             }
             
         except Exception as e:
@@ -382,30 +731,43 @@ class AnalyticsCollector:
     async def get_plugin_analytics(self, plugin_id: str, days: int = 30) -> Dict[str, Any]:
         """Get analytics for a specific plugin"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            plugin_events = []
-            
-            for event in self.events_buffer:
-                if (event.properties.get("plugin_id") == plugin_id and 
-                    datetime.fromisoformat(event.timestamp) >= cutoff_date):
-                    plugin_events.append(event)
-            
-            # Calculate metrics
-            unique_users = len(set(event.user_id for event in plugin_events))
-            total_usage_events = len([e for e in plugin_events if e.event_type == EventType.PLUGIN_USAGE])
-            
-            # Usage time
-            total_usage_time = sum(
-                event.properties.get("duration", 0) 
-                for event in plugin_events 
-                if event.event_type == EventType.PLUGIN_USAGE
-            )
-            
-            # Trial conversions
-            trial_events = [e for e in plugin_events if e.event_type == EventType.PLUGIN_TRIAL_STARTED]
-            purchase_events = [e for e in plugin_events if e.event_type == EventType.PLUGIN_PURCHASED]
+            if self._columns is not None:
+                columns = self._columns
+                rows = columns.recent_rows(self._cutoff_ns(days), self._events_by_plugin.get(plugin_id, []))
+                usage_rows = columns.rows_of_type(rows, EventType.PLUGIN_USAGE)
+                
+                unique_users = columns.distinct_count("user_id", rows)
+                total_usage_events = len(usage_rows)
+                total_usage_time = sum(
+                    properties.get("duration", 0) for properties in columns.properties[usage_rows]
+                )
+                trial_starts = len(columns.rows_of_type(rows, EventType.PLUGIN_TRIAL_STARTED))
+                purchases = len(columns.rows_of_type(rows, EventType.PLUGIN_PURCHASED))
+                daily_active_users = columns.daily_active_users(rows)
+            else:
+                cutoff_ns = self._cutoff_ns(days)
+                plugin_events = [
+                    self.events_buffer[row] for row in self._events_by_plugin.get(plugin_id, ())
+                    if self.events_buffer[row].timestamp_ns >= cutoff_ns
+                ]
+                
+                # Calculate metrics
+                unique_users = len(set(event.user_id for event in plugin_events))
+                total_usage_events = sum(1 for e in plugin_events if e.type_flags & _FLAG_PLUGIN_USAGE)
+                
+                # Usage time
+                total_usage_time = sum(
+                    event.properties.get("duration", 0) 
+                    for event in plugin_events 
+                    if event.type_flags & _FLAG_PLUGIN_USAGE
+                )
+                
+                # Trial conversions
+                trial_starts = sum(1 for e in plugin_events if e.type_flags & _FLAG_TRIAL)
+                purchases = sum(1 for e in plugin_events if e.type_flags & _FLAG_PURCHASE)
+                daily_active_users = self._calculate_daily_active_users(plugin_events)
             
-            conversion_rate = (len(purchase_events) / len(trial_events) * 100) if trial_events else 0
+            conversion_rate = (purchases / trial_starts * 100) if trial_starts else 0
             
             return {
                 "plugin_id": plugin_id,
@@ -414,10 +776,10 @@ class AnalyticsCollector:
                 "total_usage_events": total_usage_events,
                 "total_usage_time": total_usage_time,
                 "average_session_time": total_usage_time / total_usage_events if total_usage_events else 0,
-                "trial_starts": len(trial_events),
-                "purchases": len(purchase_events),
+                "trial_starts": trial_starts,
+                "purchases": purchases,
                 "conversion_rate": round(conversion_rate, 2),
-                "daily_active_users": self._calculate_daily_active_users(plugin_events)
+                "daily_active_users": daily_active_users
             }
             
         except Exception as e:
@@ -427,42 +789,60 @@ class AnalyticsCollector:
     async def get_platform_analytics(self, days: int = 30) -> Dict[str, Any]:
         """Get overall platform analytics"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            recent_events = [
-                event for event in self.events_buffer
-                if datetime.fromisoformat(event.timestamp) >= cutoff_date
-            ]
-            
-            # User metrics
-            unique_users = len(set(event.user_id for event in recent_events))
-            total_sessions = len(set(event.session_id for event in recent_events))
-            
-            # Workout metrics
-            workout_events = [e for e in recent_events if e.event_type == EventType.WORKOUT_COMPLETED]
-            total_workouts = len(workout_events)
-            
-            # Plugin metrics
-            plugin_events = [e for e in recent_events if e.event_type == EventType.PLUGIN_USAGE]
-            plugin_usage_breakdown = Counter(
-                event.properties.get("plugin_id") for event in plugin_events
-            )
-            
-            # Error metrics
-            error_events = [e for e in recent_events if e.event_type == EventType.ERROR_OCCURRED]
-            error_rate = (len(error_events) / len(recent_events) * 100) if recent_events else 0
+            if self._columns is not None:
+                columns = self._columns
+                recent = columns.recent_mask(self._cutoff_ns(days))
+                total_events = int(np.count_nonzero(recent))
+                unique_users = columns.distinct_count("user_id", recent)
+                total_sessions = columns.distinct_count("session_id", recent)
+                total_workouts = int(np.count_nonzero(columns.type_mask(EventType.WORKOUT_COMPLETED) & recent))
+                error_count = int(np.count_nonzero(columns.type_mask(EventType.ERROR_OCCURRED) & recent))
+                payment_count = int(np.count_nonzero(columns.type_mask(EventType.PAYMENT_COMPLETED) & recent))
+                plugin_rows = np.flatnonzero(columns.type_mask(EventType.PLUGIN_USAGE) & recent)
+                plugin_usage_breakdown = Counter(
+                    properties.get("plugin_id") for properties in columns.properties[plugin_rows]
+                )
+            else:
+                cutoff_ns = self._cutoff_ns(days)
+                recent_events = [
+                    event for event in self.events_buffer[:self._write_idx] if event.timestamp_ns >= cutoff_ns
+                ]
+                
+                # Accumulate every aggregate in a single pass over the events
+                users = set()
+                sessions = set()
+                total_workouts = 0
+                error_count = 0
+                payment_count = 0
+                plugin_usage_breakdown = Counter()
+                for event in recent_events:
+                    users.add(event.user_id)
+                    sessions.add(event.session_id)
+                    flags = event.type_flags
+                    if flags & _FLAG_WORKOUT:
+                        total_workouts += 1
+                    elif flags & _FLAG_PLUGIN_USAGE:
+                        plugin_usage_breakdown[event.properties.get("plugin_id")] += 1
+                    elif flags & _FLAG_ERROR:
+                        error_count += 1
+                    elif flags & _FLAG_PAYMENT:
+                        payment_count += 1
+                total_events = len(recent_events)
+                unique_users = len(users)
+                total_sessions = len(sessions)
             
-            # Revenue events
-            payment_events = [e for e in recent_events if e.event_type == EventType.PAYMENT_COMPLETED]
+            error_rate = (error_count / total_events * 100) if total_events else 0
+            self._expire_active_users()
             
             return {
                 "period_days": days,
                 "unique_users": unique_users,
                 "total_sessions": total_sessions,
-                "total_events": len(recent_events),
+                "total_events": total_events,
                 "total_workouts": total_workouts,
                 "plugin_usage": dict(plugin_usage_breakdown),
                 "error_rate": round(error_rate, 2),
-                "successful_payments": len(payment_events),
+                "successful_payments": payment_count,
                 "realtime_metrics": {
                     "active_users": len(self.realtime_metrics["active_users"]),
                     "active_sessions": len(self.realtime_metrics["active_sessions"]),
@@ -493,10 +873,19 @@ class AnalyticsCollector:
             self.logger.error(f"Report generation failed: {e}")
             return {}
     
+    @property
+    def buffered_events(self) -> int:
+        """Number of events waiting to be flushed"""
+        return self._write_idx
+    
     # Private helper methods
+    def _cutoff_ns(self, days: int) -> int:
+        """Epoch nanoseconds for the start of a trailing window of N days"""
+        return time.time_ns() - days * 86_400_000_000_000
+    
     def _update_realtime_metrics(self, event: AnalyticsEvent):
         """Update real-time metrics"""
-        self.realtime_metrics["active_users"].add(event.user_id)
+        self.realtime_metrics["active_users"][event.user_id] = event.timestamp_ns
         
         if event.event_type == EventType.WORKOUT_STARTED:
             self.realtime_metrics["current_workouts"] += 1
@@ -505,7 +894,7 @@ class AnalyticsCollector:
         elif event.event_type == EventType.ERROR_OCCURRED:
             self.realtime_metrics["error_count"] += 1
     
-    async def _update_session(self, session_id: str, user_id: str, event_type: EventType):
+    def _update_session(self, session_id: str, user_id: str, event_type: EventType):
         """Update session information"""
         if session_id in self.sessions:
             session = self.sessions[session_id]
@@ -519,66 +908,108 @@ class AnalyticsCollector:
         while True:
             try:
                 await asyncio.sleep(self.flush_interval)
-                if self.events_buffer:
+                if self._write_idx:
                     await self._flush_events()
             except Exception as e:
                 self.logger.error(f"Periodic flush failed: {e}")
     
+    def _event_to_dict(self, event: AnalyticsEvent, timestamp: str) -> Dict[str, Any]:
+        """Convert an event to its stored dict form"""
+        return {
+            "event_id": event.event_id,
+            "user_id": event.user_id,
+            "session_id": event.session_id,
+            "event_type": event.event_type.value,
+            "timestamp": timestamp,
+            "properties": event.properties,
+            "device_info": event.device_info
+        }
+    
+    def _events_to_parquet(self, events: List[AnalyticsEvent], timestamps: List[str]) -> bytes:
+        """Encode events as a Snappy-compressed Parquet file (properties and device info as JSON)"""
+        table = pa.table({
+            "event_id": pa.array([event.event_id for event in events], pa.string()),
+            "user_id": pa.array([event.user_id for event in events], pa.string()),
+            "session_id": pa.array([event.session_id for event in events], pa.string()),
+            "event_type": pa.array([event.event_type.value for event in events], pa.string()),
+            "timestamp": pa.array(timestamps, pa.string()),
+            "timestamp_ns": pa.array([event.timestamp_ns for event in events], pa.int64()),
+            "properties": pa.array([_json_dumps(event.properties) for event in events], pa.string()),
+            "device_info": pa.array([_json_dumps(event.device_info) for event in events], pa.string())
+        })
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="snappy")
+        return sink.getvalue().to_pybytes()
+    
     async def _flush_events(self):
         """Flush events to database/storage"""
-        if not self.events_buffer:
+        if not self._write_idx:
             return
         
+        # Detach the batch first so events tracked while the writes are awaited start a new one
+        events = self._take_buffered_events()
         try:
-            # Convert events to database format
-            events_data = []
-            for event in self.events_buffer:
-                events_data.append({
-                    "event_id": event.event_id,
-                    "user_id": event.user_id,
-                    "session_id": event.session_id,
-                    "event_type": event.event_type.value,
-                    "timestamp": event.timestamp,
-                    "properties": event.properties,
-                    "device_info": event.device_info
-                })
+            timestamps = _iso_timestamps(events)
             
             # Save to database if available
             if self.db_manager:
-                for event_data in events_data:
-                    await self.db_manager.log_analytics_event(event_data)
+                if hasattr(self.db_manager, "log_analytics_events_bulk"):
+                    rows = [
+                        (event.event_id, event.user_id, event.session_id, event.event_type.value,
+                         timestamp, _json_dumps(event.properties), _json_dumps(event.device_info))
+                        for event, timestamp in zip(events, timestamps)
+                    ]
+                    await self.db_manager.log_analytics_events_bulk(rows)
+                else:
+                    await asyncio.gather(*(
+                        self.db_manager.log_analytics_event(self._event_to_dict(event, timestamp))
+                        for event, timestamp in zip(events, timestamps)
+                    ))
             
             # Save to storage if available
             if self.storage_manager:
-                events_json = json.dumps(events_data, indent=2)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                storage_key = f"analytics/events_{timestamp}.json"
+                # Epoch-ns key suffix: no strftime, and back-to-back flushes never share a key
+                key_suffix = time.time_ns()
+                if PYARROW_AVAILABLE:
+                    payload = self._events_to_parquet(events, timestamps)
+                    storage_key = f"analytics/events_{key_suffix}.parquet"
+                    content_type = "application/octet-stream"
+                else:
+                    payload = _json_bytes([
+                        self._event_to_dict(event, timestamp) for event, timestamp in zip(events, timestamps)
+                    ])
+                    storage_key = f"analytics/events_{key_suffix}.json"
+                    content_type = "application/json"
                 
-                await self.storage_manager.upload_file(
-                    events_json.encode(),
-                    storage_key,
-                    "application/json"
-                )
-            
-            # Clear buffer
-            flushed_count = len(self.events_buffer)
-            self.events_buffer.clear()
+                await self.storage_manager.upload_file(payload, storage_key, content_type)
             
-            self.logger.info(f"✅ Flushed {flushed_count} analytics events")
+            self.logger.info(f"✅ Flushed {len(events)} analytics events")
             
         except Exception as e:
             self.logger.error(f"Event flushing failed: {e}")
+            # Put the batch back so the next flush retries it
+            for event in events:
+                self._buffer_event(event)
     
     async def _calculate_metrics(self):
         """Periodically calculate aggregated metrics"""
         while True:
             try:
                 await asyncio.sleep(300)  # Every 5 minutes
+                self._expire_active_users()
                 await self._update_plugin_metrics()
                 await self._update_user_metrics()
             except Exception as e:
                 self.logger.error(f"Metrics calculation failed: {e}")
     
+    def _expire_active_users(self):
+        """Drop users with no events within active_user_ttl from the active set"""
+        cutoff_ns = time.time_ns() - int(self.active_user_ttl * 1_000_000_000)
+        active_users = self.realtime_metrics["active_users"]
+        self.realtime_metrics["active_users"] = {
+            user_id: last_seen for user_id, last_seen in active_users.items() if last_seen >= cutoff_ns
+        }
+    
     async def _update_plugin_metrics(self):
         """Update plugin metrics"""
         # This would calculate metrics from stored events
@@ -595,14 +1026,7 @@ class AnalyticsCollector:
             return 0.0
         
         # Simple engagement scoring
-        weights = {
-            EventType.WORKOUT_COMPLETED: 10,
-            EventType.PLUGIN_USAGE: 5,
-            EventType.PAGE_VIEW: 1,
-            EventType.BUTTON_CLICK: 2
-        }
-        
-        score = sum(weights.get(event.event_type, 1) for event in events)
+        score = sum(_ENGAGEMENT_WEIGHTS.get(event.event_type, 1) for event in events)
         return min(100.0, score / len(events) * 10)
     
     def _calculate_daily_active_users(self, events: List[AnalyticsEvent]) -> List[Dict[str, Any]]:
@@ -610,7 +1034,7 @@ class AnalyticsCollector:
         daily_users = defaultdict(set)
         
         for event in events:
-            date = event.timestamp[:10]  # YYYY-MM-DD
+            date = _iso_timestamp(event)[:10]  # YYYY-MM-DD
             daily_users[date].add(event.user_id)
         
         return [
@@ -620,65 +1044,24 @@ class AnalyticsCollector:
     
     async def _generate_engagement_report(self, days: int) -> Dict[str, Any]:
         """Generate user engagement report"""
-        # Mock engagement report
-        return {
-            "report_type": "engagement",
-            "period_days": days,
-            "total_users": 1250,
-            "active_users": 890,
-            "average_session_time": 25.5,
-            "bounce_rate": 15.2,
-            "retention_rate": 68.5
-        }
+        return _report_from_template(_ENGAGEMENT_REPORT_TEMPLATE, days)
     
     async def _generate_revenue_report(self, days: int) -> Dict[str, Any]:
         """Generate revenue report"""
-        # Mock revenue report
-        return {
-            "report_type": "revenue",
-            "period_days": days,
-            "total_revenue": 5420.50,
-            "plugin_revenue": 3850.00,
-            "subscription_revenue": 1570.50,
-            "conversion_rate": 12.8,
-            "average_order_value": 18.75
-        }
+        return _report_from_template(_REVENUE_REPORT_TEMPLATE, days)
     
     async def _generate_plugin_performance_report(self, days: int) -> Dict[str, Any]:
         """Generate plugin performance report"""
-        # Mock plugin performance report
-        return {
-            "report_type": "plugin_performance",
-            "period_days": days,
-            "top_plugins": [
-                {"plugin_id": "golf_pro", "users": 245, "revenue": 3910.55},
-                {"plugin_id": "tennis_pro", "users": 189, "revenue": 2451.11},
-                {"plugin_id": "basketball_skills", "users": 156, "revenue": 2340.44}
-            ],
-            "trial_conversion_rate": 24.5,
-            "average_usage_time": 42.3
-        }
+        return _report_from_template(_PLUGIN_PERFORMANCE_REPORT_TEMPLATE, days)
     
     async def _generate_retention_report(self, days: int) -> Dict[str, Any]:
         """Generate user retention report"""
-        # Mock retention report
-        return {
-            "report_type": "user_retention",
-            "period_days": days,
-            "day_1_retention": 85.2,
-            "day_7_retention": 65.8,
-            "day_30_retention": 42.1,
-            "cohort_analysis": {
-                "2024_01": {"users": 150, "retention_30d": 45.2},
-                "2024_02": {"users": 180, "retention_30d": 42.8},
-                "2024_03": {"users": 220, "retention_30d": 48.1}
-            }
-        }
+        return _report_from_template(_RETENTION_REPORT_TEMPLATE, days)
 
 # Factory function
-def create_analytics_collector(db_manager=None, storage_manager=None) -> AnalyticsCollector:
+def create_analytics_collector(db_manager=None, storage_manager=None, **config) -> AnalyticsCollector:
     """Create analytics collector with dependencies"""
-    return AnalyticsCollector(db_manager, storage_manager)
+    return AnalyticsCollector(db_manager, storage_manager, **config)
 
 # Usage example
 async def test_analytics():
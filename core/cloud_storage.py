@@ -12,16 +12,274 @@ Handles user data, plugin downloads, and media files.
 
 import os
 import asyncio
+import base64
+import functools
 import hashlib
+import inspect
+import io
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union, BinaryIO
+import sqlite3
+import time
+import zlib
+from typing import Dict, List, Any, Optional, Union, BinaryIO, AsyncIterable, AsyncIterator, Literal, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime, timedelta
 from pathlib import Path
 import mimetypes
 
+import aiofiles
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available. Using standard json for storage metadata.")
+
+# Provider SDKs; initialize() falls back to local storage when the configured one is missing
+try:
+    import aioboto3
+    from aiobotocore.config import AioConfig
+    AIOBOTO3_AVAILABLE = True
+except ImportError:
+    AIOBOTO3_AVAILABLE = False
+
+try:
+    from google.cloud import storage as gcs
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    GCS_AVAILABLE = True
+except ImportError:
+    GCS_AVAILABLE = False
+
+try:
+    from azure.storage.blob.aio import BlobServiceClient
+    from azure.core.pipeline.transport import AioHttpTransport
+    import aiohttp
+    AZURE_BLOB_AVAILABLE = True
+except ImportError:
+    AZURE_BLOB_AVAILABLE = False
+
+# Compression codecs
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    logging.warning("zstandard not available. Falling back to gzip for storage compression.")
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+# Checksum hashes, fastest available first
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    logging.warning("xxhash not available. Using MD5 for storage checksums.")
+
+if BLAKE3_AVAILABLE:
+    CHECKSUM_ALGORITHM = "blake3"
+elif XXHASH_AVAILABLE:
+    CHECKSUM_ALGORITHM = "xxh3_128"
+else:
+    CHECKSUM_ALGORITHM = "md5"
+
+# upload_file accepts whole payloads or sources that are read chunk by chunk
+UploadSource = Union[bytes, BinaryIO, AsyncIterable[bytes]]
+
+async def _iter_source(source: Union[BinaryIO, AsyncIterable[bytes]], chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield non-empty chunks from a file-like object (sync or async read) or an async iterable"""
+    # read() wins: async file objects (aiofiles, aiohttp streams) iterate by line
+    if not hasattr(source, "read"):
+        async for chunk in source:
+            if chunk:
+                yield chunk
+        return
+    
+    while True:
+        chunk = source.read(chunk_size)
+        if inspect.isawaitable(chunk):
+            chunk = await chunk
+        if not chunk:
+            return
+        yield chunk
+
+async def _write_chunk(write, chunk: bytes):
+    """Call a sync or async write() with one chunk"""
+    result = write(chunk)
+    if inspect.isawaitable(result):
+        await result
+
+async def _iter_slices(data: bytes, chunk_size: int) -> AsyncIterator[memoryview]:
+    """Yield zero-copy chunk_size slices of an in-memory payload"""
+    view = memoryview(data)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+def _json_bytes(obj: Any) -> bytes:
+    """Encode a JSON value to compact UTF-8 bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON bytes or text, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _new_hasher():
+    """Create an incremental hasher for CHECKSUM_ALGORITHM"""
+    if CHECKSUM_ALGORITHM == "blake3":
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    if CHECKSUM_ALGORITHM == "xxh3_128":
+        return xxhash.xxh3_128()
+    return hashlib.md5()
+
+@functools.lru_cache(maxsize=512)
+def _guess_content_type(suffix: str) -> str:
+    """Content type for a file extension, cached per suffix"""
+    content_type, _ = mimetypes.guess_type("file" + suffix)
+    return content_type or "application/octet-stream"
+
+# (epoch second, formatted local time) of the last _fast_iso call
+_iso_second_cache = [None, ""]
+
+def _fast_iso(ts_ns: int) -> str:
+    """Local-time ISO 8601 string for an epoch-ns timestamp, matching datetime.isoformat()"""
+    seconds, remainder = divmod(ts_ns, 1_000_000_000)
+    if seconds != _iso_second_cache[0]:
+        _iso_second_cache[1] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(seconds))
+        _iso_second_cache[0] = seconds
+    micros = remainder // 1000
+    return f"{_iso_second_cache[1]}.{micros:06d}" if micros else _iso_second_cache[1]
+
+def _s3_metadata(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """S3 user metadata, converting values to str only when some are not already"""
+    for value in metadata.values():
+        if value.__class__ is not str:
+            return {k: str(v) for k, v in metadata.items()}
+    return metadata
+
+def _content_md5(body: Union[bytes, bytearray]) -> str:
+    """Base64 MD5 digest for the S3 Content-MD5 header"""
+    return base64.b64encode(hashlib.md5(body).digest()).decode("ascii")
+
+class _LZ4StreamCompressor:
+    """compressobj-style wrapper around an LZ4 frame compressor"""
+    
+    def __init__(self):
+        self._compressor = lz4.frame.LZ4FrameCompressor()
+        self._header = self._compressor.begin()
+    
+    def compress(self, data: bytes) -> bytes:
+        header, self._header = self._header, b""
+        return header + self._compressor.compress(data)
+    
+    def flush(self) -> bytes:
+        header, self._header = self._header, b""
+        return header + self._compressor.flush()
+
+def _new_compressor(algorithm: str):
+    """Create a streaming compressor with compress()/flush() for the given algorithm"""
+    if algorithm == "zstd":
+        return zstandard.ZstdCompressor(level=3, threads=-1).compressobj()
+    if algorithm == "lz4":
+        return _LZ4StreamCompressor()
+    # wbits=31 writes a gzip container
+    return zlib.compressobj(wbits=31)
+
+# Compression gates: tiny payloads tend to grow, and already-compressed formats only cost CPU
+_COMPRESSIBLE_EXTENSIONS = frozenset({'.txt', '.json', '.csv', '.log', '.sql', '.xml', '.html', '.css', '.js'})
+_MIN_COMPRESS_SIZE = 4096
+_COMPRESSION_PROBE_SIZE = 64 * 1024
+_COMPRESSED_SIGNATURES = (
+    b"\x1f\x8b",              # gzip
+    b"PK\x03\x04",            # zip
+    b"\x28\xb5\x2f\xfd",      # zstd
+    b"\x04\x22\x4d\x18",      # lz4 frame
+    b"BZh",                   # bzip2
+    b"\xfd7zXZ\x00",          # xz
+    b"7z\xbc\xaf",            # 7z
+    b"\xff\xd8\xff",          # jpeg
+    b"\x89PNG",               # png
+    b"GIF8",                  # gif
+)
+
+def _is_precompressed(head: bytes) -> bool:
+    """Check a payload's leading bytes for a compressed or media container signature"""
+    head = bytes(head[:12])
+    if head.startswith(_COMPRESSED_SIGNATURES):
+        return True
+    # mp4/mov/heic carry 'ftyp' after the box size; webp is a RIFF container
+    return head[4:8] == b"ftyp" or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+
+# Payloads are hashed and compressed in slices small enough to stay cache-resident between the two
+_FUSED_SLICE_SIZE = 1024 * 1024
+
+def _digest_and_compress(data: bytes, algorithm: Optional[str]) -> Tuple[str, bytes]:
+    """Checksum a payload and, if algorithm is set, compress it in the same pass"""
+    hasher = _new_hasher()
+    compressor = _new_compressor(algorithm) if algorithm else None
+    compressed = []
+    view = memoryview(data)
+    for offset in range(0, len(view), _FUSED_SLICE_SIZE):
+        piece = view[offset:offset + _FUSED_SLICE_SIZE]
+        hasher.update(piece)
+        if compressor is not None:
+            compressed.append(compressor.compress(piece))
+    if compressor is None:
+        return hasher.hexdigest(), data
+    compressed.append(compressor.flush())
+    return hasher.hexdigest(), b"".join(compressed)
+
+def _new_decompressor(algorithm: str):
+    """Create a streaming decompressor with decompress() for the given algorithm"""
+    if algorithm == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    if algorithm == "lz4":
+        return lz4.frame.LZ4FrameDecompressor()
+    return zlib.decompressobj(wbits=31)
+
+# Read size for streamed downloads
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Operations a GCP/Azure backend must implement as _<op>_gcp / _<op>_azure
+_PROVIDER_OPS = ("upload", "download", "delete", "list", "get_info", "presigned_url")
+
+class BufferPool:
+    """Reusable part-sized bytearrays, allocated on demand up to max_buffers"""
+    
+    def __init__(self, buffer_size: int, max_buffers: int):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._created = 0
+        self._free: asyncio.Queue = asyncio.Queue()
+    
+    async def acquire(self) -> bytearray:
+        """Take a free buffer, allocating one while under max_buffers, else wait for a release"""
+        if self._free.empty() and self._created < self.max_buffers:
+            self._created += 1
+            return bytearray(self.buffer_size)
+        return await self._free.get()
+    
+    def release(self, buffer: bytearray):
+        """Return a buffer to the pool"""
+        self._free.put_nowait(buffer)
+
 class StorageProvider(Enum):
     """Supported cloud storage providers"""
     AWS_S3 = "aws_s3"
@@ -56,7 +314,16 @@ class StorageConfig:
     max_file_size: int = 100 * 1024 * 1024  # 100MB
     allowed_extensions: List[str] = None
     enable_compression: bool = True
+    compression: Literal["gzip", "zstd", "lz4", "none"] = "zstd"
     enable_encryption: bool = False
+    conn_pool_size: int = 32  # HTTP connections kept open per provider client
+    dns_cache_ttl: int = 300  # seconds a resolved provider endpoint is reused
+    max_retries: int = 5  # attempts for throttled (429) or unavailable (503) requests
+    part_size: int = 8 * 1024 * 1024  # chunk size for streamed uploads and S3 multipart parts
+    multipart_threshold: int = 16 * 1024 * 1024  # byte payloads above this use S3 multipart
+    max_inflight_parts: int = 4  # S3 parts uploading concurrently per object
+    s3_content_md5: bool = False  # send Content-MD5 so S3 verifies each PUT server-side
+    buffer_pool_size: int = 16  # part_size buffers shared by all uploads of a manager
 
 @dataclass
 class StorageObject:
@@ -80,6 +347,29 @@ class CloudStorageManager:
         self.provider = None
         self.logger = logging.getLogger(__name__)
         
+        # Long-lived provider clients, opened in initialize() and released by aclose()
+        self._s3_cm = None
+        self._s3_client = None
+        self.azure_client = None
+        
+        # Provider operation table, bound by initialize()
+        self._ops: Dict[str, Any] = {}
+        # Set when bytes uploads need neither extension filtering nor a compression decision
+        self._plain_bytes_upload = False
+        
+        # Local object index (meta.db), opened by _init_local_fs
+        self._meta_db: Optional[sqlite3.Connection] = None
+        self._local_dirs = set()  # directories known to exist under the local root
+        
+        # Codec for new uploads; None when compression is disabled
+        self.compression = self._resolve_compression()
+        
+        # Metadata entries that are the same for every upload from this manager
+        self._metadata_prefix = {"checksum_algorithm": CHECKSUM_ALGORITHM}
+        
+        # Part buffers reused across uploads instead of allocating per part
+        self._buffer_pool = BufferPool(config.part_size, config.buffer_pool_size)
+        
         # Folder structure
         self.folders = {
             "user_data": "users/{user_id}/data/",
@@ -92,58 +382,129 @@ class CloudStorageManager:
             "temp": "temp/"
         }
         
+        # Templates split around {user_id} so path getters concatenate instead of calling format()
+        self._folder_templates = {name: path.partition("{user_id}") for name, path in self.folders.items()}
+        
     async def initialize(self) -> bool:
         """Initialize cloud storage provider"""
         try:
             if self.config.provider == StorageProvider.AWS_S3:
-                return await self._init_aws_s3()
+                initialized = await self._init_aws_s3()
             elif self.config.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._init_google_cloud()
+                initialized = await self._init_google_cloud()
             elif self.config.provider == StorageProvider.AZURE_BLOB:
-                return await self._init_azure_blob()
+                initialized = await self._init_azure_blob()
             else:
-                return self._init_local_fs()
+                initialized = self._init_local_fs()
         except Exception as e:
             self.logger.error(f"Failed to initialize storage provider: {e}")
             # Fallback to local filesystem
-            return self._init_local_fs()
+            initialized = self._init_local_fs()
+        
+        if self.provider in (StorageProvider.GOOGLE_CLOUD, StorageProvider.AZURE_BLOB):
+            suffix = self._provider_suffix()
+            missing = [op for op in _PROVIDER_OPS if not hasattr(self, f"_{op}_{suffix}")]
+            if missing:
+                self.logger.warning(f"{self.provider.value} backend lacks {', '.join(missing)}, "
+                                    f"falling back to local storage")
+                await self._close_azure_client()
+                initialized = self._init_local_fs()
+        
+        self._bind_provider_ops()
+        return initialized
+    
+    def _provider_suffix(self) -> str:
+        """Method-name suffix of the active GCP/Azure provider"""
+        return "gcp" if self.provider == StorageProvider.GOOGLE_CLOUD else "azure"
+    
+    def _bind_provider_ops(self):
+        """Pick the provider implementation of every storage operation once, after initialization"""
+        if self.provider == StorageProvider.AWS_S3:
+            self._ops = {
+                "upload": self._upload_s3,
+                "upload_stream": self._upload_s3_stream,
+                "download": self._download_buffered,
+                "download_to": self._download_s3_to,
+                "delete": self._delete_s3,
+                "delete_many": self._delete_many_s3,
+                "list": self._list_s3,
+                "get_info": self._get_info_s3,
+                "presigned_url": self._presigned_url_s3,
+            }
+        elif self.provider in (StorageProvider.GOOGLE_CLOUD, StorageProvider.AZURE_BLOB):
+            suffix = self._provider_suffix()
+            self._ops = {op: getattr(self, f"_{op}_{suffix}") for op in _PROVIDER_OPS}
+            self._ops["upload_stream"] = self._upload_joined_stream
+            self._ops["download_to"] = self._download_whole_to
+            self._ops["delete_many"] = self._delete_many_each
+        else:
+            self._ops = {
+                "upload": self._upload_local,
+                "upload_stream": self._upload_local_stream,
+                "download": self._download_buffered,
+                "download_to": self._download_local_to,
+                "delete": self._delete_local,
+                "delete_many": self._delete_many_local,
+                "list": self._list_local,
+                "get_info": self._get_info_local,
+                "presigned_url": self._presigned_url_local,
+            }
+        
+        # With compression and extension filtering off, bytes uploads skip both checks entirely
+        self._plain_bytes_upload = self.compression is None and not self.config.allowed_extensions
     
     async def _init_aws_s3(self) -> bool:
         """Initialize AWS S3 storage"""
+        if not AIOBOTO3_AVAILABLE:
+            self.logger.warning("aioboto3 not available, falling back to local storage")
+            return self._init_local_fs()
+        
         try:
-            import aioboto3
-            
             self.session = aioboto3.Session(
                 aws_access_key_id=self.config.aws_access_key_id,
                 aws_secret_access_key=self.config.aws_secret_access_key,
                 region_name=self.config.aws_region
             )
             
-            # Test connection
-            async with self.session.client('s3') as s3:
-                await s3.head_bucket(Bucket=self.config.aws_bucket)
+            # Open one client for the manager's lifetime and test the connection with it
+            # Adaptive retries back off on 429/503 (SlowDown) and rate-limit the client
+            s3_config = AioConfig(
+                max_pool_connections=self.config.conn_pool_size,
+                connector_args={'ttl_dns_cache': self.config.dns_cache_ttl, 'keepalive_timeout': 60},
+                retries={'mode': 'adaptive', 'max_attempts': self.config.max_retries}
+            )
+            self._s3_cm = self.session.client('s3', config=s3_config)
+            self._s3_client = await self._s3_cm.__aenter__()
+            await self._s3_client.head_bucket(Bucket=self.config.aws_bucket)
             
             self.provider = StorageProvider.AWS_S3
             self.logger.info("✅ AWS S3 storage initialized")
             return True
             
-        except ImportError:
-            self.logger.warning("aioboto3 not available, falling back to local storage")
-            return self._init_local_fs()
         except Exception as e:
             self.logger.error(f"AWS S3 initialization failed: {e}")
+            await self._close_s3_client()
             return self._init_local_fs()
     
     async def _init_google_cloud(self) -> bool:
         """Initialize Google Cloud Storage"""
+        if not GCS_AVAILABLE:
+            self.logger.warning("google-cloud-storage not available, falling back to local storage")
+            return self._init_local_fs()
+        
         try:
-            from google.cloud import storage
-            import aiofiles
-            
             if self.config.gcp_credentials_path and os.path.exists(self.config.gcp_credentials_path):
                 os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = self.config.gcp_credentials_path
             
-            self.gcp_client = storage.Client(project=self.config.gcp_project_id)
+            self.gcp_client = gcs.Client(project=self.config.gcp_project_id)
+            
+            # Size the client's requests connection pool to match the configured concurrency
+            retry = Retry(total=self.config.max_retries, backoff_factor=0.5,
+                          status_forcelist=(429, 503), respect_retry_after_header=True)
+            adapter = HTTPAdapter(pool_connections=self.config.conn_pool_size,
+                                  pool_maxsize=self.config.conn_pool_size,
+                                  max_retries=retry)
+            self.gcp_client._http.mount("https://", adapter)
             self.gcp_bucket = self.gcp_client.bucket(self.config.gcp_bucket)
             
             # Test connection
@@ -153,40 +514,69 @@ class CloudStorageManager:
             self.logger.info("✅ Google Cloud Storage initialized")
             return True
             
-        except ImportError:
-            self.logger.warning("google-cloud-storage not available, falling back to local storage")
-            return self._init_local_fs()
         except Exception as e:
             self.logger.error(f"Google Cloud Storage initialization failed: {e}")
             return self._init_local_fs()
     
     async def _init_azure_blob(self) -> bool:
         """Initialize Azure Blob Storage"""
+        if not AZURE_BLOB_AVAILABLE:
+            self.logger.warning("azure-storage-blob not available, falling back to local storage")
+            return self._init_local_fs()
+        
         try:
-            from azure.storage.blob.aio import BlobServiceClient
-            
+            # Pooled keep-alive connections; the transport owns and closes the session
+            # Resolved endpoints are reused for dns_cache_ttl (aiohttp's default is 10s)
+            connector = aiohttp.TCPConnector(limit=self.config.conn_pool_size, keepalive_timeout=60,
+                                             ttl_dns_cache=self.config.dns_cache_ttl)
+            transport = AioHttpTransport(session=aiohttp.ClientSession(connector=connector), session_owner=True)
+            # The SDK's exponential retry policy covers 429/503; retry_total bounds it
             self.azure_client = BlobServiceClient.from_connection_string(
-                self.config.azure_connection_string
+                self.config.azure_connection_string,
+                transport=transport,
+                retry_total=self.config.max_retries
             )
             
-            # Test connection
-            async with self.azure_client:
-                container_client = self.azure_client.get_container_client(
-                    self.config.azure_container
-                )
-                await container_client.get_container_properties()
+            # Test connection; the client stays open for later calls
+            container_client = self.azure_client.get_container_client(
+                self.config.azure_container
+            )
+            await container_client.get_container_properties()
             
             self.provider = StorageProvider.AZURE_BLOB
             self.logger.info("✅ Azure Blob Storage initialized")
             return True
             
-        except ImportError:
-            self.logger.warning("azure-storage-blob not available, falling back to local storage")
-            return self._init_local_fs()
         except Exception as e:
             self.logger.error(f"Azure Blob Storage initialization failed: {e}")
+            await self._close_azure_client()
             return self._init_local_fs()
     
+    async def aclose(self):
+        """Release long-lived provider clients"""
+        await self._close_s3_client()
+        await self._close_azure_client()
+        self._close_meta_db()
+    
+    async def _close_s3_client(self):
+        """Exit the shared S3 client context"""
+        if self._s3_cm is not None:
+            try:
+                await self._s3_cm.__aexit__(None, None, None)
+            except Exception as e:
+                self.logger.warning(f"S3 client close failed: {e}")
+            self._s3_cm = None
+            self._s3_client = None
+    
+    async def _close_azure_client(self):
+        """Close the shared Azure Blob service client"""
+        if self.azure_client is not None:
+            try:
+                await self.azure_client.close()
+            except Exception as e:
+                self.logger.warning(f"Azure client close failed: {e}")
+            self.azure_client = None
+    
     def _init_local_fs(self) -> bool:
         """Initialize local filesystem storage"""
         try:
@@ -200,6 +590,7 @@ class CloudStorageManager:
                 full_path = storage_path / clean_path
                 full_path.mkdir(parents=True, exist_ok=True)
             
+            self._meta_db = self._connect_meta_db(storage_path)
             self.provider = StorageProvider.LOCAL_FS
             self.logger.info("✅ Local filesystem storage initialized")
             return True
@@ -208,93 +599,218 @@ class CloudStorageManager:
             self.logger.error(f"Local filesystem initialization failed: {e}")
             return False
     
-    async def upload_file(self, file_data: bytes, key: str, content_type: str = None,
+    async def upload_file(self, file_data: UploadSource, key: str, content_type: str = None,
                          metadata: Dict[str, Any] = None) -> bool:
-        """Upload file to storage"""
+        """Upload file to storage (bytes, a file-like object or an async iterable of bytes)"""
         try:
-            # Validate file
-            if not self._validate_file(file_data, key):
-                return False
+            if not isinstance(file_data, (bytes, bytearray, memoryview)):
+                return await self._upload_stream(file_data, key, content_type, metadata)
+            
+            # Validate file; without extension filtering or compression only the size matters
+            if self._plain_bytes_upload:
+                if len(file_data) > self.config.max_file_size:
+                    self.logger.error(f"File too large: {len(file_data)} > {self.config.max_file_size}")
+                    return False
+                compression = None
+            else:
+                if not self._validate_file(file_data, key):
+                    return False
+                compression = self.compression if self.compression and self._should_compress(key, file_data) else None
             
             # Auto-detect content type
             if content_type is None:
-                content_type, _ = mimetypes.guess_type(key)
-                if content_type is None:
-                    content_type = "application/octet-stream"
+                content_type = _guess_content_type(os.path.splitext(key)[1])
             
             # Add default metadata
             if metadata is None:
                 metadata = {}
             
-            metadata.update({
-                "uploaded_at": datetime.now().isoformat(),
-                "original_size": len(file_data),
-                "checksum": hashlib.md5(file_data).hexdigest()
-            })
+            # Checksum and compress in one pass; large or compressed payloads go to the executor
+            original_size = len(file_data)
+            if compression or original_size > _FUSED_SLICE_SIZE:
+                loop = asyncio.get_running_loop()
+                checksum, file_data = await loop.run_in_executor(
+                    None, _digest_and_compress, file_data, compression
+                )
+            else:
+                checksum, file_data = _digest_and_compress(file_data, None)
+            
+            metadata.update(self._metadata_prefix)
+            metadata["uploaded_at"] = _fast_iso(time.time_ns())
+            metadata["original_size"] = original_size
+            metadata["checksum"] = checksum
             
-            # Compress if enabled
-            if self.config.enable_compression and self._should_compress(key):
-                file_data = await self._compress_data(file_data)
+            if compression:
                 metadata["compressed"] = True
+                metadata["compression"] = compression
             
-            # Upload based on provider
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._upload_s3(file_data, key, content_type, metadata)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._upload_gcp(file_data, key, content_type, metadata)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._upload_azure(file_data, key, content_type, metadata)
-            else:
-                return await self._upload_local(file_data, key, content_type, metadata)
+            return await self._ops["upload"](file_data, key, content_type, metadata)
                 
         except Exception as e:
             self.logger.error(f"File upload failed: {e}")
             return False
     
+    async def _upload_stream(self, source: Union[BinaryIO, AsyncIterable[bytes]], key: str,
+                             content_type: Optional[str], metadata: Optional[Dict[str, Any]]) -> bool:
+        """Upload a chunked source, hashing and compressing as it is read"""
+        if not self._validate_key(key):
+            return False
+        
+        if content_type is None:
+            content_type = _guess_content_type(os.path.splitext(key)[1])
+        
+        if metadata is None:
+            metadata = {}
+        metadata.update(self._metadata_prefix)
+        metadata["uploaded_at"] = _fast_iso(time.time_ns())
+        
+        compress = bool(self.compression and self._should_compress(key))
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            # original_size and checksum are filled in once the source is exhausted
+            hasher = _new_hasher()
+            compressor = None
+            original_size = 0
+            async for chunk in _iter_source(source, self.config.part_size):
+                if original_size == 0 and compress and not _is_precompressed(chunk):
+                    # The first chunk decides, before any output is produced
+                    compressor = _new_compressor(self.compression)
+                    metadata["compressed"] = True
+                    metadata["compression"] = self.compression
+                original_size += len(chunk)
+                if original_size > self.config.max_file_size:
+                    raise ValueError(f"File too large: > {self.config.max_file_size}")
+                hasher.update(chunk)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+            if compressor is not None:
+                tail = compressor.flush()
+                if tail:
+                    yield tail
+            metadata["original_size"] = original_size
+            metadata["checksum"] = hasher.hexdigest()
+        
+        return await self._ops["upload_stream"](chunks(), key, content_type, metadata)
+    
+    async def _upload_joined_stream(self, chunks: AsyncIterator[bytes], key: str, content_type: str,
+                                    metadata: Dict) -> bool:
+        """Upload a chunk stream through a provider that only takes whole payloads"""
+        file_data = b"".join([chunk async for chunk in chunks])
+        return await self._ops["upload"](file_data, key, content_type, metadata)
+    
     async def download_file(self, key: str) -> Optional[bytes]:
         """Download file from storage"""
         try:
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._download_s3(key)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._download_gcp(key)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._download_azure(key)
-            else:
-                return await self._download_local(key)
-                
+            return await self._ops["download"](key)
         except Exception as e:
             self.logger.error(f"File download failed: {e}")
             return None
     
+    async def _download_buffered(self, key: str) -> Optional[bytes]:
+        """Download through the provider's streaming path into memory"""
+        buffer = io.BytesIO()
+        if not await self._ops["download_to"](key, buffer.write):
+            return None
+        return buffer.getvalue()
+    
+    async def download_to_file(self, key: str, dest: Union[str, os.PathLike, BinaryIO]) -> bool:
+        """Stream a file into a path or writable file object (sync or async write), decompressing as it arrives"""
+        try:
+            if not isinstance(dest, (str, os.PathLike)):
+                return await self._ops["download_to"](key, dest.write)
+            
+            async with aiofiles.open(dest, 'wb') as f:
+                downloaded = await self._ops["download_to"](key, f.write)
+            if not downloaded:
+                os.unlink(dest)
+            return downloaded
+                
+        except Exception as e:
+            self.logger.error(f"File download failed: {e}")
+            return False
+    
+    async def _download_whole_to(self, key: str, write) -> bool:
+        """Write a file into write() through a provider that only returns whole payloads"""
+        data = await self._ops["download"](key)
+        if data is None:
+            return False
+        await _write_chunk(write, data)
+        return True
+    
+    async def _write_stream(self, chunks: AsyncIterator[bytes], write, compression: Optional[str]):
+        """Write a chunk stream through an optional streaming decompressor"""
+        # Chunk decompression runs in the executor; calls stay sequential, so one decompressor is safe
+        decompressor = _new_decompressor(compression) if compression else None
+        loop = asyncio.get_running_loop()
+        async for chunk in chunks:
+            if decompressor is not None:
+                chunk = await loop.run_in_executor(None, decompressor.decompress, chunk)
+            if chunk:
+                await _write_chunk(write, chunk)
+        
+        flush = getattr(decompressor, "flush", None)
+        if flush is not None:
+            tail = flush()
+            if tail:
+                await _write_chunk(write, tail)
+    
     async def delete_file(self, key: str) -> bool:
         """Delete file from storage"""
         try:
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._delete_s3(key)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._delete_gcp(key)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._delete_azure(key)
-            else:
-                return await self._delete_local(key)
-                
+            return await self._ops["delete"](key)
         except Exception as e:
             self.logger.error(f"File deletion failed: {e}")
             return False
     
-    async def list_files(self, prefix: str = "", limit: int = 1000) -> List[StorageObject]:
-        """List files in storage"""
+    async def upload_many(self, items: List[Dict[str, Any]], max_concurrency: int = 16) -> List[bool]:
+        """Upload several files concurrently; each item holds upload_file keyword arguments"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def upload(item: Dict[str, Any]) -> bool:
+            async with semaphore:
+                return await self.upload_file(**item)
+        
+        return list(await asyncio.gather(*(upload(item) for item in items)))
+    
+    async def download_many(self, keys: List[str], max_concurrency: int = 16) -> Dict[str, Optional[bytes]]:
+        """Download several files concurrently"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def download(key: str) -> Optional[bytes]:
+            async with semaphore:
+                return await self.download_file(key)
+        
+        results = await asyncio.gather(*(download(key) for key in keys))
+        return dict(zip(keys, results))
+    
+    async def delete_many(self, keys: List[str], max_concurrency: int = 16) -> Dict[str, bool]:
+        """Delete several files, batching requests where the provider supports it"""
+        # max_concurrency bounds per-key deletes; batching providers ignore it
         try:
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._list_s3(prefix, limit)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._list_gcp(prefix, limit)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._list_azure(prefix, limit)
-            else:
-                return await self._list_local(prefix, limit)
-                
+            return await self._ops["delete_many"](keys, max_concurrency)
+        except Exception as e:
+            self.logger.error(f"Bulk deletion failed: {e}")
+            return {key: False for key in keys}
+    
+    async def _delete_many_each(self, keys: List[str], max_concurrency: int) -> Dict[str, bool]:
+        """Delete several files with concurrent single deletes"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def delete(key: str) -> bool:
+            async with semaphore:
+                return await self.delete_file(key)
+        
+        results = await asyncio.gather(*(delete(key) for key in keys))
+        return dict(zip(keys, results))
+    
+    async def list_files(self, prefix: str = "", limit: int = 1000,
+                         include_metadata: bool = False) -> List[StorageObject]:
+        """List files in storage; include_metadata also fetches each object's content type and metadata"""
+        try:
+            return await self._ops["list"](prefix, limit, include_metadata)
         except Exception as e:
             self.logger.error(f"File listing failed: {e}")
             return []
@@ -302,15 +818,7 @@ class CloudStorageManager:
     async def get_file_info(self, key: str) -> Optional[StorageObject]:
         """Get file metadata"""
         try:
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._get_info_s3(key)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._get_info_gcp(key)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._get_info_azure(key)
-            else:
-                return await self._get_info_local(key)
-                
+            return await self._ops["get_info"](key)
         except Exception as e:
             self.logger.error(f"Get file info failed: {e}")
             return None
@@ -318,16 +826,7 @@ class CloudStorageManager:
     async def generate_presigned_url(self, key: str, expiration: int = 3600) -> Optional[str]:
         """Generate presigned URL for file access"""
         try:
-            if self.provider == StorageProvider.AWS_S3:
-                return await self._presigned_url_s3(key, expiration)
-            elif self.provider == StorageProvider.GOOGLE_CLOUD:
-                return await self._presigned_url_gcp(key, expiration)
-            elif self.provider == StorageProvider.AZURE_BLOB:
-                return await self._presigned_url_azure(key, expiration)
-            else:
-                # Local filesystem doesn't support presigned URLs
-                return f"/storage/download/{key}"
-                
+            return await self._ops["presigned_url"](key, expiration)
         except Exception as e:
             self.logger.error(f"Presigned URL generation failed: {e}")
             return None
@@ -335,90 +834,253 @@ class CloudStorageManager:
     # Helper methods for building storage paths
     def get_user_data_path(self, user_id: str, filename: str) -> str:
         """Get storage path for user data"""
-        return self.folders["user_data"].format(user_id=user_id) + filename
+        head, _, tail = self._folder_templates["user_data"]
+        return f"{head}{user_id}{tail}{filename}"
     
     def get_user_upload_path(self, user_id: str, filename: str) -> str:
         """Get storage path for user uploads"""
-        return self.folders["user_uploads"].format(user_id=user_id) + filename
+        head, _, tail = self._folder_templates["user_uploads"]
+        return f"{head}{user_id}{tail}{filename}"
     
     def get_plugin_path(self, plugin_id: str, filename: str) -> str:
         """Get storage path for plugin files"""
-        return self.folders["plugins"] + f"{plugin_id}/{filename}"
+        return f"{self.folders['plugins']}{plugin_id}/{filename}"
     
     def get_plugin_download_path(self, plugin_id: str, version: str) -> str:
         """Get storage path for plugin downloads"""
-        return self.folders["plugin_downloads"] + f"{plugin_id}_v{version}.zip"
+        return f"{self.folders['plugin_downloads']}{plugin_id}_v{version}.zip"
     
     def get_workout_export_path(self, user_id: str, filename: str) -> str:
         """Get storage path for workout exports"""
-        return self.folders["workout_exports"].format(user_id=user_id) + filename
+        head, _, tail = self._folder_templates["workout_exports"]
+        return f"{head}{user_id}{tail}{filename}"
     
     def get_backup_path(self, filename: str) -> str:
         """Get storage path for backups"""
-        return self.folders["backups"] + filename
+        return f"{self.folders['backups']}{filename}"
+    
+    def get_local_path(self, key: str) -> Optional[Path]:
+        """Get filesystem path for a key when using local storage"""
+        if self.provider != StorageProvider.LOCAL_FS:
+            return None
+        return Path(self.config.local_storage_path) / key
     
     # Provider-specific implementation methods
     async def _upload_s3(self, file_data: bytes, key: str, content_type: str, metadata: Dict) -> bool:
         """Upload to AWS S3"""
+        if len(file_data) > self.config.multipart_threshold:
+            return await self._upload_s3_stream(
+                _iter_slices(file_data, self.config.part_size), key, content_type, metadata,
+                metadata_complete=True
+            )
+        return await self._put_s3_object(file_data, key, content_type, metadata)
+    
+    async def _put_s3_object(self, file_data: bytes, key: str, content_type: str, metadata: Dict) -> bool:
+        """Upload to AWS S3 in a single PUT"""
         try:
-            async with self.session.client('s3') as s3:
-                await s3.put_object(
+            extra = {'ContentMD5': _content_md5(file_data)} if self.config.s3_content_md5 else {}
+            await self._s3_client.put_object(
+                Bucket=self.config.aws_bucket,
+                Key=key,
+                Body=file_data,
+                ContentType=content_type,
+                Metadata=_s3_metadata(metadata),
+                **extra
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"S3 upload failed: {e}")
+            return False
+    
+    async def _upload_s3_stream(self, chunks: AsyncIterator[bytes], key: str, content_type: str,
+                                metadata: Dict, metadata_complete: bool = False) -> bool:
+        """Upload a chunk stream to AWS S3, switching to multipart once it exceeds one part"""
+        # Up to max_inflight_parts part PUTs run while later parts are read; metadata_complete
+        # means metadata was final before the first chunk, so no rewrite is needed afterwards
+        part_size = self.config.part_size
+        inflight = asyncio.Semaphore(self.config.max_inflight_parts)
+        buffer = await self._buffer_pool.acquire()
+        filled = 0
+        upload_id = None
+        part_tasks = []
+        try:
+            async for chunk in chunks:
+                view = memoryview(chunk)
+                offset = 0
+                while offset < len(view):
+                    count = min(part_size - filled, len(view) - offset)
+                    buffer[filled:filled + count] = view[offset:offset + count]
+                    filled += count
+                    offset += count
+                    if filled < part_size:
+                        continue
+                    
+                    if upload_id is None:
+                        response = await self._s3_client.create_multipart_upload(
+                            Bucket=self.config.aws_bucket,
+                            Key=key,
+                            ContentType=content_type,
+                            Metadata=_s3_metadata(metadata)
+                        )
+                        upload_id = response['UploadId']
+                    # The full pooled buffer is the part body; it goes back to the pool once the PUT finishes
+                    await inflight.acquire()
+                    part_tasks.append(self._start_s3_part(key, upload_id, len(part_tasks) + 1, buffer, inflight))
+                    buffer = None
+                    buffer = await self._buffer_pool.acquire()
+                    filled = 0
+            
+            tail = bytes(buffer[:filled])
+            self._buffer_pool.release(buffer)
+            buffer = None
+            
+            if upload_id is None:
+                # The whole stream fit in one part
+                return await self._put_s3_object(tail, key, content_type, metadata)
+            
+            if tail:
+                await inflight.acquire()
+                part_tasks.append(self._start_s3_part(key, upload_id, len(part_tasks) + 1, tail, inflight))
+            parts = await asyncio.gather(*part_tasks)
+            await self._s3_client.complete_multipart_upload(
+                Bucket=self.config.aws_bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': list(parts)}
+            )
+            
+            if not metadata_complete:
+                # Size and checksum are only known after the last chunk; rewrite the metadata server-side
+                await self._s3_client.copy_object(
                     Bucket=self.config.aws_bucket,
                     Key=key,
-                    Body=file_data,
+                    CopySource={'Bucket': self.config.aws_bucket, 'Key': key},
                     ContentType=content_type,
-                    Metadata={k: str(v) for k, v in metadata.items()}
+                    Metadata=_s3_metadata(metadata),
+                    MetadataDirective='REPLACE'
                 )
             return True
         except Exception as e:
-            self.logger.error(f"S3 upload failed: {e}")
+            self.logger.error(f"S3 streaming upload failed: {e}")
+            if buffer is not None:
+                self._buffer_pool.release(buffer)
+            for task in part_tasks:
+                task.cancel()
+            await asyncio.gather(*part_tasks, return_exceptions=True)
+            if upload_id is not None:
+                try:
+                    await self._s3_client.abort_multipart_upload(
+                        Bucket=self.config.aws_bucket, Key=key, UploadId=upload_id
+                    )
+                except Exception as abort_error:
+                    self.logger.warning(f"S3 multipart abort failed: {abort_error}")
             return False
     
-    async def _download_s3(self, key: str) -> Optional[bytes]:
-        """Download from AWS S3"""
+    def _start_s3_part(self, key: str, upload_id: str, part_number: int,
+                       body: Union[bytes, bytearray], inflight: asyncio.Semaphore) -> asyncio.Task:
+        """Start a part upload that frees its in-flight slot, and its pooled buffer, when done"""
+        task = asyncio.create_task(self._upload_s3_part(key, upload_id, part_number, body))
+        
+        def _release(_task):
+            # Done callbacks also run for tasks cancelled before their first step
+            inflight.release()
+            if isinstance(body, bytearray):
+                self._buffer_pool.release(body)
+        
+        task.add_done_callback(_release)
+        return task
+    
+    async def _upload_s3_part(self, key: str, upload_id: str, part_number: int,
+                              body: Union[bytes, bytearray]) -> Dict[str, Any]:
+        """Upload one multipart part and return its completion entry"""
+        extra = {'ContentMD5': _content_md5(body)} if self.config.s3_content_md5 else {}
+        response = await self._s3_client.upload_part(
+            Bucket=self.config.aws_bucket,
+            Key=key,
+            PartNumber=part_number,
+            UploadId=upload_id,
+            Body=body,
+            **extra
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+    
+    async def _download_s3_to(self, key: str, write) -> bool:
+        """Stream an object from AWS S3"""
         try:
-            async with self.session.client('s3') as s3:
-                response = await s3.get_object(Bucket=self.config.aws_bucket, Key=key)
-                data = await response['Body'].read()
-                
-                # Decompress if needed
-                if response.get('Metadata', {}).get('compressed') == 'True':
-                    data = await self._decompress_data(data)
-                
-                return data
+            response = await self._s3_client.get_object(Bucket=self.config.aws_bucket, Key=key)
+            
+            # Decompress if needed; objects without a codec tag predate it and are gzip
+            object_meta = response.get('Metadata', {})
+            compression = None
+            if object_meta.get('compressed') == 'True':
+                compression = object_meta.get('compression', 'gzip')
+            
+            await self._write_stream(response['Body'].iter_chunks(_DOWNLOAD_CHUNK_SIZE), write, compression)
+            return True
         except Exception as e:
             self.logger.error(f"S3 download failed: {e}")
-            return None
+            return False
+    
+    async def _delete_many_s3(self, keys: List[str], max_concurrency: int) -> Dict[str, bool]:
+        """Delete from AWS S3 with one DeleteObjects request per 1000 keys"""
+        
+        async def delete_batch(batch: List[str]) -> Dict[str, bool]:
+            try:
+                response = await self._s3_client.delete_objects(
+                    Bucket=self.config.aws_bucket,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except Exception as e:
+                self.logger.error(f"S3 bulk deletion failed: {e}")
+                return {key: False for key in batch}
+            
+            # Quiet mode only reports the keys that failed
+            failed = {error['Key'] for error in response.get('Errors', [])}
+            return {key: key not in failed for key in batch}
+        
+        results = {}
+        batches = [keys[start:start + 1000] for start in range(0, len(keys), 1000)]
+        for batch_result in await asyncio.gather(*(delete_batch(batch) for batch in batches)):
+            results.update(batch_result)
+        return results
     
     async def _delete_s3(self, key: str) -> bool:
         """Delete from AWS S3"""
         try:
-            async with self.session.client('s3') as s3:
-                await s3.delete_object(Bucket=self.config.aws_bucket, Key=key)
+            await self._s3_client.delete_object(Bucket=self.config.aws_bucket, Key=key)
             return True
         except Exception as e:
             self.logger.error(f"S3 deletion failed: {e}")
             return False
     
-    async def _list_s3(self, prefix: str, limit: int) -> List[StorageObject]:
+    async def _list_s3(self, prefix: str, limit: int, include_metadata: bool = False) -> List[StorageObject]:
         """List files in AWS S3"""
         try:
             objects = []
-            async with self.session.client('s3') as s3:
-                response = await s3.list_objects_v2(
-                    Bucket=self.config.aws_bucket,
-                    Prefix=prefix,
-                    MaxKeys=limit
-                )
+            response = await self._s3_client.list_objects_v2(
+                Bucket=self.config.aws_bucket,
+                Prefix=prefix,
+                MaxKeys=limit
+            )
+            
+            for obj in response.get('Contents', []):
+                objects.append(StorageObject(
+                    key=obj['Key'],
+                    size=obj['Size'],
+                    content_type="application/octet-stream",  # S3 doesn't return content type in list
+                    last_modified=obj['LastModified'],
+                    etag=obj['ETag'].strip('"')
+                ))
+            
+            if include_metadata:
+                # ListObjectsV2 carries neither; one HEAD per object, bounded by the connection pool
+                semaphore = asyncio.Semaphore(self.config.conn_pool_size)
                 
-                for obj in response.get('Contents', []):
-                    objects.append(StorageObject(
-                        key=obj['Key'],
-                        size=obj['Size'],
-                        content_type="application/octet-stream",  # S3 doesn't return content type in list
-                        last_modified=obj['LastModified'],
-                        etag=obj['ETag'].strip('"')
-                    ))
+                async def head(obj: StorageObject) -> StorageObject:
+                    async with semaphore:
+                        return await self._get_info_s3(obj.key) or obj
+                
+                objects = list(await asyncio.gather(*(head(obj) for obj in objects)))
             
             return objects
         except Exception as e:
@@ -428,17 +1090,16 @@ class CloudStorageManager:
     async def _get_info_s3(self, key: str) -> Optional[StorageObject]:
         """Get file info from AWS S3"""
         try:
-            async with self.session.client('s3') as s3:
-                response = await s3.head_object(Bucket=self.config.aws_bucket, Key=key)
-                
-                return StorageObject(
-                    key=key,
-                    size=response['ContentLength'],
-                    content_type=response.get('ContentType', 'application/octet-stream'),
-                    last_modified=response['LastModified'],
-                    etag=response['ETag'].strip('"'),
-                    metadata=response.get('Metadata', {})
-                )
+            response = await self._s3_client.head_object(Bucket=self.config.aws_bucket, Key=key)
+            
+            return StorageObject(
+                key=key,
+                size=response['ContentLength'],
+                content_type=response.get('ContentType', 'application/octet-stream'),
+                last_modified=response['LastModified'],
+                etag=response['ETag'].strip('"'),
+                metadata=response.get('Metadata', {})
+            )
         except Exception as e:
             self.logger.error(f"S3 get info failed: {e}")
             return None
@@ -446,155 +1107,271 @@ class CloudStorageManager:
     async def _presigned_url_s3(self, key: str, expiration: int) -> Optional[str]:
         """Generate presigned URL for AWS S3"""
         try:
-            async with self.session.client('s3') as s3:
-                url = await s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': self.config.aws_bucket, 'Key': key},
-                    ExpiresIn=expiration
-                )
+            url = await self._s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.config.aws_bucket, 'Key': key},
+                ExpiresIn=expiration
+            )
             return url
         except Exception as e:
             self.logger.error(f"S3 presigned URL failed: {e}")
             return None
     
     # Local filesystem implementations
+    def _connect_meta_db(self, storage_path: Path) -> sqlite3.Connection:
+        """Open the local object index in WAL mode, creating the schema if needed"""
+        conn = sqlite3.connect(storage_path / "meta.db")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        created = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'objects'"
+        ).fetchone() is None
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS objects (
+                key TEXT PRIMARY KEY,
+                content_type TEXT NOT NULL,
+                compressed INTEGER NOT NULL DEFAULT 0,
+                compression TEXT,
+                metadata BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        
+        if created:
+            self._import_local_sidecars(conn, storage_path)
+        return conn
+    
+    def _import_local_sidecars(self, conn: sqlite3.Connection, storage_path: Path):
+        """Index files stored before meta.db existed, folding in their .meta sidecars and marking them migrated"""
+        rows = []
+        sidecars = []
+        pending = [(str(storage_path), "")]
+        while pending:
+            directory, key_prefix = pending.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, f"{key_prefix}{entry.name}/"))
+                        continue
+                    if not entry.is_file(follow_symlinks=False) or entry.name.endswith(('.meta', '.meta.migrated')):
+                        continue
+                    if not key_prefix and entry.name.startswith('meta.db'):
+                        continue
+                    
+                    content_type = "application/octet-stream"
+                    metadata = {}
+                    metadata_path = f"{entry.path}.meta"
+                    try:
+                        with open(metadata_path, 'rb') as f:
+                            file_meta = _json_loads(f.read())
+                        content_type = file_meta.get('content_type', content_type)
+                        metadata = file_meta.get('metadata', {})
+                        sidecars.append(metadata_path)
+                    except FileNotFoundError:
+                        pass
+                    except Exception as e:
+                        self.logger.warning(f"Unreadable metadata for {entry.path}: {e}")
+                    
+                    stat = entry.stat(follow_symlinks=False)
+                    rows.append(self._local_index_row(
+                        f"{key_prefix}{entry.name}", content_type, metadata, stat.st_size, stat.st_mtime
+                    ))
+        
+        conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        # Sidecars are kept, renamed, so a rollback to the old layout can restore them
+        for metadata_path in sidecars:
+            os.replace(metadata_path, metadata_path + ".migrated")
+        if rows:
+            self.logger.info(f"Indexed {len(rows)} existing local files into meta.db")
+    
+    @staticmethod
+    def _local_index_row(key: str, content_type: str, metadata: Dict, size: int, mtime: float) -> tuple:
+        """Build an objects row for the local index"""
+        return (
+            key,
+            content_type,
+            1 if metadata.get('compressed') else 0,
+            metadata.get('compression'),
+            _json_bytes(metadata),
+            size,
+            mtime
+        )
+    
+    def _index_local_object(self, key: str, content_type: str, metadata: Dict, size: int):
+        """Record an uploaded local file in the index"""
+        self._meta_db.execute(
+            "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._local_index_row(key, content_type, metadata, size, time.time())
+        )
+        self._meta_db.commit()
+    
+    def _close_meta_db(self):
+        """Close the local object index"""
+        if self._meta_db is not None:
+            self._meta_db.close()
+            self._meta_db = None
+    
+    def _local_path(self, key: str) -> str:
+        """Filesystem path for a key under the local storage root"""
+        return os.path.join(self.config.local_storage_path, key)
+    
+    def _ensure_local_dir(self, file_path: str):
+        """Create a file's parent directory once per manager"""
+        directory = os.path.dirname(file_path)
+        if directory not in self._local_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._local_dirs.add(directory)
+    
     async def _upload_local(self, file_data: bytes, key: str, content_type: str, metadata: Dict) -> bool:
         """Upload to local filesystem"""
+        file_path = self._local_path(key)
         try:
-            file_path = Path(self.config.local_storage_path) / key
-            file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._ensure_local_dir(file_path)
             
             # Write file
-            with open(file_path, 'wb') as f:
-                f.write(file_data)
-            
-            # Write metadata
-            metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-            with open(metadata_path, 'w') as f:
-                json.dump({
-                    'content_type': content_type,
-                    'metadata': metadata
-                }, f)
+            async with aiofiles.open(file_path, 'wb') as f:
+                await f.write(file_data)
             
+            self._index_local_object(key, content_type, metadata, len(file_data))
             return True
         except Exception as e:
             self.logger.error(f"Local upload failed: {e}")
+            # The directory may have been removed behind our back; re-check it next time
+            self._local_dirs.discard(os.path.dirname(file_path))
             return False
     
-    async def _download_local(self, key: str) -> Optional[bytes]:
-        """Download from local filesystem"""
+    async def _upload_local_stream(self, chunks: AsyncIterator[bytes], key: str, content_type: str,
+                                   metadata: Dict) -> bool:
+        """Write a chunk stream to the local filesystem"""
+        file_path = self._local_path(key)
         try:
-            file_path = Path(self.config.local_storage_path) / key
-            
-            if not file_path.exists():
-                return None
+            self._ensure_local_dir(file_path)
             
-            with open(file_path, 'rb') as f:
-                data = f.read()
+            size = 0
+            async with aiofiles.open(file_path, 'wb') as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    size += len(chunk)
             
-            # Check if compressed
-            metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-            if metadata_path.exists():
-                with open(metadata_path, 'r') as f:
-                    file_meta = json.load(f)
-                    if file_meta.get('metadata', {}).get('compressed'):
-                        data = await self._decompress_data(data)
+            self._index_local_object(key, content_type, metadata, size)
+            return True
+        except Exception as e:
+            self.logger.error(f"Local streaming upload failed: {e}")
+            self._local_dirs.discard(os.path.dirname(file_path))
+            try:
+                os.unlink(file_path)
+            except FileNotFoundError:
+                pass
+            return False
+    
+    async def _download_local_to(self, key: str, write) -> bool:
+        """Stream a file from the local filesystem"""
+        try:
+            row = self._meta_db.execute(
+                "SELECT compressed, compression FROM objects WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False
             
-            return data
+            # Objects without a codec tag predate it and are gzip
+            compressed, compression = row
+            async with aiofiles.open(self._local_path(key), 'rb') as f:
+                await self._write_stream(_iter_source(f, _DOWNLOAD_CHUNK_SIZE), write,
+                                         (compression or 'gzip') if compressed else None)
+            return True
+        except FileNotFoundError:
+            return False
         except Exception as e:
             self.logger.error(f"Local download failed: {e}")
-            return None
+            return False
     
     async def _delete_local(self, key: str) -> bool:
         """Delete from local filesystem"""
         try:
-            file_path = Path(self.config.local_storage_path) / key
-            metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-            
-            if file_path.exists():
-                file_path.unlink()
-            
-            if metadata_path.exists():
-                metadata_path.unlink()
+            try:
+                os.unlink(self._local_path(key))
+            except FileNotFoundError:
+                pass
             
+            self._meta_db.execute("DELETE FROM objects WHERE key = ?", (key,))
+            self._meta_db.commit()
             return True
         except Exception as e:
             self.logger.error(f"Local deletion failed: {e}")
             return False
     
-    async def _list_local(self, prefix: str, limit: int) -> List[StorageObject]:
+    async def _delete_many_local(self, keys: List[str], max_concurrency: int) -> Dict[str, bool]:
+        """Delete several files from the local filesystem with one index transaction"""
+        results = {}
+        for key in keys:
+            try:
+                os.unlink(self._local_path(key))
+                results[key] = True
+            except FileNotFoundError:
+                results[key] = True
+            except Exception as e:
+                self.logger.error(f"Local deletion failed for {key}: {e}")
+                results[key] = False
+        
+        self._meta_db.executemany(
+            "DELETE FROM objects WHERE key = ?", [(key,) for key, deleted in results.items() if deleted]
+        )
+        self._meta_db.commit()
+        return results
+    
+    async def _list_local(self, prefix: str, limit: int, include_metadata: bool = False) -> List[StorageObject]:
         """List files in local filesystem"""
         try:
-            objects = []
-            storage_path = Path(self.config.local_storage_path)
+            # content_type is a column of the index row, so it is always filled; include_metadata
+            # additionally decodes the stored metadata blob
+            columns = "key, size, content_type, mtime, metadata" if include_metadata else "key, size, content_type, mtime"
             
+            # Prefix match as a primary-key range scan: prefix <= key < prefix with its last char bumped
             if prefix:
-                search_path = storage_path / prefix
+                rows = self._meta_db.execute(
+                    f"SELECT {columns} FROM objects WHERE key >= ? AND key < ? ORDER BY key LIMIT ?",
+                    (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1), limit)
+                )
             else:
-                search_path = storage_path
-            
-            count = 0
-            for file_path in search_path.rglob('*'):
-                if count >= limit:
-                    break
-                
-                if file_path.is_file() and not file_path.suffix == '.meta':
-                    relative_path = file_path.relative_to(storage_path)
-                    
-                    # Get metadata
-                    metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-                    content_type = "application/octet-stream"
-                    
-                    if metadata_path.exists():
-                        try:
-                            with open(metadata_path, 'r') as f:
-                                file_meta = json.load(f)
-                                content_type = file_meta.get('content_type', content_type)
-                        except:
-                            pass
-                    
-                    objects.append(StorageObject(
-                        key=str(relative_path),
-                        size=file_path.stat().st_size,
-                        content_type=content_type,
-                        last_modified=datetime.fromtimestamp(file_path.stat().st_mtime)
-                    ))
-                    count += 1
+                rows = self._meta_db.execute(f"SELECT {columns} FROM objects ORDER BY key LIMIT ?", (limit,))
             
-            return objects
+            return [
+                StorageObject(
+                    key=row[0],
+                    size=row[1],
+                    content_type=row[2],
+                    last_modified=datetime.fromtimestamp(row[3]),
+                    metadata=_json_loads(row[4]) if include_metadata else None
+                )
+                for row in rows
+            ]
         except Exception as e:
             self.logger.error(f"Local listing failed: {e}")
             return []
     
+    async def _presigned_url_local(self, key: str, expiration: int) -> str:
+        """Local filesystem doesn't support presigned URLs; point at the download route"""
+        return f"/storage/download/{key}"
+    
     async def _get_info_local(self, key: str) -> Optional[StorageObject]:
         """Get file info from local filesystem"""
         try:
-            file_path = Path(self.config.local_storage_path) / key
-            
-            if not file_path.exists():
+            row = self._meta_db.execute(
+                "SELECT size, content_type, mtime, metadata FROM objects WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
                 return None
             
-            metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-            content_type = "application/octet-stream"
-            metadata = {}
-            
-            if metadata_path.exists():
-                try:
-                    with open(metadata_path, 'r') as f:
-                        file_meta = json.load(f)
-                        content_type = file_meta.get('content_type', content_type)
-                        metadata = file_meta.get('metadata', {})
-                except:
-                    pass
-            
-            stat = file_path.stat()
-            
+            size, content_type, mtime, metadata = row
             return StorageObject(
                 key=key,
-                size=stat.st_size,
+                size=size,
                 content_type=content_type,
-                last_modified=datetime.fromtimestamp(stat.st_mtime),
-                metadata=metadata
+                last_modified=datetime.fromtimestamp(mtime),
+                metadata=_json_loads(metadata)
             )
         except Exception as e:
             self.logger.error(f"Local get info failed: {e}")
@@ -608,6 +1385,10 @@ class CloudStorageManager:
             self.logger.error(f"File too large: {len(file_data)} > {self.config.max_file_size}")
             return False
         
+        return self._validate_key(key)
+    
+    def _validate_key(self, key: str) -> bool:
+        """Validate the key's extension against allowed_extensions"""
         # Check file extension
         if self.config.allowed_extensions:
             file_ext = Path(key).suffix.lower().lstrip('.')
@@ -617,20 +1398,31 @@ class CloudStorageManager:
         
         return True
     
-    def _should_compress(self, key: str) -> bool:
+    def _should_compress(self, key: str, data: Optional[bytes] = None) -> bool:
         """Check if file should be compressed"""
-        compressible_types = {'.txt', '.json', '.csv', '.log', '.sql', '.xml', '.html', '.css', '.js'}
-        return Path(key).suffix.lower() in compressible_types
-    
-    async def _compress_data(self, data: bytes) -> bytes:
-        """Compress data using gzip"""
-        import gzip
-        return gzip.compress(data)
+        # Without data (streamed sources) only the extension is known; the first chunk is sniffed later
+        compressible_type = Path(key).suffix.lower() in _COMPRESSIBLE_EXTENSIONS
+        if data is None:
+            return compressible_type
+        
+        if len(data) < _MIN_COMPRESS_SIZE or _is_precompressed(data):
+            return False
+        if compressible_type:
+            return True
+        
+        # Other types only when a fast probe of the head shrinks by at least 10%
+        probe = data[:_COMPRESSION_PROBE_SIZE]
+        return len(zlib.compress(probe, 1)) < 0.9 * len(probe)
     
-    async def _decompress_data(self, data: bytes) -> bytes:
-        """Decompress gzipped data"""
-        import gzip
-        return gzip.decompress(data)
+    def _resolve_compression(self) -> Optional[str]:
+        """Pick the upload codec from the config, falling back to gzip when a codec is missing"""
+        algorithm = self.config.compression
+        if not self.config.enable_compression or algorithm == "none":
+            return None
+        if (algorithm == "zstd" and not ZSTD_AVAILABLE) or (algorithm == "lz4" and not LZ4_AVAILABLE):
+            self.logger.warning(f"{algorithm} compression not available, using gzip")
+            return "gzip"
+        return algorithm
 
 # Storage factory function
 def create_storage_manager(config: Optional[StorageConfig] = None) -> CloudStorageManager:
@@ -655,7 +1447,10 @@ def create_storage_manager(config: Optional[StorageConfig] = None) -> CloudStora
             gcp_project_id=os.getenv("GCP_PROJECT_ID", ""),
             azure_connection_string=os.getenv("AZURE_STORAGE_CONNECTION_STRING", ""),
             azure_container=os.getenv("AZURE_STORAGE_CONTAINER", ""),
-            local_storage_path=os.getenv("LOCAL_STORAGE_PATH", "storage")
+            local_storage_path=os.getenv("LOCAL_STORAGE_PATH", "storage"),
+            conn_pool_size=int(os.getenv("STORAGE_CONN_POOL_SIZE", "32")),
+            dns_cache_ttl=int(os.getenv("STORAGE_DNS_CACHE_TTL", "300")),
+            max_retries=int(os.getenv("STORAGE_MAX_RETRIES", "5"))
         )
     
     return CloudStorageManager(config)
@@ -7,25 +7,232 @@ data migrations, and connection management.
 
 import os
 import json
+import time
+import atexit
 import asyncio
-from typing import Dict, List, Any, Optional, Union
-from datetime import datetime, date
+import itertools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import IO, Awaitable, Callable, Dict, List, Any, Optional, Tuple, Union
+from datetime import datetime, date, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import logging
 
+logger = logging.getLogger(__name__)
+
 # Database dependencies
 try:
     import asyncpg
     import psycopg2
     from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, Float, Boolean, JSON
     from sqlalchemy.ext.declarative import declarative_base
-    from sqlalchemy.orm import sessionmaker, Session
-    from sqlalchemy.sql import text
+    from sqlalchemy.orm import Session
+    from sqlalchemy.sql import text, select, bindparam, cast, func
+    from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
     POSTGRES_AVAILABLE = True
 except ImportError:
     POSTGRES_AVAILABLE = False
-    logging.warning("PostgreSQL dependencies not available. Using JSON fallback.")
+    logger.warning("PostgreSQL dependencies not available. Using JSON fallback.")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not available. Using standard json for database serialization.")
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# JSON decoding for stored records (accepts str or bytes)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode a JSON value to UTF-8 bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+def _json_serialize(obj: Any) -> str:
+    """JSONB bind serializer for the SQLAlchemy engine"""
+    return _json_dumps(obj).decode()
+
+# fdatasync skips the metadata flush where the platform supports it
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+# Rows per executemany/COPY batch during JSON -> PostgreSQL migration
+MIGRATION_BATCH_SIZE = 5000
+
+# Concurrent JSON file reads while loading a migration batch
+MIGRATION_READ_CONCURRENCY = 16
+
+if POSTGRES_AVAILABLE:
+    # Table definitions mirror the DDL in DatabaseManager._create_tables
+    metadata = MetaData()
+    
+    users_table = Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String(255), unique=True, nullable=False),
+        Column("username", String(255), nullable=False),
+        Column("email", String(255)),
+        Column("profile_data", JSONB),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime)
+    )
+    
+    workouts_table = Table(
+        "workouts", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String(255), nullable=False),
+        Column("workout_id", String(255), unique=True, nullable=False),
+        Column("workout_type", String(100)),
+        Column("exercises", JSONB),
+        Column("metrics", JSONB),
+        Column("duration", Integer),
+        Column("started_at", DateTime),
+        Column("completed_at", DateTime),
+        Column("created_at", DateTime)
+    )
+    
+    plugin_licenses_table = Table(
+        "plugin_licenses", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String(255), nullable=False),
+        Column("plugin_id", String(255), nullable=False),
+        Column("license_key", String(255), nullable=False),
+        Column("activation_date", DateTime),
+        Column("expiry_date", DateTime),
+        Column("trial_used", Boolean),
+        Column("created_at", DateTime)
+    )
+    
+    user_analytics_table = Table(
+        "user_analytics", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", String(255), nullable=False),
+        Column("event_type", String(100), nullable=False),
+        Column("event_data", JSONB),
+        Column("plugin_id", String(255)),
+        Column("session_id", String(255)),
+        Column("timestamp", DateTime)
+    )
+    
+    # Statements are built once and reused; SQLAlchemy caches their compiled form
+    INSERT_USER = pg_insert(users_table)
+    INSERT_WORKOUT = pg_insert(workouts_table)
+    
+    # Saving an existing user or workout updates it in place, like the JSON fallback
+    UPSERT_USER = INSERT_USER.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "username": INSERT_USER.excluded.username,
+            "email": INSERT_USER.excluded.email,
+            "profile_data": INSERT_USER.excluded.profile_data,
+            "updated_at": func.now()
+        }
+    )
+    
+    UPSERT_WORKOUT = INSERT_WORKOUT.on_conflict_do_update(
+        index_elements=["workout_id"],
+        set_={
+            "user_id": INSERT_WORKOUT.excluded.user_id,
+            "workout_type": INSERT_WORKOUT.excluded.workout_type,
+            "exercises": INSERT_WORKOUT.excluded.exercises,
+            "metrics": INSERT_WORKOUT.excluded.metrics,
+            "duration": INSERT_WORKOUT.excluded.duration,
+            "started_at": INSERT_WORKOUT.excluded.started_at,
+            "completed_at": INSERT_WORKOUT.excluded.completed_at
+        }
+    )
+    INSERT_ANALYTICS = pg_insert(user_analytics_table)
+    
+    # Variant for callers that already hold event_data as JSON text; the
+    # server casts it, so it is not decoded and re-encoded client-side
+    INSERT_ANALYTICS_JSON_TEXT = pg_insert(user_analytics_table).values(
+        user_id=bindparam("user_id"),
+        event_type=bindparam("event_type"),
+        event_data=cast(bindparam("event_data", type_=Text), JSONB),
+        plugin_id=bindparam("plugin_id"),
+        session_id=bindparam("session_id"),
+        timestamp=bindparam("timestamp")
+    )
+    
+    _license_insert = pg_insert(plugin_licenses_table)
+    UPSERT_LICENSE = _license_insert.on_conflict_do_update(
+        index_elements=["user_id", "plugin_id"],
+        set_={
+            "license_key": _license_insert.excluded.license_key,
+            "activation_date": _license_insert.excluded.activation_date,
+            "expiry_date": _license_insert.excluded.expiry_date,
+            "trial_used": _license_insert.excluded.trial_used
+        }
+    )
+    
+    SELECT_USER = select(
+        users_table.c.user_id, users_table.c.username, users_table.c.email,
+        users_table.c.profile_data, users_table.c.created_at, users_table.c.updated_at
+    ).where(users_table.c.user_id == bindparam("user_id"))
+    
+    SELECT_USER_WORKOUTS = select(
+        workouts_table.c.workout_id, workouts_table.c.workout_type, workouts_table.c.exercises,
+        workouts_table.c.metrics, workouts_table.c.duration, workouts_table.c.started_at,
+        workouts_table.c.completed_at, workouts_table.c.created_at
+    ).where(
+        workouts_table.c.user_id == bindparam("user_id")
+    ).order_by(workouts_table.c.created_at.desc()).limit(bindparam("limit"))
+
+def _read_json_file(path: str) -> Any:
+    """Read and decode one JSON document"""
+    with open(path, 'rb') as f:
+        return _json_loads(f.read())
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Coerce an ISO timestamp string from the JSON store to a datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def _user_params(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Bind parameters for INSERT_USER"""
+    return {
+        "user_id": user_data["user_id"],
+        "username": user_data["username"],
+        "email": user_data.get("email"),
+        "profile_data": user_data.get("profile", {})
+    }
+
+def _workout_params(workout_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Bind parameters for INSERT_WORKOUT"""
+    return {
+        "user_id": workout_data["user_id"],
+        "workout_id": workout_data["workout_id"],
+        "workout_type": workout_data.get("workout_type"),
+        "exercises": workout_data.get("exercises", []),
+        "metrics": workout_data.get("metrics", {}),
+        "duration": workout_data.get("duration"),
+        "started_at": _parse_timestamp(workout_data.get("started_at")),
+        "completed_at": _parse_timestamp(workout_data.get("completed_at"))
+    }
+
+def _analytics_params(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Bind parameters for INSERT_ANALYTICS"""
+    # Bulk-logged NDJSON lines carry the collector's payload under "properties"
+    payload = event_data.get("event_data")
+    if payload is None:
+        payload = event_data.get("properties", {})
+    return {
+        "user_id": event_data["user_id"],
+        "event_type": event_data["event_type"],
+        "event_data": payload,
+        "plugin_id": event_data.get("plugin_id"),
+        "session_id": event_data.get("session_id"),
+        "timestamp": _parse_timestamp(event_data.get("timestamp")) or datetime.now()
+    }
 
 class DatabaseType(Enum):
     """Supported database types"""
@@ -42,9 +249,16 @@ class DatabaseConfig:
     database: str = "fitness_coach"
     username: str = "fitness_user"
     password: str = ""
-    pool_size: int = 10
-    max_overflow: int = 20
+    pool_size: int = 20
+    max_overflow: int = 40
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
     json_data_dir: str = "data"
+    analytics_flush_events: int = 500
+    analytics_flush_interval: float = 5.0
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60.0
+    license_flush_delay: float = 5.0
 
 class DatabaseManager:
     """Production database management system"""
@@ -60,6 +274,35 @@ class DatabaseManager:
         self.json_data_dir = config.json_data_dir
         os.makedirs(self.json_data_dir, exist_ok=True)
         
+        # Fixed locations inside the data directory, joined once
+        self._users_dir = os.path.join(self.json_data_dir, "users")
+        self._workouts_dir = os.path.join(self.json_data_dir, "workouts")
+        self._workout_index_dir = os.path.join(self._workouts_dir, "_by_user")
+        self._plugins_dir = os.path.join(self.json_data_dir, "plugins")
+        self._license_file = os.path.join(self._plugins_dir, "licenses.json")
+        self._analytics_dir = os.path.join(self.json_data_dir, "analytics")
+        
+        # Buffered NDJSON analytics log, flushed on size/age and at exit;
+        # the day's file handle stays open until midnight rollover
+        self._analytics_buffer: List[bytes] = []
+        self._analytics_fh: Optional[IO[bytes]] = None
+        self._analytics_day: Optional[str] = None
+        self._analytics_day_end = datetime.min
+        self._last_flush_ts = time.monotonic()
+        atexit.register(self._flush_analytics)
+        
+        # LRU cache of user records: user_id -> (expires_at, user)
+        self._user_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        # Reads in progress, keyed by query; concurrent callers share one lookup
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        
+        # In-memory license map for the JSON fallback, written back on a debounce
+        self._licenses: Optional[Dict[str, Dict[str, Any]]] = None
+        self._licenses_dirty = False
+        self._license_flush_handle: Optional[asyncio.TimerHandle] = None
+        atexit.register(self._flush_licenses)
+        
     async def initialize(self) -> bool:
         """Initialize database connection and create tables"""
         try:
@@ -68,7 +311,7 @@ class DatabaseManager:
             else:
                 return self._initialize_json_fallback()
         except Exception as e:
-            logging.error(f"Database initialization failed: {e}")
+            logger.error("Database initialization failed: %s", e)
             return False
     
     async def _initialize_postgresql(self) -> bool:
@@ -81,45 +324,50 @@ class DatabaseManager:
             )
             
             # Create async engine
-            from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
             
             self.engine = create_async_engine(
                 connection_string,
                 pool_size=self.config.pool_size,
                 max_overflow=self.config.max_overflow,
+                pool_timeout=self.config.pool_timeout,
+                pool_recycle=self.config.pool_recycle,
+                pool_pre_ping=True,
+                json_serializer=_json_serialize,
+                json_deserializer=_json_loads,
                 echo=False
             )
             
             # Create async session factory
-            self.session_factory = sessionmaker(
-                bind=self.engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
+            self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False, autoflush=False)
             
             # Create tables
             await self._create_tables()
             
-            logging.info("✅ PostgreSQL database initialized successfully")
+            logger.info("✅ PostgreSQL database initialized successfully")
             return True
             
         except Exception as e:
-            logging.error(f"PostgreSQL initialization failed: {e}")
+            logger.error("PostgreSQL initialization failed: %s", e)
             return self._initialize_json_fallback()
     
     def _initialize_json_fallback(self) -> bool:
         """Initialize JSON file fallback"""
         try:
             # Create data directories
-            os.makedirs(os.path.join(self.json_data_dir, "users"), exist_ok=True)
-            os.makedirs(os.path.join(self.json_data_dir, "workouts"), exist_ok=True)
-            os.makedirs(os.path.join(self.json_data_dir, "plugins"), exist_ok=True)
-            os.makedirs(os.path.join(self.json_data_dir, "analytics"), exist_ok=True)
+            os.makedirs(self._users_dir, exist_ok=True)
+            os.makedirs(self._workouts_dir, exist_ok=True)
+            os.makedirs(self._plugins_dir, exist_ok=True)
+            os.makedirs(self._analytics_dir, exist_ok=True)
             
-            logging.info("✅ JSON file database initialized successfully")
+            # Workout files written before the per-user index existed
+            if not os.path.isdir(self._workout_index_dir):
+                self.rebuild_workout_index()
+            
+            logger.info("✅ JSON file database initialized successfully")
             return True
         except Exception as e:
-            logging.error(f"JSON fallback initialization failed: {e}")
+            logger.error("JSON fallback initialization failed: %s", e)
             return False
     
     async def _create_tables(self):
@@ -183,6 +431,18 @@ class DatabaseManager:
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """))
+            
+            # Indexes for the lookups the manager issues; IF NOT EXISTS also
+            # covers tables created before these were added
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_workouts_user_created ON workouts (user_id, created_at DESC)"
+            ))
+            await conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_licenses_user_plugin ON plugin_licenses (user_id, plugin_id)"
+            ))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_analytics_user_ts ON user_analytics (user_id, timestamp DESC)"
+            ))
     
     async def get_session(self):
         """Get database session"""
@@ -190,62 +450,92 @@ class DatabaseManager:
             return self.session_factory()
         return None
     
+    @asynccontextmanager
+    async def session_scope(self):
+        """Session that commits on success and rolls back on error"""
+        async with self.session_factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+    
+    async def _single_flight(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch once per key; concurrent callers with the same key await its result"""
+        task = self._inflight.get(key)
+        if task is None:
+            # A separate task so cancelling any one caller leaves the shared lookup running
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+    
     # User Management
     async def create_user(self, user_data: Dict[str, Any]) -> bool:
         """Create a new user"""
+        self._user_cache.pop(user_data["user_id"], None)
         if self.config.db_type == DatabaseType.POSTGRESQL and self.session_factory:
             return await self._create_user_postgres(user_data)
         else:
-            return self._create_user_json(user_data)
+            return await asyncio.to_thread(self._create_user_json, user_data)
     
     async def _create_user_postgres(self, user_data: Dict[str, Any]) -> bool:
         """Create user in PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                await session.execute(text("""
-                    INSERT INTO users (user_id, username, email, profile_data)
-                    VALUES (:user_id, :username, :email, :profile_data)
-                """), {
-                    "user_id": user_data["user_id"],
-                    "username": user_data["username"],
-                    "email": user_data.get("email"),
-                    "profile_data": json.dumps(user_data.get("profile", {}))
-                })
-                await session.commit()
+            async with self.session_scope() as session:
+                await session.execute(UPSERT_USER, _user_params(user_data))
             return True
         except Exception as e:
-            logging.error(f"Failed to create user in PostgreSQL: {e}")
+            logger.error("Failed to create user in PostgreSQL: %s", e)
             return False
     
     def _create_user_json(self, user_data: Dict[str, Any]) -> bool:
         """Create user in JSON file"""
         try:
-            user_file = os.path.join(self.json_data_dir, "users", f"{user_data['user_id']}.json")
+            user_file = f"{self._users_dir}/{user_data['user_id']}.json"
             user_data["created_at"] = datetime.now().isoformat()
             user_data["updated_at"] = datetime.now().isoformat()
             
-            with open(user_file, 'w') as f:
-                json.dump(user_data, f, indent=2)
+            with open(user_file, 'wb') as f:
+                f.write(_json_dumps(user_data, indent=True))
             return True
         except Exception as e:
-            logging.error(f"Failed to create user in JSON: {e}")
+            logger.error("Failed to create user in JSON: %s", e)
             return False
     
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
+        cached = self._user_cache.get(user_id)
+        if cached is not None:
+            expires_at, user = cached
+            if expires_at > time.monotonic():
+                self._user_cache.move_to_end(user_id)
+                return dict(user)
+            del self._user_cache[user_id]
+        
+        user = await self._single_flight(("user", user_id), lambda: self._load_user(user_id))
+        return dict(user) if user is not None else None
+    
+    async def _load_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a user from the backing store and cache it"""
         if self.config.db_type == DatabaseType.POSTGRESQL and self.session_factory:
-            return await self._get_user_postgres(user_id)
+            user = await self._get_user_postgres(user_id)
         else:
-            return self._get_user_json(user_id)
+            user = await asyncio.to_thread(self._get_user_json, user_id)
+        
+        # Misses are not cached so users created elsewhere show up immediately
+        if user is not None:
+            self._user_cache[user_id] = (time.monotonic() + self.config.user_cache_ttl, user)
+            if len(self._user_cache) > self.config.user_cache_size:
+                self._user_cache.popitem(last=False)
+        return user
     
     async def _get_user_postgres(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user from PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                result = await session.execute(text("""
-                    SELECT user_id, username, email, profile_data, created_at, updated_at
-                    FROM users WHERE user_id = :user_id
-                """), {"user_id": user_id})
+            async with self.session_scope() as session:
+                result = await session.execute(SELECT_USER, {"user_id": user_id})
                 
                 row = result.fetchone()
                 if row:
@@ -253,23 +543,23 @@ class DatabaseManager:
                         "user_id": row[0],
                         "username": row[1],
                         "email": row[2],
-                        "profile": json.loads(row[3] or "{}"),
+                        "profile": row[3] or {},
                         "created_at": row[4].isoformat() if row[4] else None,
                         "updated_at": row[5].isoformat() if row[5] else None
                     }
         except Exception as e:
-            logging.error(f"Failed to get user from PostgreSQL: {e}")
+            logger.error("Failed to get user from PostgreSQL: %s", e)
         return None
     
     def _get_user_json(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user from JSON file"""
         try:
-            user_file = os.path.join(self.json_data_dir, "users", f"{user_id}.json")
-            if os.path.exists(user_file):
-                with open(user_file, 'r') as f:
-                    return json.load(f)
+            with open(f"{self._users_dir}/{user_id}.json", 'rb') as f:
+                return _json_loads(f.read())
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logging.error(f"Failed to get user from JSON: {e}")
+            logger.error("Failed to get user from JSON: %s", e)
         return None
     
     # Workout Management
@@ -278,68 +568,64 @@ class DatabaseManager:
         if self.config.db_type == DatabaseType.POSTGRESQL and self.session_factory:
             return await self._save_workout_postgres(workout_data)
         else:
-            return self._save_workout_json(workout_data)
+            return await asyncio.to_thread(self._save_workout_json, workout_data)
     
     async def _save_workout_postgres(self, workout_data: Dict[str, Any]) -> bool:
         """Save workout to PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                await session.execute(text("""
-                    INSERT INTO workouts (user_id, workout_id, workout_type, exercises, metrics, duration, started_at, completed_at)
-                    VALUES (:user_id, :workout_id, :workout_type, :exercises, :metrics, :duration, :started_at, :completed_at)
-                """), {
-                    "user_id": workout_data["user_id"],
-                    "workout_id": workout_data["workout_id"],
-                    "workout_type": workout_data.get("workout_type"),
-                    "exercises": json.dumps(workout_data.get("exercises", [])),
-                    "metrics": json.dumps(workout_data.get("metrics", {})),
-                    "duration": workout_data.get("duration"),
-                    "started_at": workout_data.get("started_at"),
-                    "completed_at": workout_data.get("completed_at")
-                })
-                await session.commit()
+            async with self.session_scope() as session:
+                await session.execute(UPSERT_WORKOUT, _workout_params(workout_data))
             return True
         except Exception as e:
-            logging.error(f"Failed to save workout to PostgreSQL: {e}")
+            logger.error("Failed to save workout to PostgreSQL: %s", e)
             return False
     
     def _save_workout_json(self, workout_data: Dict[str, Any]) -> bool:
         """Save workout to JSON file"""
         try:
-            workout_file = os.path.join(self.json_data_dir, "workouts", f"{workout_data['workout_id']}.json")
+            workout_file = f"{self._workouts_dir}/{workout_data['workout_id']}.json"
             workout_data["created_at"] = datetime.now().isoformat()
             
-            with open(workout_file, 'w') as f:
-                json.dump(workout_data, f, indent=2)
+            with open(workout_file, 'wb') as f:
+                f.write(_json_dumps(workout_data, indent=True))
+            
+            with open(self._workout_index_file(workout_data["user_id"]), 'ab') as f:
+                f.write(_json_dumps({
+                    "workout_id": workout_data["workout_id"],
+                    "created_at": workout_data["created_at"]
+                }) + b"\n")
             return True
         except Exception as e:
-            logging.error(f"Failed to save workout to JSON: {e}")
+            logger.error("Failed to save workout to JSON: %s", e)
             return False
     
     async def get_user_workouts(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get user workouts"""
+        workouts = await self._single_flight(
+            ("workouts", user_id, limit), lambda: self._load_user_workouts(user_id, limit)
+        )
+        return list(workouts)
+    
+    async def _load_user_workouts(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Fetch user workouts from the backing store"""
         if self.config.db_type == DatabaseType.POSTGRESQL and self.session_factory:
             return await self._get_user_workouts_postgres(user_id, limit)
         else:
-            return self._get_user_workouts_json(user_id, limit)
+            return await asyncio.to_thread(self._get_user_workouts_json, user_id, limit)
     
     async def _get_user_workouts_postgres(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
         """Get user workouts from PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                result = await session.execute(text("""
-                    SELECT workout_id, workout_type, exercises, metrics, duration, started_at, completed_at, created_at
-                    FROM workouts WHERE user_id = :user_id
-                    ORDER BY created_at DESC LIMIT :limit
-                """), {"user_id": user_id, "limit": limit})
+            async with self.session_scope() as session:
+                result = await session.execute(SELECT_USER_WORKOUTS, {"user_id": user_id, "limit": limit})
                 
                 workouts = []
                 for row in result.fetchall():
                     workouts.append({
                         "workout_id": row[0],
                         "workout_type": row[1],
-                        "exercises": json.loads(row[2] or "[]"),
-                        "metrics": json.loads(row[3] or "{}"),
+                        "exercises": row[2] or [],
+                        "metrics": row[3] or {},
                         "duration": row[4],
                         "started_at": row[5].isoformat() if row[5] else None,
                         "completed_at": row[6].isoformat() if row[6] else None,
@@ -347,29 +633,78 @@ class DatabaseManager:
                     })
                 return workouts
         except Exception as e:
-            logging.error(f"Failed to get workouts from PostgreSQL: {e}")
+            logger.error("Failed to get workouts from PostgreSQL: %s", e)
         return []
     
     def _get_user_workouts_json(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
         """Get user workouts from JSON files"""
         try:
-            workouts = []
-            workout_dir = os.path.join(self.json_data_dir, "workouts")
+            # Later lines win when a workout was saved more than once
+            entries = {}
+            try:
+                f = open(self._workout_index_file(user_id), 'rb')
+            except FileNotFoundError:
+                return []
+            with f:
+                for line in f:
+                    if line.strip():
+                        entry = _json_loads(line)
+                        entries[entry["workout_id"]] = entry.get("created_at") or ""
             
-            for filename in os.listdir(workout_dir):
-                if filename.endswith('.json'):
-                    with open(os.path.join(workout_dir, filename), 'r') as f:
-                        workout = json.load(f)
-                        if workout.get("user_id") == user_id:
-                            workouts.append(workout)
+            # Sort by created_at and load only the files within the limit
+            newest = sorted(entries.items(), key=lambda item: item[1], reverse=True)[:limit]
             
-            # Sort by created_at and limit
-            workouts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-            return workouts[:limit]
+            workouts = []
+            for workout_id, _ in newest:
+                try:
+                    with open(f"{self._workouts_dir}/{workout_id}.json", 'rb') as f:
+                        workouts.append(_json_loads(f.read()))
+                except FileNotFoundError:
+                    continue
+            return workouts
         except Exception as e:
-            logging.error(f"Failed to get workouts from JSON: {e}")
+            logger.error("Failed to get workouts from JSON: %s", e)
         return []
     
+    def _workout_index_file(self, user_id: str) -> str:
+        """NDJSON index of a user's workout ids and creation times"""
+        return f"{self._workout_index_dir}/{user_id}.ndjson"
+    
+    def rebuild_workout_index(self) -> int:
+        """Rebuild the per-user workout indexes from the workout files"""
+        workout_dir = self._workouts_dir
+        index_dir = self._workout_index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        
+        by_user: Dict[str, List[bytes]] = {}
+        count = 0
+        with os.scandir(workout_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                try:
+                    with open(entry.path, 'rb') as f:
+                        workout = _json_loads(f.read())
+                    by_user.setdefault(workout["user_id"], []).append(_json_dumps({
+                        "workout_id": workout["workout_id"],
+                        "created_at": workout.get("created_at", "")
+                    }) + b"\n")
+                    count += 1
+                except Exception as e:
+                    logger.warning("Skipping workout file %s during index rebuild: %s", entry.name, e)
+        
+        with os.scandir(index_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.ndjson'):
+                    os.remove(entry.path)
+        
+        for user_id, lines in by_user.items():
+            with open(self._workout_index_file(user_id), 'wb') as f:
+                f.write(b"".join(lines))
+        
+        logger.info("✅ Rebuilt workout index for %s users (%s workouts)", len(by_user), count)
+        return count
+    
     # Plugin License Management
     async def save_plugin_license(self, license_data: Dict[str, Any]) -> bool:
         """Save plugin license"""
@@ -381,31 +716,17 @@ class DatabaseManager:
     async def _save_license_postgres(self, license_data: Dict[str, Any]) -> bool:
         """Save license to PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                await session.execute(text("""
-                    INSERT INTO plugin_licenses (user_id, plugin_id, license_key, activation_date, expiry_date, trial_used)
-                    VALUES (:user_id, :plugin_id, :license_key, :activation_date, :expiry_date, :trial_used)
-                    ON CONFLICT (user_id, plugin_id) DO UPDATE SET
-                        license_key = EXCLUDED.license_key,
-                        activation_date = EXCLUDED.activation_date,
-                        expiry_date = EXCLUDED.expiry_date,
-                        trial_used = EXCLUDED.trial_used
-                """), license_data)
-                await session.commit()
+            async with self.session_scope() as session:
+                await session.execute(UPSERT_LICENSE, license_data)
             return True
         except Exception as e:
-            logging.error(f"Failed to save license to PostgreSQL: {e}")
+            logger.error("Failed to save license to PostgreSQL: %s", e)
             return False
     
     def _save_license_json(self, license_data: Dict[str, Any]) -> bool:
-        """Save license to JSON file"""
+        """Save license to the in-memory map and schedule a JSON file write"""
         try:
-            license_file = os.path.join(self.json_data_dir, "plugins", "licenses.json")
-            
-            licenses = {}
-            if os.path.exists(license_file):
-                with open(license_file, 'r') as f:
-                    licenses = json.load(f)
+            licenses = self._load_licenses_json()
             
             user_id = license_data["user_id"]
             plugin_id = license_data["plugin_id"]
@@ -415,13 +736,53 @@ class DatabaseManager:
             
             licenses[user_id][plugin_id] = license_data
             
-            with open(license_file, 'w') as f:
-                json.dump(licenses, f, indent=2)
+            self._licenses_dirty = True
+            self._schedule_license_flush()
             return True
         except Exception as e:
-            logging.error(f"Failed to save license to JSON: {e}")
+            logger.error("Failed to save license to JSON: %s", e)
             return False
     
+    def _load_licenses_json(self) -> Dict[str, Dict[str, Any]]:
+        """License map, read from disk on first use"""
+        if self._licenses is None:
+            try:
+                with open(self._license_file, 'rb') as f:
+                    self._licenses = _json_loads(f.read())
+            except FileNotFoundError:
+                self._licenses = {}
+        return self._licenses
+    
+    def _schedule_license_flush(self):
+        """Coalesce license writes into one file write per flush delay"""
+        if self._license_flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_licenses()
+            return
+        self._license_flush_handle = loop.call_later(self.config.license_flush_delay, self._flush_licenses)
+    
+    def _flush_licenses(self):
+        """Atomically replace the JSON license file with the in-memory map"""
+        if self._license_flush_handle is not None:
+            self._license_flush_handle.cancel()
+            self._license_flush_handle = None
+        if not self._licenses_dirty:
+            return
+        try:
+            license_file = self._license_file
+            tmp_file = license_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps(self._licenses, indent=True))
+                f.flush()
+                _fdatasync(f.fileno())
+            os.replace(tmp_file, license_file)
+            self._licenses_dirty = False
+        except Exception as e:
+            logger.error("Failed to flush licenses to JSON: %s", e)
+    
     # Analytics
     async def log_analytics_event(self, event_data: Dict[str, Any]) -> bool:
         """Log analytics event"""
@@ -433,45 +794,137 @@ class DatabaseManager:
     async def _log_analytics_postgres(self, event_data: Dict[str, Any]) -> bool:
         """Log analytics to PostgreSQL"""
         try:
-            async with self.session_factory() as session:
-                await session.execute(text("""
-                    INSERT INTO user_analytics (user_id, event_type, event_data, plugin_id, session_id)
-                    VALUES (:user_id, :event_type, :event_data, :plugin_id, :session_id)
-                """), {
-                    "user_id": event_data["user_id"],
-                    "event_type": event_data["event_type"],
-                    "event_data": json.dumps(event_data.get("event_data", {})),
-                    "plugin_id": event_data.get("plugin_id"),
-                    "session_id": event_data.get("session_id")
+            async with self.session_scope() as session:
+                await session.execute(INSERT_ANALYTICS, _analytics_params(event_data))
+            return True
+        except Exception as e:
+            logger.error("Failed to log analytics to PostgreSQL: %s", e)
+            return False
+    
+    async def log_analytics_events_bulk(self, rows: List[Tuple]) -> bool:
+        """Log a batch of analytics events in a single write"""
+        # rows: (event_id, user_id, session_id, event_type, timestamp, properties_json, device_info_json)
+        if not rows:
+            return True
+        if self.config.db_type == DatabaseType.POSTGRESQL and self.session_factory:
+            return await self._log_analytics_bulk_postgres(rows)
+        else:
+            return self._log_analytics_bulk_json(rows)
+    
+    async def _log_analytics_bulk_postgres(self, rows: List[Tuple]) -> bool:
+        """Log analytics batch to PostgreSQL with one executemany transaction"""
+        try:
+            now = datetime.now()
+            params = [{
+                "user_id": user_id,
+                "event_type": event_type,
+                "event_data": properties_json,
+                "plugin_id": None,
+                "session_id": session_id,
+                "timestamp": _parse_timestamp(timestamp) or now
+            } for _, user_id, session_id, event_type, timestamp, properties_json, _ in rows]
+            async with self.session_scope() as session:
+                await session.execute(INSERT_ANALYTICS_JSON_TEXT, params)
+            return True
+        except Exception as e:
+            logger.error("Failed to bulk log analytics to PostgreSQL: %s", e)
+            return False
+    
+    def _log_analytics_bulk_json(self, rows: List[Tuple]) -> bool:
+        """Log analytics batch to the daily NDJSON file with one append"""
+        try:
+            now = datetime.now()
+            if now >= self._analytics_day_end:
+                self._rotate_analytics(now)
+            self._flush_analytics()
+            
+            logged_at = now.isoformat()
+            lines = []
+            for event_id, user_id, session_id, event_type, timestamp, properties_json, device_info_json in rows:
+                # The payloads arrive as encoded JSON and are spliced in without a decode/encode round trip
+                if isinstance(properties_json, str):
+                    properties_json = properties_json.encode()
+                if isinstance(device_info_json, str):
+                    device_info_json = device_info_json.encode()
+                head = _json_dumps({
+                    "event_id": event_id,
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "event_type": event_type,
+                    "timestamp": timestamp or logged_at
                 })
-                await session.commit()
+                lines.append(b"".join((
+                    head[:-1], b',"properties":', properties_json, b',"device_info":', device_info_json, b"}\n"
+                )))
+            
+            self._write_analytics(b"".join(lines))
             return True
         except Exception as e:
-            logging.error(f"Failed to log analytics to PostgreSQL: {e}")
+            logger.error("Failed to bulk log analytics to JSON: %s", e)
             return False
     
     def _log_analytics_json(self, event_data: Dict[str, Any]) -> bool:
-        """Log analytics to JSON file"""
+        """Buffer analytics event for the daily NDJSON file"""
         try:
-            analytics_file = os.path.join(self.json_data_dir, "analytics", f"{datetime.now().strftime('%Y-%m-%d')}.json")
-            
-            events = []
-            if os.path.exists(analytics_file):
-                with open(analytics_file, 'r') as f:
-                    events = json.load(f)
+            now = datetime.now()
+            if now >= self._analytics_day_end:
+                self._rotate_analytics(now)
             
-            event_data["timestamp"] = datetime.now().isoformat()
-            events.append(event_data)
+            event_data["timestamp"] = now.isoformat()
+            self._analytics_buffer.append(_json_dumps(event_data) + b"\n")
             
-            with open(analytics_file, 'w') as f:
-                json.dump(events, f, indent=2)
+            if (len(self._analytics_buffer) >= self.config.analytics_flush_events
+                    or time.monotonic() - self._last_flush_ts >= self.config.analytics_flush_interval):
+                self._flush_analytics()
             return True
         except Exception as e:
-            logging.error(f"Failed to log analytics to JSON: {e}")
+            logger.error("Failed to log analytics to JSON: %s", e)
             return False
     
+    def _analytics_file(self, day: str) -> str:
+        """Path of the NDJSON analytics file for a day"""
+        return f"{self._analytics_dir}/{day}.ndjson"
+    
+    def _flush_analytics(self):
+        """Append buffered analytics events to the daily NDJSON file"""
+        self._last_flush_ts = time.monotonic()
+        if not self._analytics_buffer:
+            return
+        
+        lines, self._analytics_buffer = self._analytics_buffer, []
+        try:
+            self._write_analytics(b"".join(lines))
+        except Exception as e:
+            logger.error("Failed to flush analytics to JSON: %s", e)
+    
+    def _write_analytics(self, data: bytes):
+        """Append NDJSON lines through the open handle for the current day"""
+        if self._analytics_fh is None:
+            self._analytics_fh = open(self._analytics_file(self._analytics_day), 'ab', buffering=1 << 16)
+        self._analytics_fh.write(data)
+        self._analytics_fh.flush()
+    
+    def _rotate_analytics(self, now: datetime):
+        """Finish the previous day's file and switch to the day containing now"""
+        self._flush_analytics()
+        self._close_analytics_file()
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._analytics_day = day_start.strftime('%Y-%m-%d')
+        self._analytics_day_end = day_start + timedelta(days=1)
+    
+    def _close_analytics_file(self):
+        """Close the cached analytics file handle"""
+        if self._analytics_fh is not None:
+            self._analytics_fh.close()
+            self._analytics_fh = None
+    
     async def close(self):
         """Close database connections"""
+        self._flush_analytics()
+        self._close_analytics_file()
+        self._flush_licenses()
+        atexit.unregister(self._flush_analytics)
+        atexit.unregister(self._flush_licenses)
         if self.engine:
             await self.engine.dispose()
 
@@ -484,91 +937,181 @@ class DatabaseMigrator:
     
     async def migrate_json_to_postgres(self) -> bool:
         """Migrate data from JSON files to PostgreSQL"""
-        if not POSTGRES_AVAILABLE:
-            logging.error("PostgreSQL not available for migration")
+        if not POSTGRES_AVAILABLE or not self.db_manager.engine:
+            logger.error("PostgreSQL not available for migration")
             return False
         
         try:
-            logging.info("🔄 Starting JSON to PostgreSQL migration...")
-            
-            # Migrate users
-            await self._migrate_users()
+            logger.info("🔄 Starting JSON to PostgreSQL migration...")
             
-            # Migrate workouts
-            await self._migrate_workouts()
-            
-            # Migrate plugin licenses
-            await self._migrate_licenses()
-            
-            # Migrate analytics
-            await self._migrate_analytics()
+            # One transaction covers every batch; any failure rolls back the whole pass
+            async with self.db_manager.engine.begin() as conn:
+                # Migrate users
+                await self._migrate_users(conn)
+                
+                # Migrate workouts
+                await self._migrate_workouts(conn)
+                
+                # Migrate plugin licenses
+                await self._migrate_licenses(conn)
+                
+                # Migrate analytics
+                await self._migrate_analytics(conn)
             
-            logging.info("✅ Migration completed successfully!")
+            logger.info("✅ Migration completed successfully!")
             return True
             
         except Exception as e:
-            logging.error(f"Migration failed: {e}")
+            logger.error("Migration failed: %s", e, exc_info=True)
             return False
     
-    async def _migrate_users(self):
+    async def _bulk_insert(self, conn, statement, rows, chunk: int = MIGRATION_BATCH_SIZE) -> int:
+        """Insert an iterable of parameter dicts with one executemany per chunk"""
+        batch = []
+        total = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                await conn.execute(statement, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            await conn.execute(statement, batch)
+            total += len(batch)
+        return total
+    
+    async def _copy_rows(self, conn, table, rows, chunk: int = MIGRATION_BATCH_SIZE) -> int:
+        """Stream parameter dicts into a table with asyncpg COPY inside the open transaction"""
+        raw = await conn.get_raw_connection()
+        driver_conn = raw.driver_connection
+        columns = None
+        json_columns = set()
+        batch = []
+        total = 0
+        for row in rows:
+            if columns is None:
+                columns = list(row)
+                json_columns = {name for name in columns if isinstance(table.c[name].type, JSONB)}
+            # COPY bypasses SQLAlchemy's JSONB processing, so JSON values go in as text
+            batch.append(tuple(_json_serialize(row[name]) if name in json_columns else row[name] for name in columns))
+            if len(batch) >= chunk:
+                await driver_conn.copy_records_to_table(table.name, records=batch, columns=columns)
+                total += len(batch)
+                batch = []
+        if batch:
+            await driver_conn.copy_records_to_table(table.name, records=batch, columns=columns)
+            total += len(batch)
+        return total
+    
+    async def _load_json_batches(self, directory: str, chunk: int = MIGRATION_BATCH_SIZE):
+        """Yield lists of parsed .json documents, reading each batch's files concurrently"""
+        with os.scandir(directory) as entries:
+            paths = [entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+        
+        semaphore = asyncio.Semaphore(MIGRATION_READ_CONCURRENCY)
+        
+        async def load(path: str):
+            async with semaphore:
+                return await asyncio.to_thread(_read_json_file, path)
+        
+        def start(offset: int):
+            return asyncio.ensure_future(asyncio.gather(*(load(path) for path in paths[offset:offset + chunk])))
+        
+        pending = start(0) if paths else None
+        try:
+            for offset in range(0, len(paths), chunk):
+                documents = await pending
+                # Read the next batch while the caller writes this one
+                pending = start(offset + chunk) if offset + chunk < len(paths) else None
+                yield documents
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    async def _batches_in_thread(self, iterator, chunk: int = MIGRATION_BATCH_SIZE):
+        """Pull lists of up to chunk items from a blocking iterator in a worker thread"""
+        iterator = iter(iterator)
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(iterator, chunk)))
+            if not batch:
+                return
+            yield batch
+    
+    async def _migrate_users(self, conn):
         """Migrate user data"""
-        users_dir = os.path.join(self.db_manager.json_data_dir, "users")
+        users_dir = self.db_manager._users_dir
         if not os.path.exists(users_dir):
             return
         
-        for filename in os.listdir(users_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(users_dir, filename), 'r') as f:
-                    user_data = json.load(f)
-                    await self.db_manager._create_user_postgres(user_data)
+        count = 0
+        async for documents in self._load_json_batches(users_dir):
+            # Upsert rather than COPY so re-runs and pre-existing rows don't abort the pass
+            count += await self._bulk_insert(conn, UPSERT_USER, (_user_params(user_data) for user_data in documents))
         
-        logging.info("✅ User migration completed")
+        logger.info("✅ User migration completed (%s rows)", count)
     
-    async def _migrate_workouts(self):
+    async def _migrate_workouts(self, conn):
         """Migrate workout data"""
-        workouts_dir = os.path.join(self.db_manager.json_data_dir, "workouts")
+        workouts_dir = self.db_manager._workouts_dir
         if not os.path.exists(workouts_dir):
             return
         
-        for filename in os.listdir(workouts_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(workouts_dir, filename), 'r') as f:
-                    workout_data = json.load(f)
-                    await self.db_manager._save_workout_postgres(workout_data)
+        count = 0
+        async for documents in self._load_json_batches(workouts_dir):
+            count += await self._bulk_insert(conn, UPSERT_WORKOUT, (_workout_params(workout_data) for workout_data in documents))
         
-        logging.info("✅ Workout migration completed")
+        logger.info("✅ Workout migration completed (%s rows)", count)
     
-    async def _migrate_licenses(self):
+    async def _migrate_licenses(self, conn):
         """Migrate license data"""
-        license_file = os.path.join(self.db_manager.json_data_dir, "plugins", "licenses.json")
+        self.db_manager._flush_licenses()
+        license_file = self.db_manager._license_file
         if not os.path.exists(license_file):
             return
         
-        with open(license_file, 'r') as f:
-            licenses = json.load(f)
+        with open(license_file, 'rb') as f:
+            licenses = _json_loads(f.read())
         
-        for user_id, user_licenses in licenses.items():
-            for plugin_id, license_data in user_licenses.items():
-                license_data["user_id"] = user_id
-                license_data["plugin_id"] = plugin_id
-                await self.db_manager._save_license_postgres(license_data)
+        def rows():
+            for user_id, user_licenses in licenses.items():
+                for plugin_id, license_data in user_licenses.items():
+                    license_data["user_id"] = user_id
+                    license_data["plugin_id"] = plugin_id
+                    yield license_data
         
-        logging.info("✅ License migration completed")
+        count = await self._bulk_insert(conn, UPSERT_LICENSE, rows())
+        
+        logger.info("✅ License migration completed (%s rows)", count)
     
-    async def _migrate_analytics(self):
+    async def _migrate_analytics(self, conn):
         """Migrate analytics data"""
-        analytics_dir = os.path.join(self.db_manager.json_data_dir, "analytics")
+        analytics_dir = self.db_manager._analytics_dir
         if not os.path.exists(analytics_dir):
             return
         
-        for filename in os.listdir(analytics_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(analytics_dir, filename), 'r') as f:
-                    events = json.load(f)
-                    for event in events:
-                        await self.db_manager._log_analytics_postgres(event)
+        self.db_manager._flush_analytics()
+        
+        def events():
+            for filename in os.listdir(analytics_dir):
+                if filename.endswith('.ndjson'):
+                    with open(os.path.join(analytics_dir, filename), 'rb') as f:
+                        for line in f:
+                            if line.strip():
+                                yield _json_loads(line)
+                elif filename.endswith('.json'):
+                    # Daily files written before the NDJSON format; stream the
+                    # array when ijson is installed instead of loading it whole
+                    with open(os.path.join(analytics_dir, filename), 'rb') as f:
+                        if IJSON_AVAILABLE:
+                            yield from ijson.items(f, "item", use_float=True)
+                        else:
+                            yield from _json_loads(f.read())
+        
+        count = 0
+        async for batch in self._batches_in_thread(events()):
+            count += await self._copy_rows(conn, user_analytics_table, (_analytics_params(event) for event in batch))
         
-        logging.info("✅ Analytics migration completed")
+        logger.info("✅ Analytics migration completed (%s rows)", count)
 
 # Database factory
 def create_database_manager(config: Optional[DatabaseConfig] = None) -> DatabaseManager:
@@ -54,6 +54,7 @@ class PluginDistributionManager:
         self.plugins_dir = Path(plugins_dir)
         self.packages_cache = {}
         self.download_records = {}
+        self.max_concurrent_lookups = 32
         self.logger = logging.getLogger(__name__)
         
         # Initialize directories
@@ -155,51 +156,59 @@ class PluginDistributionManager:
     async def get_available_plugins(self) -> List[PluginPackage]:
         """Get list of available plugins for download"""
         try:
-            plugins = []
-            
             # List plugin packages in storage
             plugin_files = await self.storage_manager.list_files("plugins/downloads/")
             
-            for file_obj in plugin_files:
-                if file_obj.key.endswith('.zip'):
-                    # Parse plugin ID and version from filename
-                    filename = Path(file_obj.key).name
-                    if '_v' in filename:
-                        plugin_id, version_part = filename.replace('.zip', '').split('_v', 1)
-                        
-                        # Get file info with metadata
-                        file_info = await self.storage_manager.get_file_info(file_obj.key)
-                        
-                        if file_info and file_info.metadata:
-                            manifest_str = file_info.metadata.get('manifest')
-                            if manifest_str:
-                                manifest = json.loads(manifest_str)
-                                
-                                # Generate download URL
-                                download_url = await self.storage_manager.generate_presigned_url(
-                                    file_obj.key, expiration=3600
-                                )
-                                
-                                package = PluginPackage(
-                                    plugin_id=plugin_id,
-                                    version=version_part,
-                                    size=file_info.size,
-                                    checksum=file_info.metadata.get('checksum', ''),
-                                    download_url=download_url or f"/api/plugins/{plugin_id}/download/{version_part}",
-                                    manifest=manifest,
-                                    dependencies=manifest.get("dependencies", []),
-                                    created_at=file_info.metadata.get('uploaded_at', file_info.last_modified.isoformat()),
-                                    updated_at=file_info.last_modified.isoformat()
-                                )
-                                
-                                plugins.append(package)
-            
-            return plugins
+            # Fetch per-package metadata concurrently, bounded to avoid flooding the backend
+            semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
+            packages = await asyncio.gather(*(
+                self._load_package(file_obj.key, semaphore)
+                for file_obj in plugin_files
+                if file_obj.key.endswith('.zip')
+            ))
+            
+            return [package for package in packages if package is not None]
             
         except Exception as e:
             self.logger.error(f"Failed to get available plugins: {e}")
             return []
     
+    async def _load_package(self, key: str, semaphore: asyncio.Semaphore) -> Optional[PluginPackage]:
+        """Build package information for a stored plugin archive"""
+        # Parse plugin ID and version from filename
+        filename = Path(key).name
+        if '_v' not in filename:
+            return None
+        plugin_id, version_part = filename.replace('.zip', '').split('_v', 1)
+        
+        async with semaphore:
+            # Get file info with metadata
+            file_info = await self.storage_manager.get_file_info(key)
+            
+            if not file_info or not file_info.metadata:
+                return None
+            manifest_str = file_info.metadata.get('manifest')
+            if not manifest_str:
+                return None
+            manifest = json.loads(manifest_str)
+            
+            # Generate download URL
+            download_url = await self.storage_manager.generate_presigned_url(
+                key, expiration=3600
+            )
+        
+        return PluginPackage(
+            plugin_id=plugin_id,
+            version=version_part,
+            size=file_info.size,
+            checksum=file_info.metadata.get('checksum', ''),
+            download_url=download_url or f"/api/plugins/{plugin_id}/download/{version_part}",
+            manifest=manifest,
+            dependencies=manifest.get("dependencies", []),
+            created_at=file_info.metadata.get('uploaded_at', file_info.last_modified.isoformat()),
+            updated_at=file_info.last_modified.isoformat()
+        )
+    
     async def get_plugin_package(self, plugin_id: str, version: str = None) -> Optional[PluginPackage]:
         """Get specific plugin package information"""
         try:
@@ -321,9 +330,9 @@ class PluginDistributionManager:
         try:
             user_plugins = []
             
-            # List user's plugin files
+            # List user's plugin files along with their metadata
             user_plugin_prefix = f"users/{user_id}/data/plugins/"
-            plugin_files = await self.storage_manager.list_files(user_plugin_prefix)
+            plugin_files = await self.storage_manager.list_files(user_plugin_prefix, include_metadata=True)
             
             for file_obj in plugin_files:
                 if file_obj.key.endswith('.zip'):
@@ -332,13 +341,10 @@ class PluginDistributionManager:
                     if '_v' in filename:
                         plugin_id, version_part = filename.replace('.zip', '').split('_v', 1)
                         
-                        # Get file metadata
-                        file_info = await self.storage_manager.get_file_info(file_obj.key)
-                        
                         user_plugins.append({
                             "plugin_id": plugin_id,
                             "version": version_part,
-                            "download_date": file_info.metadata.get('download_date') if file_info.metadata else None,
+                            "download_date": file_obj.metadata.get('download_date'),
                             "size": file_obj.size,
                             "status": "installed"
                         })
@@ -321,8 +321,9 @@ class ABTestingDemo:
         # Show experiment summary
         print(f"\n   📋 Multi-Experiment Summary:")
         print(f"      Total Active Experiments: {len([e for e in self.framework.experiments.values() if e.status == ExperimentStatus.ACTIVE])}")
-        print(f"      Total User Assignments: {len(self.framework.user_assignments)}")
-        print(f"      Total Events Tracked: {len(self.framework.experiment_events)}")
+        total_assignments = sum(len(assignments) for assignments in self.framework.user_assignments.values())
+        print(f"      Total User Assignments: {total_assignments}")
+        print(f"      Total Events Tracked: {self.framework.event_count()}")
     
     async def _create_ui_experiment(self) -> str:
         """Create UI/UX experiment"""
@@ -974,6 +974,7 @@ async def internal_error_handler(request, exc):
     )
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
     
     # Initialize plugin system
@@ -982,11 +983,17 @@ if __name__ == "__main__":
     discovered = plugin_manager.discover_plugins()
     print(f"✅ Plugin system ready with {len(discovered)} available plugins")
     
+    # Use the libuv event loop and C HTTP parser when installed (uvicorn[standard])
+    loop_impl = "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+    http_impl = "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    
     # Run the API server
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,  # Development mode
+        loop=loop_impl,
+        http=http_impl,
         log_level="info"
     )
\ No newline at end of file
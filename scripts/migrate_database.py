@@ -179,4 +179,10 @@ async def main():
         return 1
 
 if __name__ == "__main__":
+    # Use the libuv event loop when installed, as the API server does
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     sys.exit(asyncio.run(main()))
\ No newline at end of file
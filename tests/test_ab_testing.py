@@ -12,8 +12,10 @@ Comprehensive tests covering:
 import pytest
 import asyncio
 import json
+import os
 import tempfile
 import shutil
+from collections import deque
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 
@@ -28,6 +30,8 @@ from core.ab_testing import (
     UserAssignment,
     ExperimentEvent,
     ExperimentResults,
+    DATASKETCH_AVAILABLE,
+    PYARROW_AVAILABLE,
     create_ab_testing_framework,
     create_plugin_recommendation_experiment
 )
@@ -43,6 +47,7 @@ class TestABTestingFramework:
             framework = ABTestingFramework()
             framework.data_dir = temp_dir
             yield framework
+            asyncio.run(framework.flush())
     
     @pytest.fixture
     def sample_experiment(self):
@@ -137,10 +142,9 @@ class TestABTestingFramework:
         assert variant_id == variant_id_2
         
         # Check assignment record
-        assignment_key = f"{user_id}:{experiment_id}"
-        assert assignment_key in framework.user_assignments
+        assert user_id in framework.user_assignments[experiment_id]
         
-        assignment = framework.user_assignments[assignment_key]
+        assignment = framework.user_assignments[experiment_id][user_id]
         assert assignment.user_id == user_id
         assert assignment.experiment_id == experiment_id
         assert assignment.variant_id == variant_id
@@ -211,6 +215,98 @@ class TestABTestingFramework:
         assert "treatment" in results.variant_results
         assert len(results.recommendations) > 0
     
+    @pytest.mark.asyncio
+    async def test_experiment_results_counts(self, framework, sample_experiment):
+        """Test that results reflect tracked users and conversions per variant"""
+        experiment_id = await framework.create_experiment(sample_experiment)
+        await framework.start_experiment(experiment_id)
+        
+        assignments = {}
+        for i in range(20):
+            user_id = f"count_user_{i}"
+            assignments[user_id] = await framework.assign_user_to_experiment(user_id, experiment_id)
+            await framework.track_experiment_event(user_id, experiment_id, "page_view", "view")
+            if i % 2 == 0:
+                # Repeat conversions must only count the user once
+                for _ in range(2):
+                    await framework.track_experiment_event(user_id, experiment_id, "conversion_rate", "conversion")
+        
+        results = await framework.get_experiment_results(experiment_id)
+        
+        for variant_id in ["control", "treatment"]:
+            variant_users = [u for u, v in assignments.items() if v == variant_id]
+            converted = [u for u in variant_users if int(u.rsplit("_", 1)[1]) % 2 == 0]
+            
+            assert results.sample_sizes[variant_id] == len(variant_users)
+            metric = results.variant_results[variant_id]["conversion_rate"]
+            assert metric["count"] == len(converted)
+            assert metric["total_users"] == len(variant_users)
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not DATASKETCH_AVAILABLE, reason="datasketch not installed")
+    async def test_large_user_counts_use_hyperloglog(self, framework, sample_experiment):
+        """Test that user sets above the threshold switch to approximate counts"""
+        framework.hll_user_threshold = 50
+        experiment_id = await framework.create_experiment(sample_experiment)
+        await framework.start_experiment(experiment_id)
+        
+        for i in range(400):
+            user_id = f"hll_user_{i}"
+            await framework.assign_user_to_experiment(user_id, experiment_id)
+            await framework.track_experiment_event(user_id, experiment_id, "page_view", "view")
+        
+        results = await framework.get_experiment_results(experiment_id)
+        assert not isinstance(framework._variant_users[experiment_id]["control"], set)
+        
+        for variant_id in ["control", "treatment"]:
+            exact = sum(
+                1 for a in framework.user_assignments[experiment_id].values() if a.variant_id == variant_id
+            )
+            assert results.sample_sizes[variant_id] == pytest.approx(exact, rel=0.05)
+    
+    @pytest.mark.asyncio
+    async def test_event_retention_keeps_counters(self, framework, sample_experiment):
+        """Test that evicting old events from memory does not change results"""
+        framework.experiment_events = deque(maxlen=5)
+        experiment_id = await framework.create_experiment(sample_experiment)
+        await framework.start_experiment(experiment_id)
+        
+        for i in range(20):
+            user_id = f"retention_user_{i}"
+            await framework.assign_user_to_experiment(user_id, experiment_id)
+            await framework.track_experiment_event(user_id, experiment_id, "page_view", "view")
+        
+        results = await framework.get_experiment_results(experiment_id)
+        
+        assert len(framework.experiment_events) == 5
+        assert framework.event_count() == 20
+        assert sum(results.sample_sizes.values()) == 20
+    
+    @pytest.mark.asyncio
+    async def test_bulk_index_rebuild_matches_ingest(self, framework, sample_experiment):
+        """Test that rebuilding indexes from the event log matches incremental indexing"""
+        experiment_id = await framework.create_experiment(sample_experiment)
+        await framework.start_experiment(experiment_id)
+        
+        for i in range(30):
+            user_id = f"bulk_user_{i}"
+            await framework.assign_user_to_experiment(user_id, experiment_id)
+            await framework.track_experiment_event(user_id, experiment_id, "conversion_rate", "conversion", float(i % 4))
+        
+        expected = await framework.get_experiment_results(experiment_id)
+        expected_stats = dict(framework._welford)
+        
+        framework.bulk_index_threshold = 0
+        framework._rebuild_event_indexes()
+        rebuilt = await framework.get_experiment_results(experiment_id)
+        
+        assert rebuilt.sample_sizes == expected.sample_sizes
+        assert rebuilt.variant_results == expected.variant_results
+        for variant_id, (low, high) in expected.confidence_intervals.items():
+            assert rebuilt.confidence_intervals[variant_id] == pytest.approx((low, high))
+        for key, stats in expected_stats.items():
+            assert framework._welford[key] == pytest.approx(stats)
+    
     @pytest.mark.asyncio
     async def test_active_experiments_for_user(self, framework, sample_experiment):
         """Test getting active experiments for a user"""
@@ -219,9 +315,10 @@ class TestABTestingFramework:
         await framework.start_experiment(experiment_id)
         
         user_id = "test_user_123"
+        assert await framework.get_active_experiments_for_user(user_id) == []
         await framework.assign_user_to_experiment(user_id, experiment_id)
         
-        # Get active experiments
+        # Get active experiments (the cached empty list must not be served after assignment)
         active_experiments = await framework.get_active_experiments_for_user(user_id)
         
         assert len(active_experiments) == 1
@@ -454,6 +551,7 @@ class TestABTestingStorage:
             )
             
             await framework.create_experiment(experiment)
+            await framework.flush()
             
             # Create new framework instance and load data
             framework2 = ABTestingFramework()
@@ -464,6 +562,100 @@ class TestABTestingStorage:
             loaded_experiment = framework2.experiments["persist_test"]
             assert loaded_experiment.name == "Persistence Test"
             assert loaded_experiment.status == ExperimentStatus.DRAFT
+    
+    @pytest.mark.asyncio
+    async def test_event_persistence(self):
+        """Test that events are stored in SQLite and reloaded into the indexes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            framework = ABTestingFramework(load_data=False)
+            framework.data_dir = temp_dir
+            
+            experiment_id = "persist_events"
+            await framework.create_experiment(Experiment(
+                experiment_id=experiment_id,
+                name="Event Persistence Test",
+                description="Test event persistence",
+                status=ExperimentStatus.DRAFT,
+                variants=[
+                    ExperimentVariant("control", "Control", VariantType.CONTROL, 0.5, {}),
+                    ExperimentVariant("treatment", "Treatment", VariantType.TREATMENT, 0.5, {})
+                ],
+                metrics=[
+                    ExperimentMetric("engagement", MetricType.ENGAGEMENT_TIME, "Engagement", "Seconds engaged",
+                                     is_primary=True)
+                ],
+                target_audience={},
+                start_date="",
+                end_date="",
+                created_by="test",
+                created_at=datetime.now().isoformat()
+            ))
+            await framework.start_experiment(experiment_id)
+            
+            for i in range(20):
+                await framework.assign_user_to_experiment(f"user_{i}", experiment_id)
+                await framework.track_experiment_event(f"user_{i}", experiment_id, "engagement", "view",
+                                                       event_value=float(i), metadata={"i": i})
+            await framework.flush()
+            
+            assert os.path.exists(os.path.join(temp_dir, "experiment_events.db"))
+            
+            framework2 = ABTestingFramework(load_data=False)
+            framework2.data_dir = temp_dir
+            await framework2.load_experiments()
+            
+            assert [e.event_id for e in framework2.experiment_events] == \
+                [e.event_id for e in framework.experiment_events]
+            assert framework2.experiment_events[3].metadata == {"i": 3}
+            assert framework2._welford == framework._welford
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+    async def test_parquet_event_archive(self):
+        """Test that archived events aggregate to the same figures as the live counters"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            framework = ABTestingFramework(load_data=False)
+            framework.data_dir = temp_dir
+            
+            experiment_id = "archive_events"
+            await framework.create_experiment(Experiment(
+                experiment_id=experiment_id,
+                name="Archive Test",
+                description="Test the Parquet archive",
+                status=ExperimentStatus.DRAFT,
+                variants=[
+                    ExperimentVariant("control", "Control", VariantType.CONTROL, 0.5, {}),
+                    ExperimentVariant("treatment", "Treatment", VariantType.TREATMENT, 0.5, {})
+                ],
+                metrics=[
+                    ExperimentMetric("engagement", MetricType.ENGAGEMENT_TIME, "Engagement", "Seconds engaged",
+                                     is_primary=True)
+                ],
+                target_audience={},
+                start_date="",
+                end_date="",
+                created_by="test",
+                created_at=datetime.now().isoformat()
+            ))
+            await framework.start_experiment(experiment_id)
+            
+            for i in range(30):
+                await framework.assign_user_to_experiment(f"user_{i % 10}", experiment_id)
+                await framework.track_experiment_event(f"user_{i % 10}", experiment_id, "engagement", "view",
+                                                       event_value=float(i))
+            
+            assert await framework.export_events_parquet() == 30
+            assert await framework.export_events_parquet() == 0
+            
+            aggregates = await framework.get_archived_event_aggregates(experiment_id)
+            results = await framework.get_experiment_results(experiment_id)
+            for variant_id, metrics in aggregates.items():
+                archived = metrics["engagement"]
+                assert archived["count"] == results.variant_results[variant_id]["engagement"]["count"]
+                assert archived["total"] == pytest.approx(results.variant_results[variant_id]["engagement"]["total"])
+                assert archived["unique_users"] == results.sample_sizes[variant_id]
+            
+            await framework.close()
 
 
 @pytest.mark.asyncio
@@ -474,7 +666,7 @@ async def test_create_ab_testing_framework():
     assert isinstance(framework, ABTestingFramework)
     assert framework.experiments == {}
     assert framework.user_assignments == {}
-    assert framework.experiment_events == []
+    assert list(framework.experiment_events) == []
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""
+Unit Tests for the Analytics Collector
+
+Tests covering:
+- Columnar (numpy) and pure-Python query paths returning identical results
+- Scalar and vectorized local timestamp formatting across DST changes
+"""
+
+import pytest
+import os
+import random
+import time
+
+from core.analytics import (
+    AnalyticsEvent,
+    ColumnarEventStore,
+    EventType,
+    ANALYTICS_LIBS_AVAILABLE,
+    create_analytics_collector,
+    _iso_timestamp,
+    _iso_timestamps
+)
+
+# 2024-03-10 07:00:00 UTC, when America/New_York moves from EST (-5h) to EDT (-4h)
+NEW_YORK_DST_START = 1710054000
+
+
+class TestAnalyticsQueryPaths:
+    """Test cases comparing the columnar store with the pure-Python fallback"""
+    
+    async def _populated_collector(self):
+        """Collector holding a deterministic mix of events across users, sessions and plugins"""
+        rng = random.Random(7)
+        collector = create_analytics_collector(buffer_size=10_000)
+        users = [f"user_{i}" for i in range(6)]
+        sessions = {user: await collector.start_session(user, {"device_type": "mobile"}) for user in users}
+        event_types = list(EventType)
+        
+        for _ in range(400):
+            user = rng.choice(users)
+            roll = rng.random()
+            if roll < 0.3:
+                await collector.track_plugin_usage(
+                    user, sessions[user], rng.choice(["golf", "tennis"]),
+                    rng.choice(["activated", "usage"]), rng.randrange(120)
+                )
+            elif roll < 0.45:
+                await collector.track_workout(
+                    user, sessions[user], {"workout_type": "strength", "duration": rng.randrange(90)}
+                )
+            else:
+                properties = {"plugin_id": rng.choice(["golf", "tennis"])} if rng.random() < 0.3 else {}
+                await collector.track_event(user, sessions[user], rng.choice(event_types), properties)
+        
+        await collector.end_session(sessions[users[0]])
+        return collector, users
+    
+    async def _query_all(self, collector, users):
+        """Every user, plugin and platform analytics result"""
+        return {
+            "users": [await collector.get_user_analytics(user) for user in users + ["unknown_user"]],
+            "plugins": [await collector.get_plugin_analytics(plugin) for plugin in ("golf", "tennis", "none")],
+            "platform": await collector.get_platform_analytics()
+        }
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not ANALYTICS_LIBS_AVAILABLE, reason="numpy/pandas not installed")
+    async def test_columnar_and_fallback_results_match(self):
+        """Test that forcing the fallback path yields the same dicts as the columnar store"""
+        collector, users = await self._populated_collector()
+        assert collector._columns is not None
+        
+        columnar = await self._query_all(collector, users)
+        collector._columns = None
+        fallback = await self._query_all(collector, users)
+        
+        assert columnar["users"][0]["total_events"] > 0
+        assert columnar["plugins"][0]["total_usage_events"] > 0
+        assert columnar == fallback
+
+
+@pytest.mark.skipif(not ANALYTICS_LIBS_AVAILABLE, reason="numpy/pandas not installed")
+@pytest.mark.skipif(not hasattr(time, "tzset"), reason="time.tzset not available")
+class TestTimestampFormatting:
+    """Test cases for local ISO timestamps of buffered events"""
+    
+    @pytest.fixture(autouse=True)
+    def new_york_time(self, monkeypatch):
+        """Run in a time zone with a DST change"""
+        monkeypatch.setenv("TZ", "America/New_York")
+        time.tzset()
+        yield
+        monkeypatch.undo()
+        time.tzset()
+    
+    @staticmethod
+    def _event(user_id: str, timestamp_ns: int) -> AnalyticsEvent:
+        """Event whose ISO timestamp is formatted from timestamp_ns"""
+        return AnalyticsEvent(
+            event_id=f"e{timestamp_ns}", user_id=user_id, session_id="s1",
+            event_type=EventType.BUTTON_CLICK, timestamp="", properties={}, timestamp_ns=timestamp_ns
+        )
+    
+    def test_vectorized_matches_scalar_across_dst(self):
+        """Test that batch formatting uses each event's own offset and matches isoformat()"""
+        events = [
+            self._event("a", (NEW_YORK_DST_START - 1) * 1_000_000_000 + 500_000_000),
+            self._event("a", NEW_YORK_DST_START * 1_000_000_000),
+            self._event("b", (NEW_YORK_DST_START + 90) * 1_000_000_000 + 123_456_789),
+            self._event("b", (NEW_YORK_DST_START - 86_400 * 30) * 1_000_000_000)
+        ]
+        
+        vectorized = _iso_timestamps(events)
+        
+        assert vectorized == [_iso_timestamp(event) for event in events]
+        assert vectorized == [
+            "2024-03-10T01:59:59.500000",
+            "2024-03-10T03:00:00",
+            "2024-03-10T03:01:30.123456",
+            "2024-02-09T02:00:00"
+        ]
+    
+    def test_preset_timestamp_kept(self):
+        """Test that an event's stored timestamp string is used as is"""
+        event = self._event("a", NEW_YORK_DST_START * 1_000_000_000)
+        event.timestamp = "2024-01-01T00:00:00"
+        
+        assert _iso_timestamps([event]) == [_iso_timestamp(event)] == ["2024-01-01T00:00:00"]
+    
+    @pytest.mark.asyncio
+    async def test_daily_active_users_bucketed_by_local_day(self):
+        """Test that columnar day buckets match the fallback's local calendar days"""
+        events = [
+            # 2024-03-10 03:30 UTC is still 2024-03-09 in New York
+            self._event("a", (NEW_YORK_DST_START - 12_600) * 1_000_000_000),
+            self._event("b", NEW_YORK_DST_START * 1_000_000_000),
+            self._event("a", (NEW_YORK_DST_START + 17 * 3600) * 1_000_000_000)
+        ]
+        store = ColumnarEventStore(len(events))
+        for event in events:
+            store.append(event)
+        collector = create_analytics_collector()
+        
+        columnar = store.daily_active_users(list(range(len(events))))
+        
+        assert columnar == collector._calculate_daily_active_users(events)
+        assert columnar == [
+            {"date": "2024-03-09", "active_users": 1},
+            {"date": "2024-03-10", "active_users": 2}
+        ]
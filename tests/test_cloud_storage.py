@@ -0,0 +1,141 @@
+"""
+Unit Tests for the Local Cloud Storage Backend
+
+Tests covering:
+- Object lifecycle through the meta.db index (upload, prefix listing, info, delete)
+- First start over files stored before meta.db, with and without .meta sidecars
+"""
+
+import pytest
+import json
+import os
+import tempfile
+
+from core.cloud_storage import CloudStorageManager, StorageConfig, StorageProvider
+
+
+async def _start_manager(storage_path: str) -> CloudStorageManager:
+    """Initialized local filesystem manager over storage_path"""
+    manager = CloudStorageManager(StorageConfig(provider=StorageProvider.LOCAL_FS, local_storage_path=storage_path))
+    assert await manager.initialize()
+    assert manager.provider == StorageProvider.LOCAL_FS
+    return manager
+
+
+def _write_file(storage_path: str, key: str, data: bytes, sidecar: dict = None):
+    """Write an object the way the pre-index backend did, optionally with its .meta sidecar"""
+    path = os.path.join(storage_path, *key.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if sidecar is not None:
+        with open(path + ".meta", 'w') as f:
+            json.dump(sidecar, f)
+
+
+class TestLocalObjectIndex:
+    """Test cases for objects stored through the local backend"""
+    
+    @pytest.fixture
+    def storage_path(self):
+        """Temporary storage root"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+    
+    @pytest.mark.asyncio
+    async def test_upload_info_download_delete(self, storage_path):
+        """Test an object's round trip through the index"""
+        manager = await _start_manager(storage_path)
+        
+        assert await manager.upload_file(b"hello", "users/u1/notes.txt", metadata={"source": "test"})
+        
+        info = await manager.get_file_info("users/u1/notes.txt")
+        assert info.size == 5
+        assert info.content_type == "text/plain"
+        assert info.metadata["source"] == "test"
+        assert info.metadata["original_size"] == 5
+        assert await manager.download_file("users/u1/notes.txt") == b"hello"
+        
+        assert await manager.delete_file("users/u1/notes.txt")
+        assert await manager.get_file_info("users/u1/notes.txt") is None
+        assert not os.path.exists(os.path.join(storage_path, "users", "u1", "notes.txt"))
+        assert await manager.list_files("users/u1/") == []
+    
+    @pytest.mark.asyncio
+    async def test_list_by_prefix_bounds(self, storage_path):
+        """Test that prefix listing returns exactly the keys under the prefix, in key order"""
+        manager = await _start_manager(storage_path)
+        for key in ("users/u1/b.txt", "users/u1/a.txt", "users/u1/sub/c.txt",
+                    "users/u10/d.txt", "users/u1.txt", "users/u0/e.txt"):
+            assert await manager.upload_file(b"x", key)
+        
+        listed = await manager.list_files("users/u1/")
+        
+        assert [obj.key for obj in listed] == ["users/u1/a.txt", "users/u1/b.txt", "users/u1/sub/c.txt"]
+        assert [obj.key for obj in await manager.list_files("users/u1/", limit=2)] == [
+            "users/u1/a.txt", "users/u1/b.txt"
+        ]
+        assert len(await manager.list_files()) == 6
+    
+    @pytest.mark.asyncio
+    async def test_list_with_metadata(self, storage_path):
+        """Test that include_metadata decodes the stored metadata"""
+        manager = await _start_manager(storage_path)
+        await manager.upload_file(b"{}", "users/u1/data.json", metadata={"kind": "export"})
+        
+        listed = await manager.list_files("users/u1/", include_metadata=True)
+        
+        assert listed[0].content_type == "application/json"
+        assert listed[0].metadata["kind"] == "export"
+
+
+class TestPreIndexMigration:
+    """Test cases for the one-time import of files stored before meta.db"""
+    
+    @pytest.fixture
+    def storage_path(self):
+        """Temporary storage root"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+    
+    @pytest.mark.asyncio
+    async def test_existing_files_indexed_and_sidecars_renamed(self, storage_path):
+        """Test that first start indexes existing files and keeps their sidecars as .meta.migrated"""
+        _write_file(storage_path, "users/u1/report.csv", b"a,b\n1,2\n",
+                    sidecar={"content_type": "text/csv", "metadata": {"author": "coach"}})
+        _write_file(storage_path, "users/u1/raw.bin", b"\x00\x01")
+        
+        manager = await _start_manager(storage_path)
+        
+        report = await manager.get_file_info("users/u1/report.csv")
+        assert report.content_type == "text/csv"
+        assert report.metadata == {"author": "coach"}
+        assert report.size == 8
+        
+        raw = await manager.get_file_info("users/u1/raw.bin")
+        assert raw.content_type == "application/octet-stream"
+        assert raw.metadata == {}
+        
+        assert sorted(os.listdir(os.path.join(storage_path, "users", "u1"))) == [
+            "raw.bin", "report.csv", "report.csv.meta.migrated"
+        ]
+        assert [obj.key for obj in await manager.list_files("users/u1/")] == [
+            "users/u1/raw.bin", "users/u1/report.csv"
+        ]
+        assert await manager.list_files("meta.db") == []
+    
+    @pytest.mark.asyncio
+    async def test_second_start_does_not_reimport(self, storage_path):
+        """Test that the import runs only when meta.db is created"""
+        _write_file(storage_path, "users/u1/old.txt", b"old", sidecar={"content_type": "text/plain", "metadata": {}})
+        await _start_manager(storage_path)
+        
+        # Written behind the index's back after the first start
+        _write_file(storage_path, "users/u1/late.txt", b"late",
+                    sidecar={"content_type": "text/plain", "metadata": {}})
+        
+        manager = await _start_manager(storage_path)
+        
+        assert [obj.key for obj in await manager.list_files("users/u1/")] == ["users/u1/old.txt"]
+        assert os.path.exists(os.path.join(storage_path, "users", "u1", "late.txt.meta"))
+        assert os.path.exists(os.path.join(storage_path, "users", "u1", "old.txt.meta.migrated"))
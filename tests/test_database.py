@@ -0,0 +1,267 @@
+"""
+Unit Tests for the JSON File Database Backend
+
+Tests covering:
+- Per-user workout index (re-saves, ordering, limit, rebuild at startup)
+- Buffered NDJSON analytics log and midnight rollover
+- Single-flight reads shared by concurrent callers
+"""
+
+import pytest
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+import core.database as database
+from core.database import DatabaseManager, DatabaseConfig, DatabaseType
+
+
+def _make_manager(data_dir: str, **overrides) -> DatabaseManager:
+    """JSON backed manager over data_dir"""
+    config = DatabaseConfig(db_type=DatabaseType.JSON_FILE, json_data_dir=data_dir, **overrides)
+    manager = DatabaseManager(config)
+    assert manager._initialize_json_fallback()
+    return manager
+
+
+def _write_workout(data_dir: str, workout: dict):
+    """Write a workout file the way builds before the per-user index did"""
+    workouts_dir = os.path.join(data_dir, "workouts")
+    os.makedirs(workouts_dir, exist_ok=True)
+    with open(os.path.join(workouts_dir, f"{workout['workout_id']}.json"), 'w') as f:
+        json.dump(workout, f)
+
+
+def _read_ndjson(path: str) -> list:
+    """Parse an NDJSON file"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestWorkoutIndex:
+    """Test cases for the per-user workout index"""
+    
+    @pytest.fixture
+    def data_dir(self):
+        """Temporary JSON data directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+    
+    @pytest.mark.asyncio
+    async def test_resaved_workout_listed_once_with_latest_save(self, data_dir):
+        """Test that a re-saved workout appears once, ordered by its latest save"""
+        manager = _make_manager(data_dir)
+        
+        await manager.save_workout({"workout_id": "w1", "user_id": "alice", "workout_type": "run"})
+        await manager.save_workout({"workout_id": "w2", "user_id": "alice", "workout_type": "bike"})
+        await manager.save_workout({"workout_id": "w1", "user_id": "alice", "workout_type": "swim"})
+        
+        workouts = await manager.get_user_workouts("alice")
+        
+        assert [w["workout_id"] for w in workouts] == ["w1", "w2"]
+        assert workouts[0]["workout_type"] == "swim"
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_workouts_newest_first_within_limit(self, data_dir):
+        """Test ordering by created_at and the limit"""
+        manager = _make_manager(data_dir)
+        
+        for workout_id in ("w1", "w2", "w3"):
+            await manager.save_workout({"workout_id": workout_id, "user_id": "alice"})
+        await manager.save_workout({"workout_id": "other", "user_id": "bob"})
+        
+        workouts = await manager.get_user_workouts("alice", limit=2)
+        
+        assert [w["workout_id"] for w in workouts] == ["w3", "w2"]
+        assert await manager.get_user_workouts("nobody") == []
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_index_rebuilt_from_pre_index_data(self, data_dir):
+        """Test that startup indexes workout files saved before the index existed"""
+        _write_workout(data_dir, {"workout_id": "old", "user_id": "alice", "created_at": "2023-01-01T08:00:00"})
+        _write_workout(data_dir, {"workout_id": "new", "user_id": "alice", "created_at": "2024-01-01T08:00:00"})
+        _write_workout(data_dir, {"workout_id": "mid", "user_id": "alice", "created_at": "2023-06-01T08:00:00"})
+        _write_workout(data_dir, {"workout_id": "b1", "user_id": "bob", "created_at": "2023-03-01T08:00:00"})
+        
+        manager = _make_manager(data_dir)
+        
+        assert os.path.exists(manager._workout_index_file("alice"))
+        assert [w["workout_id"] for w in await manager.get_user_workouts("alice")] == ["new", "mid", "old"]
+        assert [w["workout_id"] for w in await manager.get_user_workouts("alice", limit=1)] == ["new"]
+        assert [w["workout_id"] for w in await manager.get_user_workouts("bob")] == ["b1"]
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_existing_index_not_rebuilt(self, data_dir):
+        """Test that an existing index is reused rather than rebuilt at startup"""
+        manager = _make_manager(data_dir)
+        await manager.save_workout({"workout_id": "w1", "user_id": "alice"})
+        await manager.close()
+        
+        with patch.object(DatabaseManager, "rebuild_workout_index") as rebuild:
+            manager = _make_manager(data_dir)
+        
+        rebuild.assert_not_called()
+        assert [w["workout_id"] for w in await manager.get_user_workouts("alice")] == ["w1"]
+        await manager.close()
+
+
+class TestAnalyticsLog:
+    """Test cases for the buffered NDJSON analytics log"""
+    
+    @pytest.fixture
+    def data_dir(self):
+        """Temporary JSON data directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+    
+    @pytest.mark.asyncio
+    async def test_events_buffered_until_flush_threshold(self, data_dir):
+        """Test that events reach the daily file once the buffer fills"""
+        manager = _make_manager(data_dir, analytics_flush_events=3, analytics_flush_interval=3600.0)
+        day_file = manager._analytics_file(datetime.now().strftime('%Y-%m-%d'))
+        
+        await manager.log_analytics_event({"user_id": "alice", "event_type": "view", "n": 0})
+        await manager.log_analytics_event({"user_id": "alice", "event_type": "view", "n": 1})
+        assert not os.path.exists(day_file)
+        
+        await manager.log_analytics_event({"user_id": "alice", "event_type": "view", "n": 2})
+        assert [event["n"] for event in _read_ndjson(day_file)] == [0, 1, 2]
+        
+        await manager.log_analytics_event({"user_id": "alice", "event_type": "view", "n": 3})
+        await manager.close()
+        assert [event["n"] for event in _read_ndjson(day_file)] == [0, 1, 2, 3]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_events_written_after_buffered_ones(self, data_dir):
+        """Test that a bulk write flushes earlier buffered events first"""
+        manager = _make_manager(data_dir, analytics_flush_events=100, analytics_flush_interval=3600.0)
+        day_file = manager._analytics_file(datetime.now().strftime('%Y-%m-%d'))
+        
+        await manager.log_analytics_event({"event_id": "single", "user_id": "alice", "event_type": "view"})
+        await manager.log_analytics_events_bulk([
+            ("bulk", "alice", "s1", "click", "2024-03-01T09:30:00.250000", '{"button": "start"}', '{"os": "ios"}')
+        ])
+        await manager.close()
+        
+        events = _read_ndjson(day_file)
+        assert [event["event_id"] for event in events] == ["single", "bulk"]
+        assert events[1]["timestamp"] == "2024-03-01T09:30:00.250000"
+        assert events[1]["properties"] == {"button": "start"}
+        assert events[1]["device_info"] == {"os": "ios"}
+    
+    @pytest.mark.asyncio
+    async def test_bulk_line_keeps_payload_through_migration_mapping(self, data_dir):
+        """Test that a bulk-written line maps to INSERT_ANALYTICS parameters with its payload and time"""
+        manager = _make_manager(data_dir, analytics_flush_events=100, analytics_flush_interval=3600.0)
+        day_file = manager._analytics_file(datetime.now().strftime('%Y-%m-%d'))
+        
+        await manager.log_analytics_events_bulk([
+            ("e1", "alice", "s1", "workout_completed", "2024-03-01T09:30:00", '{"reps": 10}', '{}')
+        ])
+        await manager.close()
+        
+        params = database._analytics_params(_read_ndjson(day_file)[0])
+        assert params["event_data"] == {"reps": 10}
+        assert params["session_id"] == "s1"
+        assert params["timestamp"] == datetime(2024, 3, 1, 9, 30)
+    
+    @pytest.mark.asyncio
+    async def test_midnight_rollover(self, data_dir):
+        """Test that events are written to the file of the day they were logged"""
+        clock = [datetime(2024, 3, 1, 23, 59, 59)]
+        
+        class FakeDateTime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock[0]
+        
+        with patch.object(database, "datetime", FakeDateTime):
+            manager = _make_manager(data_dir, analytics_flush_events=100, analytics_flush_interval=3600.0)
+            await manager.log_analytics_event({"user_id": "alice", "event_type": "late", "n": 0})
+            
+            clock[0] = datetime(2024, 3, 2, 0, 0, 1)
+            await manager.log_analytics_event({"user_id": "alice", "event_type": "early", "n": 1})
+            
+            # The previous day's buffer is flushed and its file closed at rollover
+            assert [event["n"] for event in _read_ndjson(manager._analytics_file("2024-03-01"))] == [0]
+            await manager.close()
+        
+        assert [event["n"] for event in _read_ndjson(manager._analytics_file("2024-03-02"))] == [1]
+
+
+class TestSingleFlight:
+    """Test cases for single-flight reads"""
+    
+    @pytest.fixture
+    def data_dir(self):
+        """Temporary JSON data directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_user_reads_share_one_load(self, data_dir):
+        """Test that concurrent get_user calls load the user file once"""
+        manager = _make_manager(data_dir)
+        await manager.create_user({"user_id": "alice", "username": "alice", "profile": {"level": 1}})
+        
+        calls = []
+        original = manager._get_user_json
+        
+        def counting_get_user_json(user_id):
+            calls.append(user_id)
+            return original(user_id)
+        
+        with patch.object(manager, "_get_user_json", side_effect=counting_get_user_json):
+            users = await asyncio.gather(*(manager.get_user("alice") for _ in range(10)))
+        
+        assert calls == ["alice"]
+        assert all(user["username"] == "alice" for user in users)
+        # Each caller gets its own copy
+        users[0]["username"] = "changed"
+        assert users[1]["username"] == "alice"
+        assert manager._inflight == {}
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_read(self, data_dir):
+        """Test that cancelling one waiter leaves the lookup running for the others"""
+        manager = _make_manager(data_dir)
+        release = asyncio.Event()
+        calls = []
+        
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return ["w1"]
+        
+        first = asyncio.create_task(manager._single_flight(("workouts", "alice", 50), fetch))
+        second = asyncio.create_task(manager._single_flight(("workouts", "alice", 50), fetch))
+        await asyncio.sleep(0)
+        
+        first.cancel()
+        release.set()
+        
+        assert await second == ["w1"]
+        assert first.cancelled()
+        assert calls == [1]
+        await manager.close()
+    
+    @pytest.mark.asyncio
+    async def test_finished_read_not_reused(self, data_dir):
+        """Test that a later call after completion runs a fresh lookup"""
+        manager = _make_manager(data_dir)
+        calls = []
+        
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+        
+        assert await manager._single_flight(("user", "alice"), fetch) == 1
+        assert await manager._single_flight(("user", "alice"), fetch) == 2
+        await manager.close()
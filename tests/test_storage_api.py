@@ -0,0 +1,41 @@
+"""
+Unit Tests for the Cloud Storage API
+
+Tests covering:
+- Resolving client file keys into a user's namespace and rejecting traversal
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from api.storage_api import _resolve_user_key
+
+
+class TestResolveUserKey:
+    """Test cases for file key normalization"""
+    
+    @pytest.mark.parametrize("file_key", [
+        "../other/secret",
+        "/etc/passwd",
+        "users/user_1/a/../b",
+        "photos/../../user_2/secret.txt",
+        "users/user_1/../user_2/secret.txt"
+    ])
+    def test_traversal_rejected(self, file_key):
+        """Test that keys escaping the user's namespace return 400"""
+        with pytest.raises(HTTPException) as exc_info:
+            _resolve_user_key("user_1", file_key)
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_prefixed_key_unchanged(self):
+        """Test that a key already under users/<id>/ passes through"""
+        assert _resolve_user_key("user_1", "users/user_1/uploads/photo.jpg") == "users/user_1/uploads/photo.jpg"
+    
+    def test_relative_key_prefixed(self):
+        """Test that a bare relative key is placed under users/<id>/"""
+        assert _resolve_user_key("user_1", "uploads/photo.jpg") == "users/user_1/uploads/photo.jpg"
+    
+    def test_other_users_prefix_stays_in_namespace(self):
+        """Test that another user's prefix is nested under the caller's namespace"""
+        assert _resolve_user_key("user_1", "users/user_2/secret.txt") == "users/user_1/users/user_2/secret.txt"